@@ -136,6 +136,7 @@ async def delete_account(
     try:
         # For demo mode, we don't actually delete
         # In production: await db.delete(current_user)
+        # (after DELETE /documents, which drops the user's files and vectors via rag_service.delete_by_user)
         return {"message": "Account deletion is disabled in demo mode", "status": "demo"}
     except Exception as e:
         await db.rollback()
@@ -1,9 +1,13 @@
+import asyncio
+from uuid import uuid4
+from pathlib import Path
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy import select, desc, delete
 from app.db.session import get_db, AsyncSession
 from app.api.deps import get_current_user
 from app.models.document import Document
+from app.core.config import settings
 from app.schemas.user import UserResponse  # Reuse or create document schema if needed
 
 router = APIRouter()
@@ -33,91 +37,173 @@ async def list_documents(
         for doc in documents
     ]
 
-    return [
-        {
-            "id": doc.id,
-            "filename": doc.filename,
-            "file_size": doc.file_size,
-            "mime_type": doc.mime_type,
-            "created_at": doc.created_at,
-            "processing_status": doc.processing_status
-        }
-        for doc in documents
-    ]
-
-@router.post("/upload")
+@router.post("/upload", status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     current_user = Depends(get_current_user), # Require Auth
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Upload and Process a Document (PDF/TXT) into the RAG System.
+    Accept a Document (PDF/DOCX/TXT/MD) for the RAG System.
+    The file is spooled and queued; extraction + indexing run in the background
+    (poll GET /documents/{id}/status).
     """
+    from app.services.document_service import document_service, SUPPORTED_EXTENSIONS, FileTooLargeError
+    from app.services.ingest_queue import ingest_queue
+
+    ext = (file.filename or "").lower().split('.')[-1]
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: .{ext}")
+
+    max_bytes = settings.MAX_UPLOAD_MB * 1024 * 1024
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {settings.MAX_UPLOAD_MB} MB limit")
+
     try:
-        from app.services.document_service import document_service
-        
-        # 1. Save to temp
-        import shutil
-        import os
-        from uuid import uuid4
-        
-        os.makedirs("temp_uploads", exist_ok=True)
-        temp_path = f"temp_uploads/{uuid4()}_{file.filename}"
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # 2. Process (Upload to S3 + Index in RAG)
-        # Pass User ID and Scope='private' to secure this document
-        processed_doc = await document_service.process_file(
-            temp_path, 
-            original_filename=file.filename,
-            metadata={"user_id": str(current_user.id), "scope": "private"}
-        )
+        # 1. Stream to the local spool (hashed on the way; the worker uploads it to S3)
+        document_id = str(uuid4())
+        spooled = await document_service.spool(file, ingest_queue.spool_path(document_id, file.filename), max_bytes)
 
-        # CRITICAL FIX: Ingest into Vector DB (The "Fuel" for RAG)
-        if processed_doc:
-            from app.services.rag_service import rag_service
-            await rag_service.ingest_document(processed_doc)
-        
-        # 3. Create DB Record
+        # 2. Create DB Record in 'pending' -> picked up by an ingestion worker
         new_doc = Document(
+            id=document_id,
             filename=file.filename,
-            file_size=0, 
-            mime_type=file.content_type,
-            storage_path=processed_doc.metadata.get("source", "s3"),
-            processing_status="completed",
-            content_hash="hash",
-            user_id=str(current_user.id) # Associate with User
+            original_filename=file.filename,
+            file_path=str(spooled.path),
+            file_size=spooled.size,
+            mime_type=file.content_type or "application/octet-stream",
+            content_hash=spooled.content_hash,
+            processing_status="pending",
+            uploaded_by=str(current_user.id) # Associate with User
         )
         db.add(new_doc)
         await db.commit()
-        await db.refresh(new_doc)
-        
-        # Cleanup
-        os.remove(temp_path)
-        
-        return {"status": "success", "id": new_doc.id, "filename": new_doc.filename, "message": "Indexed Successfully (Private Scope)"}
+        ingest_queue.notify()
+
+        return {
+            "status": "accepted",
+            "id": new_doc.id,
+            "filename": new_doc.filename,
+            "processing_status": new_doc.processing_status,
+            "message": "Queued for indexing (Private Scope)"
+        }
         
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+async def _get_owned_document(document_id: str, current_user, db: AsyncSession) -> Document:
+    document = await db.get(Document, document_id)
+    if not document or document.uploaded_by != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+
+@router.get("/{document_id}/status")
+async def get_document_status(
+    document_id: str,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Ingestion status of an uploaded document (pending | processing | completed | failed).
+    """
+    document = await _get_owned_document(document_id, current_user, db)
+    return {
+        "id": document.id,
+        "filename": document.filename,
+        "processing_status": document.processing_status,
+        "progress": {
+            "pages": document.pages_processed or 0,
+            "chunks": document.chunks_indexed or 0,
+        },
+        "error": document.error_message,
+        "created_at": document.created_at,
+        "updated_at": document.updated_at,
+    }
+
+
+@router.post("/{document_id}/reindex", status_code=202)
+async def reindex_document(
+    document_id: str,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Re-run extraction + indexing for a document (its previous vectors are replaced).
+    """
+    from app.services.ingest_queue import ingest_queue
+
+    document = await _get_owned_document(document_id, current_user, db)
+    if document.processing_status in ("pending", "processing"):
+        raise HTTPException(status_code=409, detail=f"Document is already {document.processing_status}")
+
+    await ingest_queue.enqueue(db, document)
+    return {"status": "accepted", "id": document.id, "processing_status": document.processing_status}
+
+
+async def _delete_stored_file(document: Document):
+    """
+    Remove the stored original: the S3 object, or the spool file of a never-uploaded job.
+    Only the document's own uploads/<document_id>/ copy is deleted; legacy rows pointing at
+    documents/ share that object with the public S3 sync (and other users), so it is kept.
+    """
+    from app.services.storage_service import storage_service
+
+    if document.file_path and document.file_path.startswith("s3://"):
+        _, key = storage_service.parse_url(document.file_path)
+        if key.startswith(storage_service.upload_key(document.id, "")):
+            await storage_service.delete(document.file_path)
+    elif document.file_path:
+        await asyncio.to_thread(Path(document.file_path).unlink, missing_ok=True)
+
+
+@router.delete("/{document_id}")
 async def delete_document(
     document_id: str,
+    current_user = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
-    Delete a document from the database.
-    Note: This does not remove it from the Vector Index (FAISS) immediately.
+    Delete a document: its vectors (one filtered delete), the stored file and the DB row.
     """
-    stmt = select(Document).where(Document.id == document_id)
-    result = await db.execute(stmt)
-    document = result.scalar_one_or_none()
-    
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
-        
+    from app.services.rag_service import rag_service
+
+    document = await _get_owned_document(document_id, current_user, db)
+    if document.processing_status == "processing":
+        raise HTTPException(status_code=409, detail="Document is being indexed, retry when it finishes")
+
+    await rag_service.delete_by_document(document.id)
+    await _delete_stored_file(document)
     await db.delete(document)
     await db.commit()
-    
+
     return {"status": "success", "message": "Document deleted"}
+
+
+@router.delete("/")
+async def delete_all_documents(
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Delete ALL documents of the current user (account removal).
+    Vectors go in one filtered delete on the user's private scope.
+    """
+    from app.services.rag_service import rag_service
+
+    user_id = str(current_user.id)
+    result = await db.execute(select(Document).where(Document.uploaded_by == user_id))
+    documents = result.scalars().all()
+    if any(doc.processing_status == "processing" for doc in documents):
+        raise HTTPException(status_code=409, detail="Documents are being indexed, retry when they finish")
+
+    await rag_service.delete_by_user(user_id)
+    for document in documents:
+        await _delete_stored_file(document)
+    await db.execute(delete(Document).where(Document.uploaded_by == user_id))
+    await db.commit()
+
+    return {"status": "success", "deleted": len(documents)}
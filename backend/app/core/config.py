@@ -22,6 +22,14 @@ class Settings(BaseSettings):
     
     # AI / OpenAI
     OPENAI_API_KEY: Optional[str] = None
+    # Shared HTTP pool for every OpenAI client (one keep-alive pool, multiplexed over HTTP/2)
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE: int = 10
+    LLM_KEEPALIVE_SECONDS: float = 60.0  # Idle connections are closed after this
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_TIMEOUT_SECONDS: float = 60.0  # Read / write (between streamed chunks, not the whole answer)
+    LLM_POOL_TIMEOUT_SECONDS: float = 10.0  # Max wait for a free connection when the pool is saturated
     
     # Vector DB (Legacy Alias updated for Qdrant)
     VECTOR_DB_PATH: str = str(BASE_DIR / "data" / "qdrant_storage")
@@ -34,12 +42,101 @@ class Settings(BaseSettings):
     QDRANT_PATH: str = str(BASE_DIR / "data" / "qdrant_storage")
     QDRANT_COLLECTION_NAME: str = "documents"
     QDRANT_API_KEY: Optional[str] = None  # Required for Qdrant Cloud
+    QDRANT_KEEP_GENERATIONS: int = 3  # Blue/green: old index generations kept for rollback
+
+    # Embeddings (stored in the collection metadata and checked at startup)
+    EMBEDDING_MODEL: str = "text-embedding-3-large"
+    EMBEDDING_DIMENSIONS: int = 3072  # Matryoshka: 1024 / 256 for a cheaper first stage
+    # If set (e.g. 3072), a full-dimension vector is stored on disk and used to rescore first-stage hits
+    EMBEDDING_RESCORE_DIMENSIONS: Optional[int] = None
+
+    # Qdrant Collection Profile (applied when a collection is created)
+    # Quantization: 'none' (float32), 'scalar' (int8) or 'binary'
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_ON_DISK_VECTORS: bool = False  # Original vectors mmapped from disk
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_SEARCH_HNSW_EF: Optional[int] = None
+    QDRANT_RESCORE: bool = True  # Rescore quantized candidates with original vectors
+    QDRANT_OVERSAMPLING: float = 2.0
+
+    # Redis (Shared Cache Tier, see docker-compose)
+    REDIS_URL: Optional[str] = None
+
+    # Query-Embedding Cache
+    # Backend: 'memory' (per-process only), 'redis' (shared) or 'disk' (SQLite)
+    EMBEDDING_CACHE_BACKEND: str = "memory"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 2000  # ~24 MB of 3072-dim vectors in RAM
+    EMBEDDING_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7  # 7 days
+    EMBEDDING_CACHE_PATH: str = str(BASE_DIR / "data" / "embedding_cache.sqlite")
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 50000
+
+    # Query-Translation Cache (dual-language search); 'redis' falls back to memory without REDIS_URL
+    TRANSLATION_CACHE_BACKEND: str = "redis"
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 5000  # In-process tier
+    TRANSLATION_CACHE_BACKEND_MAX_ENTRIES: int = 50000  # Shared tier (Redis namespace "tr:" / SQLite rows)
+    TRANSLATION_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30  # 30 days
+    TRANSLATION_CACHE_PATH: str = str(BASE_DIR / "data" / "translation_cache.sqlite")
+    TRANSLATION_GLOSSARY_ENABLED: bool = True  # Vision 2030 program names bypass the LLM
+    TRANSLATION_GLOSSARY_PATH: Optional[str] = None  # Extra terms, JSON {"English": "Arabic"}
+
+    # Intent Router (RAG vs chat): local rules + linear classifier, LLM only below this confidence
+    INTENT_ROUTER_THRESHOLD: float = 0.75
+
+    # Hybrid Retrieval (Dense + BM25-style Sparse, fused server-side)
+    HYBRID_SEARCH_ENABLED: bool = True
+
+    # Reranking
+    # Backend: 'cross_encoder' (local CPU), 'llm' (gpt-5-nano judge) or 'none'
+    RERANKER_BACKEND: str = "cross_encoder"
+    RERANKER_MODEL: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"  # Multilingual (Arabic + English)
+    RERANKER_USE_ONNX: bool = False
+    RERANKER_BATCH_SIZE: int = 16
+    RERANK_CANDIDATES: int = 20  # Candidates passed to the reranker
+    RERANK_MIN_SCORE: float = 0.05  # Cross-Encoder cutoff (sigmoid score)
+    RERANK_FALLBACK_TOP_N: int = 3  # Kept (best first) when the cutoff would drop every candidate
 
     # AWS S3 Storage
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_REGION: str = "eu-central-1"
     S3_BUCKET_NAME: str = "saudi-vision-ai-storage-917"
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO / moto server
+    S3_MAX_CONNECTIONS: int = 16  # Shared client pool + executor threads
+    S3_MULTIPART_THRESHOLD_MB: int = 8  # Larger files are uploaded in parallel parts
+    S3_MULTIPART_CHUNK_MB: int = 8
+
+    # Document Extraction (process pool, off the event loop)
+    EXTRACTION_WORKERS: Optional[int] = None  # Default: CPU count
+    PDF_PAGES_PER_TASK: int = 25  # Large PDFs are split into page ranges extracted in parallel
+    PDF_MAX_PAGES: int = 1000  # Pages beyond the cap are ignored
+    EXTRACTION_TIMEOUT_SECONDS: int = 120  # Per document; stuck workers are killed
+    # Content-addressed cache of extracted pages + chunks (keyed by SHA-256 of the file)
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_PATH: str = str(BASE_DIR / "data" / "extraction_cache")
+    EXTRACTION_CACHE_MAX_MB: int = 2048
+
+    # Chunking (measured in model tokens; headings/page markers are respected)
+    CHUNK_TOKENS: int = 300
+    CHUNK_OVERLAP_TOKENS: int = 40  # Whole sentences, within the same section
+    CHUNK_TOKENIZER: str = "o200k_base"  # tiktoken encoding (GPT-4o / GPT-5 family)
+
+    # Parent/Child Retrieval (small chunks are embedded, their parent section is kept in a local docstore)
+    PARENT_CHUNK_TOKENS: int = 1000  # 0 = flat chunks (CHUNK_TOKENS / CHUNK_OVERLAP_TOKENS)
+    CHILD_CHUNK_TOKENS: int = 120
+    PARENT_STORE_PATH: str = str(BASE_DIR / "data" / "parent_store.sqlite")
+    RAG_CONTEXT_TOKENS: int = 2500  # Retrieved context per answer (models without context_tokens in MODEL_REGISTRY); parents are expanded only within it
+
+    # Background Ingestion Queue (uploads are processed by workers, not in the request)
+    INGEST_WORKERS: int = 2  # Per app process; 0 disables the workers
+    INGEST_POLL_SECONDS: float = 2.0
+    INGEST_STALE_MINUTES: int = 15  # 'processing' jobs without progress for this long are re-queued
+    INGEST_SPOOL_DIR: str = str(BASE_DIR / "data" / "ingest_spool")
+    MAX_UPLOAD_MB: int = 100  # Enforced while the upload streams to the spool (413 beyond)
+
+    # S3 -> Qdrant Sync Pipeline
+    SYNC_CONCURRENCY: int = 8  # Concurrent downloads (extraction uses min(this, CPUs) processes)
 
     # Razorpay Payments
     RAZORPAY_KEY_ID: Optional[str] = None
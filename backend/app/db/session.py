@@ -1,5 +1,7 @@
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.schema import CreateIndex
 from app.core.config import settings
 
 # Create async engine
@@ -22,6 +24,27 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+
+def add_missing_columns(sync_conn):
+    """
+    Lightweight schema upgrade (no Alembic): `create_all` never alters existing tables,
+    so new NULLABLE columns (and their indexes) are added here. Run after create_all.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+            for index in table.indexes:
+                if column in index.columns.values():
+                    sync_conn.execute(CreateIndex(index, if_not_exists=True))
+            print(f"🛠️  Added column {table.name}.{column.name}")
+
 # Dependency
 async def get_db():
     async with AsyncSessionLocal() as session:
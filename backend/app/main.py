@@ -7,11 +7,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
 from app.core.config import settings
-from app.db.session import engine, Base
+from app.db.session import engine, Base, add_missing_columns
 # Import all models to ensure they are registered with Base.metadata
 from app.models.user import User
 from app.models.chat import Conversation, Message
 from app.models.document import Document
+from app.models.sync_manifest import SyncManifestEntry
+from app.services.document_service import document_service
+from app.services.ingest_queue import ingest_queue
+from app.services.storage_service import storage_service
+from app.services.llm_clients import llm_clients
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -19,14 +24,22 @@ async def lifespan(app: FastAPI):
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(add_missing_columns)
             print("✅ Database Tables Verified/Created Successfully")
     except Exception as e:
         print(f"❌ Database Initialization Failed: {e}")
         # We might want to re-raise or handle strictly depending on enterprise needs
+
+    # Startup: Background ingestion workers (uploads are processed off the request path)
+    await ingest_queue.start()
     
     yield
     
     # Shutdown: Clean up resources
+    await ingest_queue.stop()
+    document_service.shutdown()
+    storage_service.shutdown()
+    await llm_clients.aclose()
     await engine.dispose()
     print("🛑 Database Connection Closed")
 
@@ -75,6 +88,14 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/health")
+async def health():
+    """Liveness + shared LLM connection pool load (in-flight / queued requests, saturation counters)."""
+    return {
+        "status": "ok",
+        "llm_pool": llm_clients.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
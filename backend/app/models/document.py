@@ -13,8 +13,12 @@ class Document(Base):
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String, nullable=False)
     text_content = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the file bytes
     doc_metadata = Column(Text, nullable=True)  # JSON string
-    processing_status = Column(String, default="pending")
+    processing_status = Column(String, default="pending")  # pending | processing | completed | failed
+    pages_processed = Column(Integer, nullable=True, default=0)
+    chunks_indexed = Column(Integer, nullable=True, default=0)
+    error_message = Column(Text, nullable=True)
     uploaded_by = Column(String, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger
+from datetime import datetime
+from app.db.session import Base
+
+class SyncManifestEntry(Base):
+    """One row per S3 object that has been ingested into the vector index."""
+    __tablename__ = "sync_manifest"
+
+    s3_key = Column(String, primary_key=True, index=True)
+    etag = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)  # SHA-256 of the object bytes
+    size = Column(BigInteger, nullable=False)
+    chunk_count = Column(Integer, default=0)
+    source = Column(String, nullable=False)  # s3://bucket/key (matches point metadata.source)
+    synced_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
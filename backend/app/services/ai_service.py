@@ -1,10 +1,11 @@
 import json
+import time
+import asyncio
 import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional, AsyncGenerator
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
@@ -12,6 +13,10 @@ from pydantic import BaseModel, Field
 
 from app.core.config import settings
 from app.services.rag_service import rag_service
+from app.services.llm_clients import llm_clients, context_budget, MODEL_REGISTRY  # MODEL_REGISTRY re-exported for scripts
+from app.services.context_packer import context_packer
+from app.services.intent_router import intent_router
+from app.services.translation_cache import translation_cache, AR_TO_EN, EN_TO_AR
 
 # Configure Logging
 logger = logging.getLogger(__name__)
@@ -24,29 +29,12 @@ class LegalAnalysisResult(BaseModel):
     citations: List[str] = Field(description="References to Saudi laws, regulations, or uploaded documents.")
     confidence_score: float = Field(description="Confidence score between 0.0 and 1.0")
 
-# Smart Registry: Defines the "Personality" and "Constraints" of each model.
-MODEL_REGISTRY = {
-    # Primary Reasoning Model (High IQ, Strict Params)
-    "gpt-5.2-chat-latest": {
-        "tiktoken_fallback": "gpt-5",
-        "supports_temperature": False, # Forces default (1)
-        "description": "Optimized for complex reasoning and final outputs."
-    },
-    # Standard Model (Balanced)
-    "gpt-5": {
-        "tiktoken_fallback": "gpt-5",
-        "supports_temperature": True,
-        "default_temp": 0.7,
-        "description": "Balanced baseline performance."
-    },
-    # High-Efficiency Router (Fast, Cost-Effective)
-    "gpt-5-nano": {
-        "tiktoken_fallback": "gpt-5-nano",
-        "supports_temperature": True,
-        "default_temp": 0.0,
-        "description": "Optimized for routing and classification."
-    }
-}
+# Chunks retrieved per answer (before small-to-big context assembly)
+RAG_TOP_K = 10
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
 
 class AIService:
     """
@@ -57,6 +45,7 @@ class AIService:
     def __init__(self):
         # Use Singleton to prevent Qdrant Lock issues
         self.rag_service = rag_service
+        self.intent_router = intent_router
         self.output_parser = JsonOutputParser(pydantic_object=LegalAnalysisResult)
         
         # Check for valid API Key
@@ -80,25 +69,12 @@ class AIService:
                 self.fast_llm = None
                 self.is_simulation = True
 
-    def _create_client(self, model_name: str) -> ChatOpenAI:
+    def _create_client(self, model_name: str):
         """
-        Factory method to create a properly configured OpenAI Client.
-        Reference: MODEL_REGISTRY
+        Properly configured OpenAI client for `model_name` (Reference: MODEL_REGISTRY).
+        Clients are cached per model and share one pooled HTTP/2 connection pool.
         """
-        config = MODEL_REGISTRY.get(model_name, MODEL_REGISTRY["gpt-5"])
-        
-        params = {
-            "model": model_name,
-            "api_key": settings.OPENAI_API_KEY,
-            "streaming": True,
-            "tiktoken_model_name": config["tiktoken_fallback"]
-        }
-        
-        # Only add temperature if the model supports it
-        if config["supports_temperature"]:
-            params["temperature"] = config.get("default_temp", 0.7)
-            
-        return ChatOpenAI(**params)
+        return llm_clients.chat(model_name)
 
     async def _detect_and_translate(self, query: str) -> Dict[str, Any]:
         """
@@ -110,33 +86,28 @@ class AIService:
             # Check if input is Arabic
             is_arabic = any('\u0600' <= char <= '\u06FF' for char in query)
             
-            target_language = "English"
-
-            # Use FAST LLM for translation to avoid latency
-            translator = self.fast_llm or self.llm
-
             if is_arabic:
-                target_language = "Arabic"
                 # Translate to English for English Docs
+                target_language, direction = "Arabic", AR_TO_EN
                 prompt = f"Translate this Arabic query to strictly English. Output ONLY the translation.\nQuery: {query}"
-                response = await translator.ainvoke([HumanMessage(content=prompt)])
-                translated_en = response.content.strip()
-                
-                return {
-                    "language": "Arabic",
-                    "queries": [query, translated_en] # Search Original (Ar) + Translated (En)
-                }
             else:
-                target_language = "English"
                 # Translate to Arabic for Arabic Docs (Optional but "Best of All Time")
+                target_language, direction = "English", EN_TO_AR
                 prompt = f"Translate this English query to strictly Arabic. Output ONLY the translation.\nQuery: {query}"
+
+            # Glossary terms + previously translated queries skip the LLM round-trip
+            translated = await translation_cache.get(query, direction)
+            if translated is None:
+                # Use FAST LLM for translation to avoid latency
+                translator = self.fast_llm or self.llm
                 response = await translator.ainvoke([HumanMessage(content=prompt)])
-                translated_ar = response.content.strip()
-                
-                return {
-                    "language": "English",
-                    "queries": [query, translated_ar] # Search Original (En) + Translated (Ar)
-                }
+                translated = response.content.strip()
+                await translation_cache.set(query, direction, translated)
+
+            return {
+                "language": target_language,
+                "queries": [query, translated] # Search Original + Translated
+            }
             
         except Exception as e:
             logger.error(f"Translation failed: {e}")
@@ -145,26 +116,13 @@ class AIService:
     async def _needs_rag(self, query: str) -> bool:
         """
         Smart Router: Determines if the query actually needs Retrieval vs General Chat.
-        Uses fast_llm (GPT-4o-Mini) for <0.2s decision.
+        Decided locally (intent_router); fast_llm is only asked below the confidence threshold.
         """
         try:
-            # 1. Zero-Latency Path (Greetings & Axioms)
-            q_lower = query.lower().strip()
-            
-            # Greetings map
-            greetings = ["hello", "hi", "salam", "hey", "good morning", "good evening", "marhaba", "welcome"]
-            if q_lower in greetings or len(q_lower) < 4:
-                return False # Instant Chat
-            
-            # Core Axiom Definitions (What is Vision 2030? Who are you?)
-            definitions = ["what is vision 2030", "who are you", "what is this", "tell me about vision 2030"]
-            if any(d in q_lower for d in definitions):
-                return False # Instant Knowledge
-
-            # 2. Strict RAG Heuristic
-            keywords = ["saudi", "vision 2030", "neom", "law", "regulation", "project", "scheme", "housing", "ministry", "royal", "decree", "stats", "number", "percentage", "program", "initiative", "giga"]
-            if any(k in q_lower for k in keywords):
-                return True # Definitely RAG
+            # 1-2. Zero-Latency Path: greetings / axioms / KB keywords + local classifier (microseconds)
+            decision = self.intent_router.route(query)
+            if decision.confident:
+                return decision.needs_rag
 
             # 3. If ambiguous, ask the Brain (Fast Router)
             prompt = f"""Classify if this query requires searching an external Knowledge Base (PDFs about Saudi Vision 2030, Laws, Housing).
@@ -179,6 +137,20 @@ class AIService:
         except:
             return True # Fallback to searching just in case
 
+    @staticmethod
+    async def _timed(awaitable, name: str, timings: Dict[str, float]):
+        """Await a pre-generation stage and record its latency (ms) under `name`."""
+        stage_start = time.perf_counter()
+        result = await awaitable
+        timings[name] = _elapsed_ms(stage_start)
+        return result
+
+    @staticmethod
+    def _cancel(tasks: List[asyncio.Task]):
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
     async def generate_response_stream(
         self, 
         query: str, 
@@ -192,61 +164,88 @@ class AIService:
         Generates a streaming response with RAG augmentation and reasoning.
         Streams structured events (Thinking -> Sourcing -> Generating).
         """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        def status(text: str) -> str:
+            # Stage latencies (ms) ride along on status events; elapsed_ms = time since the request started
+            return json.dumps({"event": "status", "data": text, "timings": {**timings, "elapsed_ms": _elapsed_ms(started)}}) + "\n"
+
+        speculative: List[asyncio.Task] = []
         try:
-            # 0. SMART ROUTING (The "Traffic Controller")
-            yield json.dumps({"event": "status", "data": "🧠 Analyzing User Intent..."}) + "\n"
-            
-            should_search = await self._needs_rag(query)
+            # 0. PRE-GENERATION DAG
+            # Routing, translation and retrieval of the ORIGINAL query start together; translation and
+            # retrieval are speculative and get cancelled if the router decides on plain conversation.
+            yield status("🧠 Analyzing User Intent...")
+
+            route = asyncio.create_task(self._timed(self._needs_rag(query), "route_ms", timings))
+            translation = asyncio.create_task(self._timed(self._detect_and_translate(query), "translate_ms", timings))
+            original_retrieval = asyncio.create_task(self._timed(
+                self.rag_service.retrieve([query], top_k=RAG_TOP_K, user_id=user_id), "retrieve_ms", timings
+            ))
+            speculative = [translation, original_retrieval]
+
+            should_search = await route
             
             # Init basics
             target_language = "English"
             queries_to_search = [query]
             relevant_docs = []
+            context_text = ""
 
             if should_search:
-                # 0.5 SMART TRANSLATION (Only if searching)
-                yield json.dumps({"event": "status", "data": "🌍 Detecting Language Context..."}) + "\n"
+                # 0.5 SMART TRANSLATION (already in flight)
+                yield status("🌍 Detecting Language Context...")
                 
-                lang_data = await self._detect_and_translate(query)
+                lang_data = await translation
                 queries_to_search = lang_data["queries"]
                 target_language = lang_data["language"]
                 
                 # 1. RETRIEVAL (The "Memory") - DUAL PATH
-                yield json.dumps({"event": "status", "data": f"🔍 Scanning Knowledge Base ({len(queries_to_search)} Languages)..."}) + "\n"
+                yield status(f"🔍 Scanning Knowledge Base ({len(queries_to_search)} Languages)...")
                 
                 try:
-                    # Search with ALL query variations (En + Ar)
-                    seen_sources = set()
-                    
-                    for q in queries_to_search:
-                        docs = await self.rag_service.search(q, top_k=5, user_id=user_id)
-                        for d in docs:
-                            # Deduplicate by content or source
-                            src = d.get('source', '')
-                            if src not in seen_sources:
-                                relevant_docs.append(d)
-                                seen_sources.add(src)
+                    # The translated variant is retrieved as soon as it exists, while the original may still be in flight
+                    variants = [q for q in queries_to_search if q != query]
+                    variant_retrieval = asyncio.create_task(self._timed(
+                        self.rag_service.retrieve(variants, top_k=RAG_TOP_K, user_id=user_id), "retrieve_translated_ms", timings
+                    ))
+                    speculative.append(variant_retrieval)
+                    ranked_lists = (await original_retrieval) + (await variant_retrieval)
+
+                    # Fusion + ONE rerank against the original query, then small-to-big context assembly
+                    # and packing into the answering model's token budget (best passages first)
+                    docs = await self.rag_service.rank(query, ranked_lists, top_k=RAG_TOP_K, timings=timings)
+                    budget = context_budget(model)
+                    passages = await self._timed(self.rag_service.expand_context(docs, max_tokens=budget), "context_ms", timings)
+                    packed = context_packer.pack(passages, budget, retrieved=len(docs))
+                    relevant_docs, context_text = packed.docs, packed.text
                     
                     # Yield Sources to Client
                     if relevant_docs:
-                        sources = [doc.get("source", "Unknown") for doc in relevant_docs if isinstance(doc, dict)]
+                        # Deduplicated chunks carry every file they appear in
+                        sources = [
+                            src for doc in relevant_docs if isinstance(doc, dict)
+                            for src in (doc.get("sources") or [doc.get("source", "Unknown")])
+                        ]
                         unique_sources = list(set(sources))
                         
-                        yield json.dumps({"event": "status", "data": f"📑 Analyzing {len(unique_sources)} Official Documents..."}) + "\n"
-                        yield json.dumps({"event": "sources", "data": unique_sources}) + "\n"
+                        yield status(f"📑 Analyzing {len(unique_sources)} Official Documents...")
+                        yield json.dumps({"event": "sources", "data": unique_sources, **packed.stats()}) + "\n"
 
                 except Exception as e:
                     logger.error(f"RAG Search failed: {e}")
                     pass
             else:
-                 yield json.dumps({"event": "status", "data": "💬 Engaging General Conversation..."}) + "\n"
+                 self._cancel(speculative)
+                 yield status("💬 Engaging General Conversation...")
 
             # 2. REASONING (The "Brain")
-            yield json.dumps({"event": "status", "data": "🤔 Synthesizing Strategic Insights..."}) + "\n"
+            yield status("🤔 Synthesizing Strategic Insights...")
             
             # SIMULATION / FALLBACK CHECK
             if self.is_simulation or not self.llm:
-                yield json.dumps({"event": "status", "data": "✨ Simulation Mode Active..."}) + "\n"
+                yield status("✨ Simulation Mode Active...")
                 
                 # Canned "Intelligent" Responses based on keywords
                 simulated_response = "As the Vision 2030 AI Assistant, I can confirm that "
@@ -259,7 +258,6 @@ class AIService:
                     simulated_response += "Saudi Vision 2030 is built on three pillars..."
 
                 # Stream the simulated text character by character to mimic AI
-                import asyncio
                 words = simulated_response.split(" ")
                 for word in words:
                     yield json.dumps({"event": "token", "data": word + " "}) + "\n"
@@ -270,13 +268,6 @@ class AIService:
             # REAL AI GENERATION
             current_time = datetime.now().strftime("%A, %B %d, %Y")
             
-            context_text = ""
-            for doc in relevant_docs:
-                if isinstance(doc, dict):
-                    context_text += f"Source: {doc.get('source', 'Unknown')}\nContent: {doc.get('content', '')}\n\n"
-                else:
-                    context_text += f"Content: {doc.page_content}\n\n"
-
             system_prompt = f"""You are the Official Strategic AI Consultant for Saudi Vision 2030.
             Your role is to provide executive-level, document-based insights.
 
@@ -344,23 +335,30 @@ class AIService:
             messages.append(HumanMessage(content=query))
 
             # 3. GENERATION
-            yield json.dumps({"event": "status", "data": "✨ Generating Strategic Output..."}) + "\n"
+            yield status("✨ Generating Strategic Output...")
             
             # Dynamic Model Switching (e.g. for high-tier users or fallbacks)
             client = self.llm
             if model != self.llm.model_name:
-                 # Create temp client using strict factory logic
+                 # Shared per-model client (no new HTTP client per request)
                  client = self._create_client(model)
 
             async for chunk in client.astream(messages):
                 if chunk.content:
+                    if "ttft_ms" not in timings:
+                        timings["ttft_ms"] = _elapsed_ms(started)  # Target metric: time to first token
                     yield json.dumps({"event": "token", "data": chunk.content}) + "\n"
 
+            logger.info(f"⏱️ TTFT {timings.get('ttft_ms')} ms | total {_elapsed_ms(started)} ms | {timings}")
+
         except Exception as e:
             logger.error(f"AI Generation Error: {e}")
             # FALLBACK IN CASE OF CRASH
             error_msg = f"I apologize, but I am currently updating my strategic database. (Error: {str(e)})"
             yield json.dumps({"event": "token", "data": error_msg}) + "\n"
+        finally:
+            # Client disconnects / errors must not leave speculative work running
+            self._cancel(speculative)
 
     async def get_chat_completion(self, messages: List[Dict[str, str]]) -> str:
         """
@@ -0,0 +1,243 @@
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger("cache")
+
+
+class _RedisBackend:
+    """
+    Shared tier backed by Redis (see docker-compose).
+    With `max_entries`, the namespace is bounded on its own (the server's
+    `maxmemory-policy allkeys-lru` only caps the whole instance): a sorted set
+    "<namespace>:__lru__" scores each key by last access, and keys beyond
+    `max_entries` (or idle longer than the TTL) are pruned every 100 writes.
+    The TTL slides: a hit refreshes the key's expiry along with its LRU score, and a miss
+    drops the index entry of a key that expired (or was evicted by the server).
+    """
+
+    def __init__(self, url: str, ttl_seconds: int, namespace: str = "", max_entries: Optional[int] = None):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.index = f"{namespace}:__lru__"
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.max_entries:
+            return self.client.get(key)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.expire(key, self.ttl_seconds)  # Sliding TTL (no-op on a miss)
+        pipe.zadd(self.index, {key: time.time()}, xx=True)  # Touch (only keys still indexed)
+        value = pipe.execute()[0]
+        if value is None:
+            self.client.zrem(self.index, key)
+        return value
+
+    def set(self, key: str, value: bytes):
+        if not self.max_entries:
+            self.client.set(key, value, ex=self.ttl_seconds)
+            return
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, value, ex=self.ttl_seconds)
+        pipe.zadd(self.index, {key: now})
+        pipe.execute()
+        self._writes += 1
+        # Amortize eviction: only prune every 100 writes (per process)
+        if self._writes % 100 == 0:
+            self._prune(now)
+
+    def _prune(self, now: float):
+        # Idle longer than the TTL: the key has already expired, only the index entry is left
+        self.client.zremrangebyscore(self.index, "-inf", now - self.ttl_seconds)
+        stale = self.client.zrange(self.index, 0, -(self.max_entries + 1))
+        if stale:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*stale)
+            pipe.zrem(self.index, *stale)
+            pipe.execute()
+
+
+class _DiskBackend:
+    """
+    Shared tier backed by a local SQLite file.
+    Survives restarts; evicts least-recently-used rows beyond `max_entries`.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            if row[1] < now:
+                self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now)
+            )
+            self._writes += 1
+            # Amortize eviction: only prune every 100 writes
+            if self._writes % 100 == 0:
+                self.conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+                self.conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self.conn.commit()
+
+
+class TieredCache:
+    """
+    Two-Tier Cache:
+    1. In-process LRU (hot, per worker) with TTL and max entry count.
+    2. Optional shared tier ('redis' or 'disk') so entries survive restarts
+       and are shared across gunicorn workers.
+    Values are raw bytes; callers own serialization.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 1000,
+        ttl_seconds: int = 3600,
+        backend: str = "memory",
+        redis_url: Optional[str] = None,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 50000,
+        redis_max_entries: Optional[int] = None,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"memory_hits": 0, "backend_hits": 0, "misses": 0, "backend_errors": 0}
+
+        self.backend = None
+        try:
+            if backend == "redis" and redis_url:
+                self.backend = _RedisBackend(redis_url, ttl_seconds, namespace, redis_max_entries)
+            elif backend == "disk" and disk_path:
+                self.backend = _DiskBackend(disk_path, ttl_seconds, disk_max_entries)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache backend '{backend}' unavailable for {namespace}, using memory only: {e}")
+            self.backend = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: bytes):
+        with self._lock:
+            self._memory[key] = (time.time() + self.ttl_seconds, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _backend_get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.backend.get(self._key(key))
+        except Exception as e:
+            self.counters["backend_errors"] += 1
+            logger.debug(f"Cache backend read failed: {e}")
+            return None
+
+    def _backend_set(self, key: str, value: bytes):
+        try:
+            self.backend.set(self._key(key), value)
+        except Exception as e:
+            self.counters["backend_errors"] += 1
+            logger.debug(f"Cache backend write failed: {e}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._memory_get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+
+        if self.backend:
+            value = self._backend_get(key)
+            if value is not None:
+                self.counters["backend_hits"] += 1
+                self._memory_set(key, value)  # Promote to hot tier
+                return value
+
+        self.counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value: bytes):
+        self._memory_set(key, value)
+        if self.backend:
+            self._backend_set(key, value)
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        """Async variant: the hot tier is checked inline, the shared tier off the event loop."""
+        value = self._memory_get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+        if not self.backend:
+            self.counters["misses"] += 1
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes):
+        self._memory_set(key, value)
+        if self.backend:
+            await asyncio.to_thread(self._backend_set, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["memory_hits"] + self.counters["backend_hits"]
+        total = hits + self.counters["misses"]
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__ if self.backend else "memory",
+            "entries": len(self._memory),
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            **self.counters,
+        }
@@ -5,9 +5,11 @@ from uuid import UUID
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, update
-from openai import AsyncOpenAI
 from app.core.config import settings
 from app.services.rag_service import rag_service
+from app.services.llm_clients import llm_clients, context_budget
+from app.services.context_packer import context_packer
+from app.services.intent_router import intent_router
 from app.core.security import redact_pii
 from app.models.chat import Conversation, Message
 
@@ -22,7 +24,7 @@ class ChatService:
     
     def __init__(self):
         try:
-            self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            self.client = llm_clients.openai  # Shared, pooled HTTP/2 client
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI Client: {e}")
             self.client = None
@@ -74,6 +76,11 @@ class ChatService:
 
     async def _should_use_rag(self, message: str) -> bool:
         """Determines if the query requires document context (RAG)."""
+        # Local router first; the LLM is only asked below the confidence threshold
+        decision = intent_router.route(message)
+        if decision.confident:
+            return decision.needs_rag
+
         if not self.client:
             return False
             
@@ -125,14 +132,11 @@ class ChatService:
         if final_use_rag:
             # COST OPTIMIZATION: Broad Search (50) -> Rerank -> Top 15 (High Precision)
             # This balances "Full Context" recall with "Low Billing" input tokens.
-            results = await rag_service.search(safe_message, top_k=15)
+            hits = await rag_service.search(safe_message, top_k=15)
+            budget = context_budget(model)
+            results = await rag_service.expand_context(hits, max_tokens=budget)
             if results:
-                
-                context_blocks = [
-                    f"source: {res['source']}\ncontent: {res['content']}" 
-                    for res in results
-                ]
-                context_text = "\n\n".join(context_blocks)
+                context_text = context_packer.pack(results, budget, retrieved=len(hits)).text
 
         # 3. Prompt Engineering
         system_prompt = f"""You are SaudiAI, a state-of-the-art enterprise assistant for Saudi Arabia (Powered by GPT-5.2).
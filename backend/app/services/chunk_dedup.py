@@ -0,0 +1,73 @@
+import re
+import uuid
+import hashlib
+from typing import List, Dict, Any
+
+from app.services.sparse_encoder import normalize_arabic, tokenize
+
+# Fixed namespace: the same chunk text always maps to the same point ID
+CHUNK_ID_NAMESPACE = uuid.UUID("3f0cb4d3-0e2c-41bf-b555-e048ce5bf119")
+
+# SimHash: 64-bit fingerprint split into 4 x 16-bit bands.
+# Two chunks within 3 differing bits always share at least one band (pigeonhole),
+# so band equality is an exact candidate filter for the near-duplicate check.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+NEAR_DUPLICATE_DISTANCE = 3
+_SHINGLE_SIZE = 3
+
+
+def normalize_chunk(text: str) -> str:
+    """Canonical form for exact matching (Arabic folding, whitespace collapsed)."""
+    return re.sub(r"\s+", " ", normalize_arabic(text)).strip()
+
+
+def chunk_content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_chunk(text).encode("utf-8")).hexdigest()
+
+
+def dedup_namespace(metadata: Dict[str, Any]) -> str:
+    """
+    Chunks are only merged within the same visibility: public/system content is shared,
+    private content only ever merges with the same user's documents.
+    """
+    if metadata.get("scope") == "private":
+        return f"private:{metadata.get('user_id')}"
+    return "shared"
+
+
+def chunk_point_id(namespace: str, content_hash: str) -> str:
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{namespace}:{content_hash}"))
+
+
+def source_document_id(source: str) -> str:
+    """Stable document ID for sources without a `documents` row (e.g. S3 sync)."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"source:{source}"))
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over token 3-shingles (same tokenizer as the sparse index)."""
+    tokens = tokenize(text)
+    if len(tokens) < _SHINGLE_SIZE:
+        shingles = tokens
+    else:
+        shingles = [" ".join(tokens[i:i + _SHINGLE_SIZE]) for i in range(len(tokens) - _SHINGLE_SIZE + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def simhash_bands(fingerprint: int) -> List[str]:
+    """Band keys stored in a keyword payload index ('<band>:<hex>')."""
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [f"{band}:{(fingerprint >> (band * width)) & mask:04x}" for band in range(SIMHASH_BANDS)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
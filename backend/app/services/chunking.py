@@ -0,0 +1,378 @@
+import re
+import math
+import hashlib
+import logging
+from functools import lru_cache
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Dict, Any, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("chunking")
+
+# Bump when chunk boundaries change for the same settings (invalidates cached chunks)
+CHUNKER_VERSION = 2
+
+# Page markers emitted by document_service.extract_pdf_pages
+PAGE_MARKER = re.compile(r"^--- Page (\d+) ---$")
+
+# Structural headings -> nesting level (0 = chapter/part, 1 = section, 2 = article).
+# The keyword must be followed by a numeral or ordinal ("Part II", "Article 14", "الفصل الثاني"),
+# so body lines such as "Part of the budget is ..." or "Section 3 of the regulation applies." are
+# not headings: only short lines count, and what follows the numeral must read like a title.
+_NUMERAL = (
+    r"\(?(?:\d+(?:\.\d+)*|[٠-٩]+"
+    r"|(?=[ivxl])l?x{0,3}(?:ix|iv|v?i{0,3})"
+    r"|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve"
+    r"|first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth"
+    r"|ال[أا]ول[ىي]?|(?:الثاني|الثالث|الرابع|الخامس|السادس|السابع|الثامن|التاسع|العاشر|الحادي)[ةه]?)"
+    r"(?=$|[\s:.\-–—)،])"
+)
+HEADING_PATTERNS = [
+    (0, re.compile(rf"^(?:chapter|part)\s+{_NUMERAL}", re.IGNORECASE)),
+    (0, re.compile(rf"^(?:الباب|الفصل)\s+{_NUMERAL}")),
+    (1, re.compile(rf"^section\s+{_NUMERAL}", re.IGNORECASE)),
+    (1, re.compile(rf"^(?:القسم|الفرع)\s+{_NUMERAL}")),
+    (2, re.compile(rf"^article\s+{_NUMERAL}", re.IGNORECASE)),
+    (2, re.compile(rf"^المادة\s+{_NUMERAL}")),
+]
+MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+\S")
+MAX_HEADING_CHARS = 60
+# A title after the numeral does not end like a sentence, nor continue one in lower case
+SENTENCE_FINAL = re.compile(r"[.!?؟;؛,،]$")
+CONTINUATION = re.compile(r"^[a-z]")
+
+# Sentence ends (Latin + Arabic question mark / semicolon)
+SENTENCE_END = re.compile(r"(?<=[.!?؟;؛])\s+")
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str):
+    """tiktoken encoder, loaded once per process (None if unavailable, e.g. offline without a cached BPE file)."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"⚠️ tiktoken encoding '{name}' unavailable ({e}); using approximate token counts")
+        return None
+
+
+def approximate_tokens(text: str) -> int:
+    """Fallback estimate: ~4 chars per token for ASCII words, ~3 for Arabic and other scripts."""
+    return sum(
+        math.ceil(len(word) / (4 if word.isascii() else 3))
+        for word in _WORDS.findall(text)
+    )
+
+
+def heading_level(line: str) -> Optional[int]:
+    markdown = MARKDOWN_HEADING.match(line)
+    if markdown:
+        return min(len(markdown.group(1)) - 1, 2)
+    if len(line) > MAX_HEADING_CHARS:
+        return None
+    for level, pattern in HEADING_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            title = line[match.end():].lstrip(" :.-–—)،").strip()
+            if title and (SENTENCE_FINAL.search(title) or CONTINUATION.match(title)):
+                return None
+            return level
+    return None
+
+
+@dataclass
+class Chunk:
+    text: str
+    page: Optional[int] = None  # First page the chunk's text comes from (PDFs)
+    page_end: Optional[int] = None
+    section: str = ""  # Heading path, e.g. "Chapter 2 > Article 14"
+    parent_id: Optional[str] = None  # Parent/child mode: the section this chunk was cut from
+    position: int = 0  # Index of the chunk within its parent (adjacent hits are merged)
+
+    def metadata(self) -> Dict[str, Any]:
+        meta: Dict[str, Any] = {}
+        if self.page is not None:
+            meta["page"] = self.page
+            meta["page_end"] = self.page_end
+        if self.section:
+            meta["section"] = self.section
+        if self.parent_id:
+            meta["parent_id"] = self.parent_id
+            meta["position"] = self.position
+        return meta
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class Parent:
+    """A parent section (parent/child mode): stored in the parent store, never embedded."""
+    id: str
+    text: str
+    tokens: int
+    page: Optional[int] = None
+    page_end: Optional[int] = None
+    section: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def parent_id(text: str) -> str:
+    """Content-addressed: the same section text always maps to the same parent."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class _Unit:
+    text: str
+    tokens: int
+    page: Optional[int]
+    new_paragraph: bool
+    overlap: bool = False  # Carried over from the previous chunk
+    heading: bool = False
+
+
+class TokenChunker:
+    """
+    Token-aware, structure-aware splitter (legal documents).
+    Sizes are measured in model tokens, so Arabic and English chunks cost the same in the
+    prompt. Article / section headings always start a new chunk (a chunk never spans two
+    articles) and `--- Page N ---` markers become page metadata instead of chunk text.
+    Overlap is whole sentences from the end of the previous chunk of the same section.
+    """
+
+    def __init__(self, chunk_tokens: int, overlap_tokens: int, encoding_name: str):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding_name = encoding_name
+
+    @property
+    def tokenizer(self) -> str:
+        return self.encoding_name if get_encoding(self.encoding_name) is not None else "approx"
+
+    @property
+    def cache_kind(self) -> str:
+        """Extraction-cache kind of the chunk boundaries produced with these settings."""
+        return f"chunks-tok{self.chunk_tokens}-{self.overlap_tokens}-{self.tokenizer}-v{CHUNKER_VERSION}"
+
+    def count(self, text: str) -> int:
+        encoding = get_encoding(self.encoding_name)
+        if encoding is None:
+            return approximate_tokens(text)
+        return len(encoding.encode_ordinary(text))
+
+    def stream(self) -> "ChunkStream":
+        return ChunkStream(self)
+
+    def split_text(self, text: str) -> List[Chunk]:
+        stream = self.stream()
+        return stream.feed(text) + stream.flush()
+
+
+class ChunkStream:
+    """
+    Incremental state of one document: feed() pages as they are extracted, flush() at the end.
+    Only the chunk being built is held in memory.
+    """
+
+    def __init__(self, chunker: TokenChunker):
+        self.chunker = chunker
+        self.page: Optional[int] = None
+        self.headings: List[Tuple[int, str]] = []
+        self.units: List[_Unit] = []
+        self.tokens = 0
+        self.ready: List[Chunk] = []
+
+    @property
+    def section(self) -> str:
+        return " > ".join(text for _, text in self.headings)
+
+    def feed(self, text: str) -> List[Chunk]:
+        for raw_line in text.split("\n"):
+            line = raw_line.strip()
+            if not line:
+                continue
+            marker = PAGE_MARKER.match(line)
+            if marker:
+                self.page = int(marker.group(1))
+                continue
+            level = heading_level(line)
+            if level is None:
+                self._add_paragraph(line)
+                continue
+            # A heading closes the previous section; consecutive headings stay together
+            if any(not u.overlap and not u.heading for u in self.units):
+                self._emit(carry_overlap=False)
+            else:
+                self._drop_overlap()
+            self.headings = [h for h in self.headings if h[0] < level] + [(level, line)]
+            self._add_unit(_Unit(line, self.chunker.count(line), self.page, new_paragraph=True, heading=True))
+        ready, self.ready = self.ready, []
+        return ready
+
+    def flush(self) -> List[Chunk]:
+        self._emit(carry_overlap=False)
+        ready, self.ready = self.ready, []
+        return ready
+
+    def pop_parents(self) -> List[Parent]:
+        return []  # Flat chunks have no parents
+
+    def _add_paragraph(self, paragraph: str):
+        new_paragraph = True
+        for sentence in SENTENCE_END.split(paragraph):
+            tokens = self.chunker.count(sentence)
+            pieces = [(sentence, tokens)] if tokens <= self.chunker.chunk_tokens else self._split_long(sentence)
+            for piece, piece_tokens in pieces:
+                self._add_unit(_Unit(piece, piece_tokens, self.page, new_paragraph))
+                new_paragraph = False
+
+    def _split_long(self, sentence: str) -> List[Tuple[str, int]]:
+        """A sentence longer than a chunk (tables, run-on lists): pack whole words."""
+        pieces: List[Tuple[str, int]] = []
+        words: List[str] = []
+        tokens = 0
+        for word in sentence.split():
+            word_tokens = self.chunker.count(" " + word)
+            if words and tokens + word_tokens > self.chunker.chunk_tokens:
+                pieces.append((" ".join(words), tokens))
+                words, tokens = [], 0
+            words.append(word)
+            tokens += word_tokens
+        if words:
+            pieces.append((" ".join(words), tokens))
+        return pieces
+
+    def _add_unit(self, unit: _Unit):
+        if self.units and self.tokens + unit.tokens > self.chunker.chunk_tokens:
+            if any(not u.overlap for u in self.units):
+                self._emit(carry_overlap=True)
+            if self.units and self.tokens + unit.tokens > self.chunker.chunk_tokens:
+                # Overlap alone would overflow the budget: drop it
+                self.units, self.tokens = [], 0
+        self.units.append(unit)
+        self.tokens += unit.tokens
+
+    def _drop_overlap(self):
+        self.units = [u for u in self.units if not u.overlap]
+        self.tokens = sum(u.tokens for u in self.units)
+
+    def _emit(self, carry_overlap: bool):
+        if not any(not u.overlap for u in self.units):
+            self.units, self.tokens = [], 0
+            return
+        parts: List[str] = []
+        for i, unit in enumerate(self.units):
+            if i:
+                parts.append("\n" if unit.new_paragraph else " ")
+            parts.append(unit.text)
+        self.ready.append(Chunk(
+            text="".join(parts),
+            page=self.units[0].page,
+            page_end=self.units[-1].page,
+            section=self.section,
+        ))
+
+        carried: List[_Unit] = []
+        if carry_overlap:
+            budget = self.chunker.overlap_tokens
+            for unit in reversed(self.units):
+                if unit.tokens > budget:
+                    break
+                budget -= unit.tokens
+                carried.insert(0, _Unit(unit.text, unit.tokens, unit.page, unit.new_paragraph, overlap=True))
+        self.units = carried
+        self.tokens = sum(u.tokens for u in carried)
+
+
+class ParentChildChunker:
+    """
+    Small-to-big splitter: the document is cut into parent sections (structure-aware, as above),
+    and each parent is re-split into small children without overlap. Only children are embedded,
+    so matching is precise; the parent text lives in the parent store and is put into the prompt
+    only when the context budget allows (RAGService.expand_context).
+    Same interface as TokenChunker; streams additionally hand out their parents (pop_parents).
+    """
+
+    def __init__(self, parent: TokenChunker, child: TokenChunker):
+        self.parent = parent
+        self.child = child
+        self.encoding_name = parent.encoding_name
+
+    @property
+    def tokenizer(self) -> str:
+        return self.parent.tokenizer
+
+    @property
+    def cache_kind(self) -> str:
+        return (f"chunks-pc{self.parent.chunk_tokens}-{self.child.chunk_tokens}"
+                f"-{self.tokenizer}-v{CHUNKER_VERSION}")
+
+    def count(self, text: str) -> int:
+        return self.parent.count(text)
+
+    def stream(self) -> "ParentChildStream":
+        return ParentChildStream(self)
+
+    def split_text(self, text: str) -> List[Chunk]:
+        stream = self.stream()
+        return stream.feed(text) + stream.flush()
+
+
+class ParentChildStream:
+    """Incremental parent/child split: feed()/flush() return children, pop_parents() their parents."""
+
+    def __init__(self, chunker: ParentChildChunker):
+        self.chunker = chunker
+        self.parents = chunker.parent.stream()
+        self.ready_parents: List[Parent] = []
+
+    def feed(self, text: str) -> List[Chunk]:
+        return self._children(self.parents.feed(text))
+
+    def flush(self) -> List[Chunk]:
+        return self._children(self.parents.flush())
+
+    def pop_parents(self) -> List[Parent]:
+        ready, self.ready_parents = self.ready_parents, []
+        return ready
+
+    def _children(self, sections: List[Chunk]) -> List[Chunk]:
+        children: List[Chunk] = []
+        for section in sections:
+            parent = Parent(
+                id=parent_id(section.text),
+                text=section.text,
+                tokens=self.chunker.count(section.text),
+                page=section.page,
+                page_end=section.page_end,
+                section=section.section,
+            )
+            self.ready_parents.append(parent)
+            for position, child in enumerate(self.chunker.child.split_text(section.text)):
+                children.append(Chunk(
+                    text=child.text,
+                    page=section.page,
+                    page_end=section.page_end,
+                    section=section.section,
+                    parent_id=parent.id,
+                    position=position,
+                ))
+        return children
+
+
+chunker = TokenChunker(
+    chunk_tokens=settings.CHUNK_TOKENS,
+    overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+    encoding_name=settings.CHUNK_TOKENIZER,
+)
+
+# Splitter used for indexing: parent/child when PARENT_CHUNK_TOKENS is set, flat chunks otherwise
+splitter = ParentChildChunker(
+    parent=TokenChunker(settings.PARENT_CHUNK_TOKENS, 0, settings.CHUNK_TOKENIZER),
+    child=TokenChunker(settings.CHILD_CHUNK_TOKENS, 0, settings.CHUNK_TOKENIZER),
+) if settings.PARENT_CHUNK_TOKENS else chunker
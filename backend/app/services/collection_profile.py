@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from qdrant_client.http import models
+
+from app.core.config import settings
+
+
+@dataclass
+class CollectionProfile:
+    """
+    Storage/Index Profile for a Qdrant collection.
+    - quantization: 'none' (float32), 'scalar' (int8, ~4x smaller) or 'binary' (~32x smaller)
+    - on_disk: keep original float vectors on disk (mmap); quantized copies stay in RAM
+    - rescore/oversampling: re-rank quantized candidates with the original vectors
+    """
+    quantization: str = "none"
+    on_disk: bool = False
+    always_ram: bool = True
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_ef: Optional[int] = None
+    rescore: bool = True
+    oversampling: float = 2.0
+
+    @classmethod
+    def from_settings(cls) -> "CollectionProfile":
+        return cls(
+            quantization=settings.QDRANT_QUANTIZATION,
+            on_disk=settings.QDRANT_ON_DISK_VECTORS,
+            always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+            hnsw_m=settings.QDRANT_HNSW_M,
+            hnsw_ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+            hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF,
+            rescore=settings.QDRANT_RESCORE,
+            oversampling=settings.QDRANT_OVERSAMPLING,
+        )
+
+    def vector_params(self, size: int) -> models.VectorParams:
+        return models.VectorParams(
+            size=size,
+            distance=models.Distance.COSINE,
+            on_disk=self.on_disk,
+        )
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.always_ram)
+            )
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        quantization = None
+        if self.quantization in ("scalar", "binary"):
+            quantization = models.QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling,
+            )
+        if quantization is None and self.hnsw_ef is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+    def estimated_ram_bytes(self, num_vectors: int, dim: int) -> int:
+        """Rough RAM estimate: resident vectors + quantized copies + HNSW links."""
+        total = 0 if self.on_disk else num_vectors * dim * 4
+        if self.always_ram:
+            if self.quantization == "scalar":
+                total += num_vectors * dim
+            elif self.quantization == "binary":
+                total += num_vectors * dim // 8
+        total += num_vectors * self.hnsw_m * 2 * 4
+        return total
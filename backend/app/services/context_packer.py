@@ -0,0 +1,131 @@
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Optional
+
+from app.services.chunking import splitter
+
+logger = logging.getLogger("context_packer")
+
+# Sentence / line boundaries (Latin + Arabic), captured so the original separators are kept
+_BOUNDARY = re.compile(r"((?<=[.!?؟;؛])\s+|\n+)")
+_SPACES = re.compile(r"\s+")
+
+# Shorter sentences (headings, "[...]" markers, list labels) are never treated as duplicates
+MIN_DEDUP_CHARS = 30
+# A passage is only truncated if at least this much budget is left for it
+MIN_TRUNCATE_TOKENS = 48
+
+
+@dataclass
+class PackedContext:
+    text: str = ""
+    docs: List[Dict[str, Any]] = field(default_factory=list)  # Packed passages, best first
+    tokens_used: int = 0
+    budget: int = 0
+    chunks_used: int = 0
+    chunks_dropped: int = 0  # Retrieved chunks not in the prompt (over budget or duplicates)
+    truncated: int = 0  # Passages cut at a sentence boundary to fit
+
+    def stats(self) -> Dict[str, int]:
+        return {"tokens_used": self.tokens_used, "token_budget": self.budget, "chunks_dropped": self.chunks_dropped}
+
+
+class ContextPacker:
+    """
+    Token-Budgeted Context Packing (STRATEGIC BRIEFING).
+    Fills a fixed token budget with the best passages first, so prompt size (and latency / cost)
+    no longer depends on how much was retrieved:
+    1. Passages are taken in score order; sentences already packed from an overlapping chunk are removed.
+    2. A passage that does not fit is cut at the last sentence boundary that does (or dropped).
+    Tokens are counted with the indexing tokenizer (cached tiktoken encoder), headers included.
+    """
+
+    def __init__(self, count: Callable[[str], int]):
+        self.count = count
+
+    @staticmethod
+    def _block(doc: Dict[str, Any], content: str) -> str:
+        return f"Source: {doc.get('source', 'Unknown')}\nContent: {content}\n\n"
+
+    @staticmethod
+    def _key(sentence: str) -> Optional[str]:
+        key = _SPACES.sub(" ", sentence).strip().lower()
+        return key if len(key) >= MIN_DEDUP_CHARS else None
+
+    def _truncate(self, doc: Dict[str, Any], pieces: List[str], budget: int) -> Optional[str]:
+        """Longest prefix of whole sentences whose block fits `budget` (None if not even one sentence)."""
+        header = self.count(self._block(doc, ""))
+        kept: List[str] = []
+        used = header
+        for i in range(0, len(pieces), 2):
+            sentence = pieces[i]
+            cost = self.count(sentence + (pieces[i + 1] if i + 1 < len(pieces) else ""))
+            if used + cost > budget:
+                break
+            kept.extend(pieces[i:i + 2])
+            used += cost
+        content = "".join(kept).strip()
+        # Re-check the exact count (token counts are not strictly additive across pieces)
+        while content and self.count(self._block(doc, content)) > budget:
+            kept = kept[:-2]
+            content = "".join(kept).strip()
+        return content or None
+
+    def pack(self, docs: List[Dict[str, Any]], budget: int, retrieved: Optional[int] = None) -> PackedContext:
+        """
+        `docs`: search-style dicts (content / source / score), e.g. from RAGService.expand_context;
+        passages merged from several chunks carry `chunks`. `retrieved`: chunks retrieved in total
+        (defaults to the chunks in `docs`), used for the dropped-chunk count.
+        """
+        packed = PackedContext(budget=budget)
+        seen = set()
+        remaining = budget
+        blocks: List[str] = []
+        ranked = sorted(docs, key=lambda d: d.get("score") if d.get("score") is not None else float("-inf"), reverse=True)
+
+        for doc in ranked:
+            pieces = _BOUNDARY.split(doc.get("content", "") or "")
+            # Drop sentences an earlier (better) passage already contributed (overlapping chunks)
+            kept: List[str] = []
+            overlapped = False
+            for i in range(0, len(pieces), 2):
+                key = self._key(pieces[i])
+                if key is not None and key in seen:
+                    overlapped = True
+                    continue
+                kept.extend(pieces[i:i + 2])
+            content = "".join(kept).strip()
+            if not content or (overlapped and not any(self._key(p) for p in kept[::2])):
+                continue  # Fully covered by passages already packed
+
+            block = self._block(doc, content)
+            tokens = self.count(block)
+            if tokens > remaining:
+                if remaining < MIN_TRUNCATE_TOKENS:
+                    continue
+                content = self._truncate(doc, _BOUNDARY.split(content), remaining)
+                if content is None:
+                    continue
+                block = self._block(doc, content)
+                tokens = self.count(block)
+                packed.truncated += 1
+
+            seen.update(k for k in (self._key(p) for p in _BOUNDARY.split(content)[::2]) if k)
+            blocks.append(block)
+            packed.docs.append({**doc, "content": content, "tokens": tokens})
+            packed.chunks_used += doc.get("chunks", 1)
+            remaining -= tokens
+
+        packed.text = "".join(blocks)
+        packed.tokens_used = budget - remaining
+        total = retrieved if retrieved is not None else sum(d.get("chunks", 1) for d in docs)
+        packed.chunks_dropped = max(total - packed.chunks_used, 0)
+        logger.info(
+            f"📦 Context packed: {packed.tokens_used}/{budget} tokens, {len(packed.docs)} passages "
+            f"({packed.truncated} truncated), {packed.chunks_dropped} chunks dropped"
+        )
+        return packed
+
+
+context_packer = ContextPacker(count=splitter.count)
@@ -1,13 +1,39 @@
 import os
 import io
+import mmap
 import re
+import time
+import asyncio
+import signal
+import hashlib
+import inspect
 import logging
 import PyPDF2
-from typing import Optional
+from collections import deque
+from typing import Optional, List, Iterator, AsyncIterator, Tuple, Union, Any
+from pathlib import Path
+from contextlib import contextmanager
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+from app.services.extraction_cache import extraction_cache
 
 logger = logging.getLogger("document_service")
 
+# Extra time a worker gets past its cooperative deadline before it is killed
+HARD_TIMEOUT_GRACE_SECONDS = 10
+
+SUPPORTED_EXTENSIONS = ('pdf', 'docx', 'txt', 'md')
+
+# Bump when extraction/cleaning output changes (invalidates cached pages)
+EXTRACTOR_VERSION = 1
+PAGES_CACHE_KIND = f"pages-v{EXTRACTOR_VERSION}"
+
+# Read/hash/write granularity when spooling streams to disk
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
 @dataclass
 class ProcessedDocument:
     content: str
@@ -15,13 +41,306 @@ class ProcessedDocument:
     doc_type: str
     word_count: int
     metadata: dict
+    content_hash: str = ""  # SHA-256 of the original file bytes
+
+
+@dataclass
+class SpooledFile:
+    path: Path
+    size: int
+    content_hash: str  # SHA-256, computed while spooling
+
+
+class FileTooLargeError(ValueError):
+    """The stream exceeded the size limit (raised mid-stream; the partial file is removed)."""
+
+
+# --- Extraction (module-level so it can run in a ProcessPoolExecutor) ---
+# A source is the file content, or the path of a spooled file. Workers get the path and
+# memory-map it, so large files are neither copied into every task nor held in RAM.
+FileSource = Union[bytes, str, os.PathLike]
+
+
+@contextmanager
+def open_source(source: FileSource):
+    """Seekable binary stream over a source (a read-only memory map for files)."""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield io.BytesIO(b"")  # Empty files cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def file_sha256(path: FileSource) -> str:
+    """SHA-256 of a file, read in chunks."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(SPOOL_CHUNK_BYTES):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def pdf_page_count(source: FileSource) -> int:
+    with open_source(source) as stream:
+        return len(PyPDF2.PdfReader(stream).pages)
+
+
+def iter_pdf_pages(source: FileSource, start: int = 0, end: Optional[int] = None,
+                   deadline: Optional[float] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, raw_text) for pages [start, end), one page at a time.
+    Stops early (at a page boundary) once the wall-clock deadline has passed.
+    """
+    with open_source(source) as stream:
+        pdf_reader = PyPDF2.PdfReader(stream)
+        end = len(pdf_reader.pages) if end is None else min(end, len(pdf_reader.pages))
+        for i in range(start, end):
+            if deadline and time.time() > deadline:
+                logger.warning(f"PDF extraction deadline reached at page {i+1}; remaining pages skipped")
+                return
+            page_text = pdf_reader.pages[i].extract_text()
+            if page_text:
+                yield i + 1, page_text
+
+
+def extract_pdf_pages(source: FileSource, start: int, end: int, deadline: Optional[float] = None) -> List[str]:
+    """Cleaned text of pages [start, end), each prefixed with its page marker (one worker task)."""
+    pages = []
+    for number, page_text in iter_pdf_pages(source, start, end, deadline):
+        page = DocumentService.clean_text(f"--- Page {number} ---\n{page_text}")
+        if page:
+            pages.append(page)
+    return pages
+
+
+def extract_pdf(source: FileSource) -> str:
+    """Extract text from a PDF (sequential, up to PDF_MAX_PAGES)"""
+    try:
+        return "\n".join(extract_pdf_pages(source, 0, settings.PDF_MAX_PAGES))
+    except Exception as e:
+        logger.error(f"PDF extraction error: {e}")
+        raise
+
+
+def extract_docx(source: FileSource) -> str:
+    """Extract text from a DOCX"""
+    try:
+        from docx import Document
+        with open_source(source) as stream:
+            doc = Document(stream)
+        return "\n\n".join([p.text for p in doc.paragraphs if p.text.strip()])
+    except ImportError:
+        logger.error("python-docx not installed")
+        return ""
+    except Exception as e:
+        logger.error(f"DOCX extraction error: {e}")
+        raise
+
+
+def extract_text(source: FileSource, ext: str) -> Optional[str]:
+    """
+    Extract + clean text for one file type (None if unsupported).
+    Picklable entry point for process pools (CPU-bound PDF/DOCX parsing).
+    """
+    if ext == 'pdf':
+        extracted_text = extract_pdf(source)
+    elif ext == 'docx':
+        extracted_text = extract_docx(source)
+    elif ext in ['txt', 'md']:
+        with open_source(source) as stream:
+            extracted_text = stream.read().decode('utf-8', errors='ignore')
+    else:
+        return None
+    return DocumentService.clean_text(extracted_text)
+
+@dataclass
+class _Worker:
+    """A single-process executor and the PID of its process."""
+    executor: ProcessPoolExecutor
+    pid: int
+
 
 class DocumentService:
     """
     Enterprise Document Processing Service
     Handles PDF, DOCX, and Text extraction with robust error handling.
+    CPU-bound parsing runs in worker processes so it never blocks the event loop.
     """
-    
+
+    def __init__(self):
+        self.max_workers = settings.EXTRACTION_WORKERS or os.cpu_count() or 1
+        self._workers: List[_Worker] = []  # Every live worker (idle or busy)
+        self._idle: List[_Worker] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # One semaphore per event loop (scripts may run several loops in one process)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_workers), loop
+        return self._slots
+
+    async def _spawn_worker(self) -> "_Worker":
+        # Lazy: no worker processes are forked unless something is extracted
+        executor = ProcessPoolExecutor(max_workers=1)
+        pid = await asyncio.wrap_future(executor.submit(os.getpid))
+        worker = _Worker(executor, pid)
+        self._workers.append(worker)
+        return worker
+
+    def _kill_worker(self, worker: "_Worker"):
+        """Kill ONE worker (e.g. stuck on a pathological PDF); other extractions keep running."""
+        if worker in self._workers:
+            self._workers.remove(worker)
+        try:
+            os.kill(worker.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass  # Already gone
+        worker.executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        for worker in list(self._workers):
+            worker.executor.shutdown(wait=False, cancel_futures=True)
+        self._workers, self._idle = [], []
+
+    async def _run(self, deadline: float, fn, *args):
+        """
+        Run fn(*args) in a worker process (at most `max_workers` at once). Each worker is its own
+        single-process executor, so a task that overruns deadline + grace (or crashes its process)
+        costs only that worker: it is killed and replaced, in-flight tasks elsewhere are unaffected.
+        """
+        async with self._get_slots():
+            worker = self._idle.pop() if self._idle else await self._spawn_worker()
+            future = asyncio.wrap_future(worker.executor.submit(fn, *args))
+            try:
+                result = await asyncio.wait_for(
+                    future, timeout=max(0.0, deadline - time.time()) + HARD_TIMEOUT_GRACE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"⏱️ Extraction exceeded {settings.EXTRACTION_TIMEOUT_SECONDS}s. Killing worker {worker.pid}.")
+                self._kill_worker(worker)
+                raise
+            except (BrokenProcessPool, asyncio.CancelledError):
+                # Dead worker, or the caller stopped waiting while it may still be busy
+                self._kill_worker(worker)
+                raise
+            except BaseException:
+                self._idle.append(worker)  # The task failed, the worker is fine
+                raise
+            self._idle.append(worker)
+            return result
+
+    async def spool(self, stream: Any, path: Path, max_bytes: Optional[int] = None) -> SpooledFile:
+        """
+        The single way files enter ingestion: stream to disk in chunks, hashing as it goes,
+        so a file is never whole in memory. `stream` is an async byte iterator or a file-like
+        with read(n) - async (UploadFile) or blocking (S3 StreamingBody, open file).
+        Raises FileTooLargeError as soon as more than `max_bytes` have been read.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        if hasattr(stream, "__aiter__"):
+            chunks = stream.__aiter__()
+            next_chunk = lambda: anext(chunks, b"")
+        elif inspect.iscoroutinefunction(stream.read):
+            next_chunk = lambda: stream.read(SPOOL_CHUNK_BYTES)
+        else:
+            next_chunk = lambda: asyncio.to_thread(stream.read, SPOOL_CHUNK_BYTES)
+
+        def write(f, chunk: bytes):
+            hasher.update(chunk)
+            f.write(chunk)
+
+        f = await asyncio.to_thread(open, path, "wb")
+        try:
+            while chunk := await next_chunk():
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise FileTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                await asyncio.to_thread(write, f, chunk)
+        except BaseException:
+            await asyncio.to_thread(f.close)
+            path.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(f.close)
+        return SpooledFile(path=path, size=size, content_hash=hasher.hexdigest())
+
+    async def aiter_pages(self, source: FileSource, ext: str, content_hash: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Cleaned text, page by page, in page order (non-PDFs: one block).
+        `source` is preferably the path of a spooled file (see spool()).
+        With a content hash, pages come from the extraction cache when the same bytes
+        were extracted before; otherwise they are extracted and written to the cache.
+        """
+        cached = extraction_cache.iter_entry(content_hash, PAGES_CACHE_KIND)
+        if cached is not None:
+            while (page := await asyncio.to_thread(next, cached, None)) is not None:
+                yield page
+            return
+
+        deadline = time.time() + settings.EXTRACTION_TIMEOUT_SECONDS
+        writer = extraction_cache.writer(content_hash, PAGES_CACHE_KIND)
+        completed = False
+        try:
+            async for page in self._aiter_extracted(source, ext, deadline):
+                if writer:
+                    writer.write(page)
+                yield page
+            # Past the deadline the text may be truncated: don't cache it
+            completed = time.time() <= deadline
+        finally:
+            if writer:
+                writer.commit() if completed else writer.discard()
+
+    async def _aiter_extracted(self, source: FileSource, ext: str, deadline: float) -> AsyncIterator[str]:
+        """
+        PDF page ranges are extracted in worker processes with a bounded look-ahead
+        (at most `max_workers` ranges in flight), so memory stays flat for huge documents.
+        """
+        if ext != 'pdf':
+            text = await self._run(deadline, extract_text, source, ext)
+            if text:
+                yield text
+            return
+
+        page_count = await self._run(deadline, pdf_page_count, source)
+        if page_count > settings.PDF_MAX_PAGES:
+            logger.warning(f"PDF has {page_count} pages; extracting the first {settings.PDF_MAX_PAGES}")
+            page_count = settings.PDF_MAX_PAGES
+
+        step = settings.PDF_PAGES_PER_TASK
+        starts = deque(range(0, page_count, step))
+        in_flight = deque()
+        try:
+            while starts or in_flight:
+                while starts and len(in_flight) < self.max_workers:
+                    start = starts.popleft()
+                    in_flight.append(asyncio.ensure_future(self._run(
+                        deadline, extract_pdf_pages, source, start, min(start + step, page_count), deadline
+                    )))
+                for page in await in_flight.popleft():
+                    yield page
+        finally:
+            # Consumer stopped early (or failed): drop queued ranges
+            for task in in_flight:
+                task.cancel()
+
+    async def extract_text_async(self, source: FileSource, ext: str, content_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Extract + clean the whole text in a worker process (None if unsupported).
+        Prefer aiter_pages() for large documents (no full-text string).
+        """
+        if ext not in SUPPORTED_EXTENSIONS:
+            return None
+        return "\n".join([page async for page in self.aiter_pages(source, ext, content_hash)])
+
     @staticmethod
     def clean_text(text: str) -> str:
         """Clean and normalize extracted text"""
@@ -44,124 +363,4 @@ class DocumentService:
             
         return '\n'.join(cleaned_lines)
 
-    def _upload_to_s3(self, content: bytes, filename: str) -> str:
-        """Upload file to AWS S3 and return the URL"""
-        try:
-            import boto3
-            # Reload env check
-            if not os.environ.get("AWS_ACCESS_KEY_ID"):
-                from dotenv import load_dotenv
-                load_dotenv()
-
-            # Prefer os.environ for Boto3 as it honors it natively usually, 
-            # but we will pass explicitly to be safe.
-            aws_key = os.environ.get("AWS_ACCESS_KEY_ID")
-            aws_secret = os.environ.get("AWS_SECRET_ACCESS_KEY")
-            aws_region = os.environ.get("AWS_REGION", "eu-central-1")
-            bucket = os.environ.get("S3_BUCKET_NAME")
-
-            logger.info(f"S3 Connection Attempt: Key={aws_key[:4]}*** Bucket={bucket} Region={aws_region}")
-
-            if not aws_key or not aws_secret:
-                raise ValueError("Missing AWS Credentials in Environment")
-
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=aws_key,
-                aws_secret_access_key=aws_secret,
-                region_name=aws_region
-            )
-            
-            # Use Content Type based on extension
-            content_type = 'application/octet-stream'
-            if filename.endswith('.pdf'): content_type = 'application/pdf'
-            elif filename.endswith('.docx'): content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            
-            s3_client.put_object(
-                Bucket=bucket,
-                Key=f"documents/{filename}",
-                Body=content,
-                ContentType=content_type
-            )
-            
-            return f"s3://{bucket}/documents/{filename}"
-            
-        except Exception as e:
-            logger.error(f"S3 Upload failed: {e}")
-            return f"local://{filename}" # Fallback
-            
-    async def process_file(self, content: bytes, filename: str, skip_upload: bool = False) -> Optional[ProcessedDocument]:
-        """Process file content based on extension"""
-        ext = filename.lower().split('.')[-1]
-        extracted_text = ""
-        
-        try:
-            # 1. Upload to Cloud (S3) for Persistence (Optional)
-            if not skip_upload:
-                storage_url = self._upload_to_s3(content, filename)
-                logger.info(f"File stored at: {storage_url}")
-            else:
-                # Assume it's already in S3 (Sync Mode)
-                bucket = os.environ.get("S3_BUCKET_NAME", "unknown-bucket")
-                storage_url = f"s3://{bucket}/documents/{filename}"
-                logger.info(f"Skipping S3 Upload (Sync Mode). Using: {storage_url}")
-            
-            if ext == 'pdf':
-                extracted_text = self._extract_pdf(content)
-            elif ext == 'docx':
-                extracted_text = self._extract_docx(content)
-            elif ext in ['txt', 'md']:
-                extracted_text = content.decode('utf-8', errors='ignore')
-            else:
-                logger.warning(f"Unsupported file type: {ext}")
-                return None
-                
-            clean_content = self.clean_text(extracted_text)
-            
-            if not clean_content:
-                logger.warning(f"No content extracted from {filename}")
-                return None
-                
-            return ProcessedDocument(
-                content=clean_content,
-                filename=filename,
-                doc_type=ext,
-                word_count=len(clean_content.split()),
-                metadata={
-                    "source": storage_url,  # NOW USING S3 URL
-                    "processed_at": str(os.times())
-                }
-            )
-
-        except Exception as e:
-            logger.error(f"Failed to process {filename}: {str(e)}")
-            return None
-
-    def _extract_pdf(self, content: bytes) -> str:
-        """Extract text from PDF bytes"""
-        text_content = ""
-        try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            for i, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += f"\n\n--- Page {i+1} ---\n\n{page_text}"
-            return text_content
-        except Exception as e:
-            logger.error(f"PDF extraction error: {e}")
-            raise
-
-    def _extract_docx(self, content: bytes) -> str:
-        """Extract text from DOCX bytes"""
-        try:
-            from docx import Document
-            doc = Document(io.BytesIO(content))
-            return "\n\n".join([p.text for p in doc.paragraphs if p.text.strip()])
-        except ImportError:
-            logger.error("python-docx not installed")
-            return ""
-        except Exception as e:
-            logger.error(f"DOCX extraction error: {e}")
-            raise
-
 document_service = DocumentService()
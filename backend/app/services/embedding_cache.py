@@ -0,0 +1,117 @@
+import re
+import hashlib
+import logging
+import unicodedata
+from array import array
+from typing import List, Optional, Dict, Any
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.services.cache import TieredCache
+
+logger = logging.getLogger("embedding_cache")
+
+
+def normalize_query(text: str) -> str:
+    """Canonical cache form: NFKC, casefolded, whitespace collapsed."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def truncate_embedding(vector: List[float], dimensions: int) -> List[float]:
+    """
+    Matryoshka truncation: keep the first `dimensions` values and re-normalize (L2).
+    Equivalent to requesting `dimensions` from text-embedding-3-* directly.
+    """
+    head = vector[:dimensions]
+    norm = sum(x * x for x in head) ** 0.5 or 1.0
+    return [x / norm for x in head]
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Query-Embedding Cache in front of the OpenAI embedder.
+    Keys are (model, normalized text) so repeated questions in either language
+    skip the embeddings round-trip. Document (ingest) embeddings pass through.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, cache: TieredCache):
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(f"{self.model_name}|{normalize_query(text)}".encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    # --- Documents (Ingest): no caching, chunks are embedded once ---
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.base.aembed_documents(texts)
+
+    # --- Queries (Search): cached ---
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        blob = self.cache.get(key)
+        if blob is not None:
+            return _unpack(blob)
+        vector = self.base.embed_query(text)
+        self.cache.set(key, _pack(vector))
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_queries([text]))[0]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Batch lookup: cache hits are served locally, all misses are embedded
+        together in ONE embeddings request.
+        """
+        keys = [self._key(t) for t in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        for i, key in enumerate(keys):
+            blob = await self.cache.aget(key)
+            if blob is not None:
+                vectors[i] = _unpack(blob)
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            miss_texts = [texts[idxs[0]] for idxs in missing.values()]
+            new_vectors = await self.base.aembed_documents(miss_texts)
+            for (key, idxs), vector in zip(missing.items(), new_vectors):
+                await self.cache.aset(key, _pack(vector))
+                for i in idxs:
+                    vectors[i] = vector
+
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.model_name, **self.cache.stats()}
+
+
+def build_embedding_cache() -> TieredCache:
+    return TieredCache(
+        namespace="emb",
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        backend=settings.EMBEDDING_CACHE_BACKEND,
+        redis_url=settings.REDIS_URL,
+        disk_path=settings.EMBEDDING_CACHE_PATH,
+        disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+    )
@@ -0,0 +1,134 @@
+import os
+import gzip
+import json
+import uuid
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Iterator, Dict, Any
+
+from app.core.config import settings
+
+logger = logging.getLogger("extraction_cache")
+
+
+class _EntryWriter:
+    """Streams lines into a temp file; only a completed entry becomes visible (atomic rename)."""
+
+    def __init__(self, cache: "ExtractionCache", target: Path):
+        self.cache = cache
+        self.target = target
+        self.tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.tmp, "wt", encoding="utf-8")
+
+    def write(self, item: str):
+        self._file.write(json.dumps(item, ensure_ascii=False))
+        self._file.write("\n")
+
+    def commit(self):
+        self._file.close()
+        os.replace(self.tmp, self.target)
+        self.cache._added(self.target)
+
+    def discard(self):
+        self._file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class ExtractionCache:
+    """
+    Content-Addressed Extraction Cache (local disk).
+    Entries are keyed by the SHA-256 of the file bytes:
+      <hash>.<kind>.jsonl.gz  (kind = 'pages-<extractor version>' or 'chunks-<splitter signature>')
+    Written and read line by line (one page / one chunk), so large documents never
+    need to be held in memory. Least recently used entries are evicted above max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # Lazy: scanned on first write
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, content_hash: str, kind: str) -> Path:
+        return self.path / content_hash[:2] / f"{content_hash}.{kind}.jsonl.gz"
+
+    def iter_entry(self, content_hash: Optional[str], kind: str) -> Optional[Iterator[str]]:
+        """Line iterator for a cached entry, or None on a miss."""
+        if not self.enabled or not content_hash:
+            return None
+        target = self._file(content_hash, kind)
+        if not target.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(target)  # LRU: mtime = last use
+        except OSError:
+            pass
+        return self._read(target)
+
+    def contains(self, content_hash: Optional[str], kind: str) -> bool:
+        return bool(self.enabled and content_hash and self._file(content_hash, kind).exists())
+
+    @staticmethod
+    def _read(target: Path) -> Iterator[str]:
+        with gzip.open(target, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def writer(self, content_hash: Optional[str], kind: str) -> Optional[_EntryWriter]:
+        if not self.enabled or not content_hash:
+            return None
+        try:
+            return _EntryWriter(self, self._file(content_hash, kind))
+        except OSError as e:
+            logger.warning(f"⚠️ Extraction cache not writable: {e}")
+            return None
+
+    def _scan(self):
+        return [
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in self.path.glob("*/*.jsonl.gz")
+        ] if self.path.exists() else []
+
+    def _added(self, target: Path):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += target.stat().st_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes."""
+        files = sorted(self._scan())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes * 0.9:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+        logger.info(f"🧹 Extraction cache evicted down to {total / (1024 * 1024):.1f} MB")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "size_bytes": self._total_bytes,
+        }
+
+
+extraction_cache = ExtractionCache(
+    path=settings.EXTRACTION_CACHE_PATH,
+    max_bytes=settings.EXTRACTION_CACHE_MAX_MB * 1024 * 1024,
+    enabled=settings.EXTRACTION_CACHE_ENABLED,
+)
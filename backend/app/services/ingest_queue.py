@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Optional, List, AsyncIterator, Dict
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.document import Document
+from app.services.document_service import document_service, SpooledFile, file_sha256
+from app.services.rag_service import rag_service
+from app.services.storage_service import storage_service
+
+logger = logging.getLogger("ingest_queue")
+
+
+class IngestQueue:
+    """
+    Background Ingestion Queue (Postgres SKIP LOCKED over the `documents` table).
+    Uploads only spool the file and insert a 'pending' row. Workers claim rows with
+    FOR UPDATE SKIP LOCKED, so several app processes can share one queue safely.
+    Progress (pages / chunks) and errors are written back to the row.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        if self.concurrency <= 0 or self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await self._requeue_stale()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        logger.info(f"📥 Ingestion queue started ({self.concurrency} workers)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake an idle worker now (other processes pick the job up on their next poll)."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    @staticmethod
+    def spool_path(document_id: str, filename: str) -> Path:
+        return Path(settings.INGEST_SPOOL_DIR) / f"{document_id}_{Path(filename).name}"
+
+    async def enqueue(self, db, document: Document):
+        """(Re)queue a document: reset progress, mark pending, wake a worker."""
+        document.processing_status = "pending"
+        document.pages_processed = 0
+        document.chunks_indexed = 0
+        document.error_message = None
+        await db.commit()
+        self.notify()
+
+    async def _requeue_stale(self):
+        """Jobs left 'processing' by a crashed worker (no progress heartbeat) go back to pending."""
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.INGEST_STALE_MINUTES)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(Document)
+                    .where(Document.processing_status == "processing", Document.updated_at < cutoff)
+                    .values(processing_status="pending")
+                )
+                await db.commit()
+                if result.rowcount:
+                    logger.warning(f"♻️ Re-queued {result.rowcount} stale ingestion jobs")
+        except Exception as e:
+            logger.error(f"❌ Stale job recovery failed: {e}")
+
+    async def _claim(self) -> Optional[str]:
+        async with AsyncSessionLocal() as db:
+            stmt = (
+                select(Document)
+                .where(Document.processing_status == "pending")
+                .order_by(Document.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            document = (await db.execute(stmt)).scalars().first()
+            if not document:
+                return None
+            document.processing_status = "processing"
+            await db.commit()
+            return document.id
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                document_id = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ingest worker {number} failed to claim a job: {e}")
+                document_id = None
+
+            if document_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.INGEST_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.process(document_id)
+
+    async def _local_copy(self, document: Document) -> SpooledFile:
+        """The spooled upload, or (reindex) the stored original streamed back into the spool."""
+        if document.file_path.startswith("s3://"):
+            body = await storage_service.open_stream(document.file_path)
+            return await document_service.spool(body, self.spool_path(document.id, document.filename))
+        path = Path(document.file_path)
+        return SpooledFile(path=path, size=path.stat().st_size, content_hash=document.content_hash or "")
+
+    @staticmethod
+    async def _count_pages(pages: AsyncIterator[str], progress: Dict[str, int]) -> AsyncIterator[str]:
+        async for page in pages:
+            progress["pages"] += 1
+            yield page
+
+    async def process(self, document_id: str):
+        """Run one ingestion job: persist to S3, extract, chunk, embed, upsert."""
+        async with AsyncSessionLocal() as db:
+            document = await db.get(Document, document_id)
+            if document is None:
+                return  # Deleted while queued
+            upload: Optional[asyncio.Task] = None
+            local: Optional[SpooledFile] = None
+            from_storage = document.file_path.startswith("s3://")
+            try:
+                local = await self._local_copy(document)
+                if not local.content_hash:
+                    # Rows queued before spooling hashed on the way in
+                    local.content_hash = await asyncio.to_thread(file_sha256, local.path)
+                content_hash = document.content_hash = local.content_hash
+
+                # 1. Persist the original under uploads/<document_id>/ (reindex reuses that copy).
+                #    The source is per document: a filename alone is shared with the public S3 sync
+                #    (documents/<filename>) and other users, and delete_by_source would hit them too.
+                #    Rows stored under documents/ before uploads/ existed are moved on reindex.
+                #    The S3 URL is known up front, so the upload runs while pages are extracted.
+                key = storage_service.upload_key(document.id, document.filename)
+                if document.file_path == storage_service.url(key):
+                    source = document.file_path
+                elif storage_service.enabled:
+                    source = storage_service.url(key)
+                    upload = asyncio.create_task(storage_service.upload_file(str(local.path), key))
+                else:
+                    source = f"local://{document.id}/{Path(document.filename).name}"
+
+                # 2. Replace vectors of a previous run (reindex), by document ID only
+                await rag_service.delete_by_document(document.id)
+
+                # 3. Stream pages -> chunks -> embeddings, reporting progress per batch
+                ext = document.filename.lower().split('.')[-1]
+                metadata = {
+                    "filename": document.filename,
+                    "type": ext,
+                    "source": source,
+                    "document_id": document.id,
+                    "processed_at": datetime.utcnow().isoformat(),
+                    # Secure the document: only its owner can retrieve it
+                    "scope": "private",
+                    "user_id": document.uploaded_by,
+                }
+                progress = {"pages": 0}
+                pages = self._count_pages(document_service.aiter_pages(local.path, ext, content_hash), progress)
+                async for chunks in rag_service.iter_chunks(pages, metadata, content_hash=content_hash):
+                    await rag_service.add_chunks(chunks)
+                    document.chunks_indexed = (document.chunks_indexed or 0) + len(chunks)
+                    document.pages_processed = progress["pages"]
+                    await db.commit()  # Also the heartbeat (updated_at) for stale-job recovery
+
+                uploaded = False
+                if upload is not None:
+                    try:
+                        await upload
+                        uploaded = True
+                        document.file_path = source
+                    except Exception as e:
+                        # The index is complete: keep it and the local copy (file_path unchanged),
+                        # the next reindex retries the upload
+                        logger.warning(f"⚠️ Upload of {document.filename} failed, keeping the local copy: {e}")
+                        document.error_message = f"Stored locally, S3 upload failed: {e}"[:2000]
+
+                document.pages_processed = progress["pages"]
+                if document.chunks_indexed:
+                    document.processing_status = "completed"
+                else:
+                    document.processing_status = "failed"
+                    document.error_message = "No text content could be extracted"
+                logger.info(f"✅ Ingested {document.filename}: {document.chunks_indexed} chunks")
+
+                await db.commit()
+                if uploaded and not from_storage:
+                    local.path.unlink(missing_ok=True)  # The spooled upload, now in S3
+
+            except Exception as e:
+                logger.error(f"❌ Ingestion failed for {document_id}: {e}")
+                if upload is not None:
+                    await asyncio.gather(upload, return_exceptions=True)
+                    if not upload.cancelled() and upload.exception() is None:
+                        # Not recorded in file_path (rolled back below): would be orphaned
+                        await storage_service.delete(source)
+                try:
+                    # A failed job leaves no partial index behind (reindex starts over)
+                    await rag_service.delete_by_document(document_id)
+                except Exception as cleanup_error:
+                    logger.error(f"❌ Could not remove partial vectors of {document_id}: {cleanup_error}")
+                await db.rollback()
+                await db.execute(
+                    update(Document)
+                    .where(Document.id == document_id)
+                    .values(processing_status="failed", error_message=str(e)[:2000])
+                )
+                await db.commit()
+            finally:
+                if from_storage and local is not None:
+                    local.path.unlink(missing_ok=True)  # Temporary copy for the reindex
+
+
+ingest_queue = IngestQueue(concurrency=settings.INGEST_WORKERS)
@@ -0,0 +1,178 @@
+# Labelled training queries for the local intent router (True = needs the knowledge base).
+# Deliberately heavy on queries WITHOUT router keywords: those are the ones that used to
+# reach the LLM. Keep held-out evaluation queries in scripts/intent_eval_queries.jsonl, not here.
+
+RAG_EXAMPLES = [
+    # English: regulations, procedures, programs, figures
+    "what are the requirements for a foreigner to own property",
+    "how long does commercial registration take",
+    "can a non saudi open a business without a local partner",
+    "what is the penalty for late payment of zakat",
+    "how many tourists visited the kingdom last year",
+    "what is the unemployment target for 2030",
+    "what are the rules for remote work contracts",
+    "how is end of service benefit calculated",
+    "what does the labor law say about annual leave",
+    "what is the minimum wage for citizens in the private sector",
+    "explain the new personal status law",
+    "what are the conditions for premium residency",
+    "how do i apply for a building permit",
+    "who can get a housing loan from the real estate development fund",
+    "what is the target homeownership rate",
+    "what is the budget of the line",
+    "when will the riyadh metro be completed",
+    "what is the status of the red sea project",
+    "how much has the public investment fund invested in sports",
+    "what are the goals of the tourism strategy",
+    "what sectors does the industrial strategy focus on",
+    "what incentives exist for regional headquarters",
+    "what is the localization target for military spending",
+    "how many jobs will qiddiya create",
+    "what percentage of gdp comes from non oil revenue",
+    "what are the objectives of the fiscal balance plan",
+    "summarize the quality of life program",
+    "what does the document say about women in the workforce",
+    "according to the uploaded contract what is the termination clause",
+    "what is article 77 about",
+    "what does chapter three of the regulation cover",
+    "what are the penalties in the anti fraud statute",
+    "what is the deadline for vat registration",
+    "what fees apply to expatriate dependents",
+    "how are disputes resolved under the arbitration system",
+    "what are the data protection obligations for companies",
+    "what licences are needed to open a restaurant",
+    "what is the saudization quota for retail",
+    "which authority regulates the capital market",
+    "what are the milestones for renewable energy capacity",
+    "how many trees does the green initiative plan to plant",
+    "what is the target for umrah visitors",
+    "what does the civil transactions law say about contracts",
+    "what are the tenant rights under the ejar platform",
+    "how do i transfer sponsorship",
+    "what is the expected population of neom",
+    "list the vision realization programs",
+    "what are the pillars of the national strategy",
+    "compare the 2016 and 2023 unemployment figures",
+    "what did the annual report say about non oil exports",
+    # Arabic
+    "ما هي شروط تملك الأجانب للعقار",
+    "كم تستغرق إجراءات السجل التجاري",
+    "ما هي عقوبة التأخر في سداد الزكاة",
+    "كم عدد السياح الذين زاروا المملكة العام الماضي",
+    "ما هو مستهدف البطالة لعام 2030",
+    "كيف تحسب مكافأة نهاية الخدمة",
+    "ماذا يقول نظام العمل عن الإجازة السنوية",
+    "ما هو الحد الأدنى للأجور للمواطنين",
+    "اشرح نظام الأحوال الشخصية الجديد",
+    "ما شروط الإقامة المميزة",
+    "كيف أحصل على رخصة بناء",
+    "من يستحق القرض العقاري من صندوق التنمية العقارية",
+    "ما نسبة تملك المساكن المستهدفة",
+    "متى سيكتمل مترو الرياض",
+    "كم استثمر صندوق الاستثمارات العامة في الرياضة",
+    "ما أهداف الاستراتيجية الوطنية للسياحة",
+    "ما الحوافز المقدمة للمقرات الإقليمية",
+    "كم وظيفة ستوفرها القدية",
+    "ما نسبة الإيرادات غير النفطية من الناتج المحلي",
+    "لخص برنامج جودة الحياة",
+    "ماذا تقول الوثيقة عن تمكين المرأة",
+    "ما هي المادة السابعة والسبعون",
+    "ما العقوبات في نظام مكافحة الاحتيال",
+    "متى آخر موعد للتسجيل في ضريبة القيمة المضافة",
+    "ما رسوم المرافقين للعمالة الوافدة",
+    "ما نسبة التوطين في قطاع التجزئة",
+    "ما الجهة التي تنظم السوق المالية",
+    "كم شجرة ستزرع مبادرة السعودية الخضراء",
+    "ما حقوق المستأجر في منصة إيجار",
+    "كيف أنقل الكفالة",
+    "كم عدد سكان نيوم المتوقع",
+    "ما هي برامج تحقيق الرؤية",
+    "ما مستهدفات الطاقة المتجددة",
+    "ما شروط فتح مطعم",
+    "ما التزامات الشركات في حماية البيانات الشخصية",
+]
+
+CHAT_EXAMPLES = [
+    # English: small talk, general knowledge, unrelated tasks
+    "how are you today",
+    "good night",
+    "thanks a lot",
+    "thank you that was helpful",
+    "nice to meet you",
+    "tell me a joke",
+    "what is the capital of new zealand",
+    "who won the world cup in 2018",
+    "what is the weather like tomorrow",
+    "write a python function to reverse a string",
+    "how do i center a div in css",
+    "explain quantum computing simply",
+    "what is the speed of light",
+    "translate good morning to french",
+    "what is 15 times 23",
+    "recommend a good book",
+    "write a poem about the sea",
+    "what is machine learning",
+    "how do i make pancakes",
+    "who painted the mona lisa",
+    "what time is it in tokyo",
+    "give me a workout plan",
+    "what is the meaning of life",
+    "can you help me write an email to my manager",
+    "what is the difference between a list and a tuple",
+    "how tall is mount everest",
+    "suggest a name for my cat",
+    "what movies are popular right now",
+    "how do airplanes fly",
+    "explain photosynthesis",
+    "what is your name",
+    "are you a robot",
+    "what can you do",
+    "ok",
+    "cool thanks",
+    "bye",
+    "how old is the universe",
+    "what is the best programming language",
+    "fix this javascript error undefined is not a function",
+    "how many planets are in the solar system",
+    "who invented the telephone",
+    "summarize the plot of hamlet",
+    "what is bitcoin",
+    "give me tips for a job interview",
+    "how do i learn guitar",
+    "what is the largest ocean",
+    "tell me a fun fact",
+    "what should i eat for dinner",
+    "how do i reset my iphone",
+    "sing me a song",
+    # Arabic
+    "كيف حالك",
+    "تصبح على خير",
+    "شكرا جزيلا",
+    "شكرا لك",
+    "تشرفت بمعرفتك",
+    "قل لي نكتة",
+    "ما هي عاصمة نيوزيلندا",
+    "من فاز بكأس العالم 2018",
+    "كيف سيكون الطقس غدا",
+    "اكتب دالة بايثون لعكس نص",
+    "اشرح الحوسبة الكمية ببساطة",
+    "كم سرعة الضوء",
+    "ترجم صباح الخير إلى الفرنسية",
+    "كم حاصل ضرب 15 في 23",
+    "اقترح علي كتابا جيدا",
+    "اكتب قصيدة عن البحر",
+    "ما هو تعلم الآلة",
+    "كيف أصنع الفطائر",
+    "من رسم الموناليزا",
+    "أعطني خطة تمارين",
+    "ما اسمك",
+    "هل أنت روبوت",
+    "ماذا تستطيع أن تفعل",
+    "مع السلامة",
+    "كم عمر الكون",
+    "كم عدد الكواكب في المجموعة الشمسية",
+    "من اخترع الهاتف",
+    "ما هي البيتكوين",
+    "أعطني نصائح لمقابلة العمل",
+    "ماذا آكل على العشاء",
+]
@@ -0,0 +1,213 @@
+import math
+import zlib
+import random
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Iterable
+
+from app.core.config import settings
+from app.services.sparse_encoder import tokenize
+from app.services.intent_examples import RAG_EXAMPLES, CHAT_EXAMPLES
+
+logger = logging.getLogger("intent_router")
+
+# Rule labels (checked in this order of precedence)
+GREETING, DEFINITION, KEYWORD = "greeting", "definition", "keyword"
+
+# Whole-query greetings / thanks -> plain chat
+GREETINGS = [
+    "hello", "hi", "salam", "hey", "good morning", "good evening", "marhaba", "welcome",
+    "مرحبا", "السلام عليكم", "اهلا", "اهلا وسهلا", "صباح الخير", "مساء الخير",
+]
+
+# Axiom definitions the model answers from general knowledge -> plain chat
+DEFINITIONS = [
+    "what is vision 2030", "who are you", "what is this", "tell me about vision 2030",
+    "ما هي رؤية 2030", "ما هي رؤية المملكة 2030", "من انت",
+]
+
+# Knowledge-base vocabulary -> RAG (Arabic forms are matched after normalization + prefix stemming)
+RAG_KEYWORDS = [
+    "saudi", "vision 2030", "neom", "law", "laws", "regulation", "regulations", "project", "projects",
+    "scheme", "housing", "ministry", "royal", "decree", "stats", "statistics", "number", "percentage",
+    "program", "programs", "programme", "initiative", "initiatives", "giga",
+    "السعوديه", "المملكه", "رؤيه 2030", "نيوم", "نظام", "انظمه", "قانون", "لائحه", "مرسوم", "وزاره",
+    "مشروع", "مشاريع", "برنامج", "اسكان", "نسبه", "احصاءات", "مبادره", "هيئه",
+]
+
+_FEATURE_SPACE = 1 << 20
+
+
+def _words(text: str) -> List[str]:
+    """Router tokens: normalized + prefix-stemmed like the sparse index, stopwords kept."""
+    return tokenize(text, keep_stopwords=True)
+
+
+def _token_text(words: Iterable[str]) -> str:
+    # Space-delimited so automaton matches always fall on whole words
+    return f" {' '.join(words)} "
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over the router's token text: every pattern found in ONE pass over
+    the query, independent of the number of patterns (the old check was a linear `any(k in q)`).
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for pattern, label in patterns.items():
+            self._add(_token_text(_words(pattern)), label)
+        self._build()
+
+    def _add(self, pattern: str, label: str):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(label)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())  # Depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def labels(self, text: str) -> List[str]:
+        found: List[str] = []
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found.extend(self._out[state])
+        return found
+
+
+def _features(words: List[str]) -> List[int]:
+    """Hashed unigrams, bigrams and character trigrams (robust to Arabic morphology and typos)."""
+    grams = list(words)
+    grams += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        grams += [f"#{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return sorted({zlib.crc32(g.encode("utf-8")) % _FEATURE_SPACE for g in grams})
+
+
+class LinearIntentModel:
+    """Logistic regression over hashed sparse features, trained in-process on the bundled examples."""
+
+    def __init__(self, epochs: int = 30, learning_rate: float = 0.5, l2: float = 1e-4, seed: int = 13):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.weights: Dict[int, float] = {}
+        self.bias = 0.0
+
+    def _score(self, features: List[int]) -> float:
+        scale = 1.0 / math.sqrt(len(features) or 1)
+        return self.bias + scale * sum(self.weights.get(f, 0.0) for f in features)
+
+    def fit(self, examples: List[Tuple[str, bool]]) -> "LinearIntentModel":
+        data = [(_features(_words(text)), 1.0 if label else 0.0) for text, label in examples]
+        rng = random.Random(self.seed)
+        for _ in range(self.epochs):
+            rng.shuffle(data)
+            for features, target in data:
+                gradient = self._sigmoid(self._score(features)) - target
+                scale = 1.0 / math.sqrt(len(features) or 1)
+                self.bias -= self.learning_rate * gradient
+                for f in features:
+                    w = self.weights.get(f, 0.0)
+                    self.weights[f] = w - self.learning_rate * (gradient * scale + self.l2 * w)
+        return self
+
+    @staticmethod
+    def _sigmoid(z: float) -> float:
+        return 1.0 / (1.0 + math.exp(-max(min(z, 30.0), -30.0)))
+
+    def predict_proba(self, words: List[str]) -> float:
+        """P(query needs the knowledge base)."""
+        return self._sigmoid(self._score(_features(words)))
+
+
+@dataclass
+class RouteDecision:
+    needs_rag: bool
+    confidence: float  # Probability of the chosen route (1.0 for rule matches)
+    source: str  # greeting / definition / keyword / classifier
+    confident: bool  # False -> the caller should ask the LLM router
+
+    @property
+    def label(self) -> str:
+        return "rag" if self.needs_rag else "chat"
+
+
+class IntentRouter:
+    """
+    Local, zero-network intent router (RAG vs plain chat), answering in microseconds:
+    1. Rules via one Aho-Corasick pass: greetings / axiom definitions -> chat, KB vocabulary -> RAG.
+    2. Otherwise a linear classifier trained on bilingual examples.
+    Decisions below `threshold` are marked not confident; only those go to the LLM router.
+    """
+
+    def __init__(self, threshold: float, examples: Optional[List[Tuple[str, bool]]] = None):
+        self.threshold = threshold
+        self.examples = examples
+        self.automaton = KeywordAutomaton({
+            **{k: KEYWORD for k in RAG_KEYWORDS},
+            **{d: DEFINITION for d in DEFINITIONS},
+        })
+        self.greetings = {" ".join(_words(g)) for g in GREETINGS}
+        self._model: Optional[LinearIntentModel] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> LinearIntentModel:
+        # Lazy: trained once per process on first use (a few hundred examples, well under a second)
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    examples = self.examples or (
+                        [(q, True) for q in RAG_EXAMPLES] + [(q, False) for q in CHAT_EXAMPLES]
+                    )
+                    self._model = LinearIntentModel().fit(examples)
+                    logger.info(f"🧭 Intent router trained on {len(examples)} examples")
+        return self._model
+
+    def route(self, query: str) -> RouteDecision:
+        words = _words(query)
+        text = " ".join(words)
+        if text in self.greetings or len(query.strip()) < 4:
+            return RouteDecision(False, 1.0, GREETING, True)
+
+        labels = self.automaton.labels(_token_text(words))
+        if DEFINITION in labels:
+            return RouteDecision(False, 1.0, DEFINITION, True)
+        if KEYWORD in labels:
+            return RouteDecision(True, 1.0, KEYWORD, True)
+
+        probability = self.model.predict_proba(words)
+        needs_rag = probability >= 0.5
+        confidence = probability if needs_rag else 1.0 - probability
+        return RouteDecision(needs_rag, round(confidence, 4), "classifier", confidence >= self.threshold)
+
+
+intent_router = IntentRouter(threshold=settings.INTENT_ROUTER_THRESHOLD)
@@ -0,0 +1,238 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import httpx
+from openai import AsyncOpenAI
+from langchain_openai import ChatOpenAI
+
+from app.core.config import settings
+
+logger = logging.getLogger("llm_clients")
+
+# Smart Registry: Defines the "Personality" and "Constraints" of each model.
+MODEL_REGISTRY = {
+    # Primary Reasoning Model (High IQ, Strict Params)
+    "gpt-5.2-chat-latest": {
+        "tiktoken_fallback": "gpt-5",
+        "supports_temperature": False, # Forces default (1)
+        "context_tokens": 4000,  # STRATEGIC BRIEFING budget (retrieved context per answer)
+        "description": "Optimized for complex reasoning and final outputs."
+    },
+    # Standard Model (Balanced)
+    "gpt-5": {
+        "tiktoken_fallback": "gpt-5",
+        "supports_temperature": True,
+        "default_temp": 0.7,
+        "context_tokens": 4000,
+        "description": "Balanced baseline performance."
+    },
+    # High-Efficiency Router (Fast, Cost-Effective)
+    "gpt-5-nano": {
+        "tiktoken_fallback": "gpt-5-nano",
+        "supports_temperature": True,
+        "default_temp": 0.0,
+        "context_tokens": 2000,
+        "description": "Optimized for routing and classification."
+    }
+}
+
+
+def context_budget(model_name: str) -> int:
+    """Retrieved-context token budget for `model_name` (unknown models get the "gpt-5" profile)."""
+    config = MODEL_REGISTRY.get(model_name, MODEL_REGISTRY["gpt-5"])
+    return config.get("context_tokens", settings.RAG_CONTEXT_TOKENS)
+
+
+# A request that waited this long for a free connection counts as saturated
+SATURATION_WAIT_MS = 5.0
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """
+    Transport of the shared client: counts in-flight and queued requests, and owns the
+    connection pool, which can be closed (shutdown) and is reopened on the next request.
+    A request is queued until httpcore reports its first trace event (connect / send on
+    an assigned connection), i.e. while it waits for a free connection.
+    """
+
+    def __init__(self, pool: "LLMClientPool"):
+        self.pool = pool
+        self._inner: Optional[httpx.AsyncHTTPTransport] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._inner is None:
+            self._inner = httpx.AsyncHTTPTransport(http2=self.pool.http2, limits=self.pool.limits)
+        pool = self.pool
+        pool.requests += 1
+        pool.active_requests += 1
+        pool.queued_requests += 1
+        pool.peak_queued = max(pool.peak_queued, pool.queued_requests)
+        enqueued = time.perf_counter()
+        waiting = True
+
+        def dequeue():
+            nonlocal waiting
+            if waiting:
+                waiting = False
+                pool.queued_requests -= 1
+                waited_ms = (time.perf_counter() - enqueued) * 1000
+                pool.max_pool_wait_ms = max(pool.max_pool_wait_ms, waited_ms)
+                if waited_ms >= SATURATION_WAIT_MS:
+                    pool.saturated_requests += 1
+
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            dequeue()
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            dequeue()
+            pool.active_requests -= 1
+            raise
+        dequeue()
+        response.stream = _CountedStream(response.stream, pool)
+        return response
+
+    async def aclose(self):
+        if self._inner is not None:
+            inner, self._inner = self._inner, None
+            await inner.aclose()
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """Response body: the request stays in flight until the body is closed (streaming)."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, pool: "LLMClientPool"):
+        self._stream = stream
+        self._pool = pool
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            self._pool.active_requests -= 1
+        await self._stream.aclose()
+
+
+class LLMClientPool:
+    """
+    Pooled OpenAI Clients.
+    One httpx connection pool (HTTP/2, keep-alive, bounded) is shared by every OpenAI call in
+    the process: the raw AsyncOpenAI client (query variations, LLM judge, chat service) and one
+    cached ChatOpenAI per model, configured from MODEL_REGISTRY. Requests multiplex over a few
+    warm TLS connections instead of opening a new client (and handshake) per request.
+    The clients live as long as the process (services keep references to them); aclose()
+    only closes the connections, which are reopened on demand.
+    """
+
+    def __init__(self, http2: bool, max_connections: int, max_keepalive: int, keepalive_seconds: float,
+                 connect_timeout: float, timeout_seconds: float, pool_timeout: float):
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_seconds,
+        )
+        self.timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout, pool=pool_timeout)
+        self._transport = _MeteredTransport(self)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._openai: Optional[AsyncOpenAI] = None
+        self._chat: Dict[str, ChatOpenAI] = {}
+        self._lock = threading.Lock()
+        # Saturation metrics, counted by the transport
+        self.requests = 0
+        self.active_requests = 0  # Sent and not finished (response body still open)
+        self.queued_requests = 0  # Waiting for a free connection
+        self.saturated_requests = 0  # Waited at least SATURATION_WAIT_MS for a connection
+        self.peak_queued = 0
+        self.max_pool_wait_ms = 0.0
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        # Lazy: built once, on first use; connections are opened on demand and kept alive
+        if self._http_client is None:
+            with self._lock:
+                if self._http_client is None:
+                    self._http_client = httpx.AsyncClient(transport=self._transport, timeout=self.timeout)
+        return self._http_client
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            with self._lock:
+                if self._openai is None:
+                    self._openai = AsyncOpenAI(
+                        api_key=settings.OPENAI_API_KEY,
+                        http_client=self.http_client,
+                        timeout=self.timeout,
+                    )
+        return self._openai
+
+    def chat(self, model_name: str) -> ChatOpenAI:
+        """
+        Shared LangChain client for `model_name`, properly configured.
+        Reference: MODEL_REGISTRY (unknown models get the "gpt-5" profile)
+        """
+        client = self._chat.get(model_name)
+        if client is None:
+            config = MODEL_REGISTRY.get(model_name, MODEL_REGISTRY["gpt-5"])
+
+            params = {
+                "model": model_name,
+                "api_key": settings.OPENAI_API_KEY,
+                "streaming": True,
+                "tiktoken_model_name": config["tiktoken_fallback"],
+                "http_async_client": self.http_client,
+                "request_timeout": self.timeout,
+            }
+
+            # Only add temperature if the model supports it
+            if config["supports_temperature"]:
+                params["temperature"] = config.get("default_temp", 0.7)
+
+            with self._lock:
+                client = self._chat.setdefault(model_name, ChatOpenAI(**params))
+        return client
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation metrics: requests in flight vs the connection limit, queued requests, counters."""
+        max_connections = self.limits.max_connections
+        return {
+            "http2": self.http2,
+            "max_connections": max_connections,
+            "active_requests": self.active_requests,
+            "queued_requests": self.queued_requests,
+            # HTTP/1.1: one request per connection; HTTP/2 multiplexes several, so this can exceed 1
+            "utilization": round(self.active_requests / max_connections, 3),
+            "requests": self.requests,
+            "saturated_requests": self.saturated_requests,
+            "peak_queued": self.peak_queued,
+            "max_pool_wait_ms": round(self.max_pool_wait_ms, 1),
+            "chat_models": sorted(self._chat),
+        }
+
+    async def aclose(self):
+        """Close the pooled connections (shutdown). Clients stay usable and reconnect on demand."""
+        await self._transport.aclose()
+
+
+llm_clients = LLMClientPool(
+    http2=settings.LLM_HTTP2,
+    max_connections=settings.LLM_MAX_CONNECTIONS,
+    max_keepalive=settings.LLM_MAX_KEEPALIVE,
+    keepalive_seconds=settings.LLM_KEEPALIVE_SECONDS,
+    connect_timeout=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+    timeout_seconds=settings.LLM_TIMEOUT_SECONDS,
+    pool_timeout=settings.LLM_POOL_TIMEOUT_SECONDS,
+)
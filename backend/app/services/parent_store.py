@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.services.chunking import Parent
+
+logger = logging.getLogger("parent_store")
+
+
+class ParentStore:
+    """
+    Parent-Section Docstore (local SQLite).
+    Parent/child retrieval embeds small children only; the parent sections they were cut from
+    are looked up here by ID when the prompt is assembled. Parents are content-addressed and
+    reference-counted per document (like deduplicated points), so a section shared by several
+    documents is stored once and removed with the last of them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Lazy: the file is only created once parent/child indexing or retrieval happens
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parents ("
+                "id TEXT PRIMARY KEY, text TEXT NOT NULL, tokens INTEGER NOT NULL, "
+                "page INTEGER, page_end INTEGER, section TEXT NOT NULL DEFAULT '')"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS parent_refs ("
+                "parent_id TEXT NOT NULL, document_id TEXT NOT NULL, user_id TEXT, "
+                "PRIMARY KEY (parent_id, document_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parent_refs_document ON parent_refs(document_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parent_refs_user ON parent_refs(user_id)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def put(self, parents: List[Parent], document_id: str, user_id: Optional[str] = None):
+        if not parents:
+            return
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO parents (id, text, tokens, page, page_end, section) VALUES (?, ?, ?, ?, ?, ?)",
+                [(p.id, p.text, p.tokens, p.page, p.page_end, p.section) for p in parents]
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO parent_refs (parent_id, document_id, user_id) VALUES (?, ?, ?)",
+                [(p.id, document_id, user_id) for p in parents]
+            )
+            self.conn.commit()
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Parent]:
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, text, tokens, page, page_end, section FROM parents WHERE id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+        return {row[0]: Parent(*row) for row in rows}
+
+    def delete_document(self, document_id: str) -> int:
+        return self._delete_refs("document_id", document_id)
+
+    def delete_user(self, user_id: str) -> int:
+        return self._delete_refs("user_id", user_id)
+
+    def _delete_refs(self, column: str, value: str) -> int:
+        """Drop the references; parents no other document references go with them."""
+        with self._lock:
+            ids = [row[0] for row in self.conn.execute(
+                f"SELECT DISTINCT parent_id FROM parent_refs WHERE {column} = ?", (value,)
+            )]
+            self.conn.execute(f"DELETE FROM parent_refs WHERE {column} = ?", (value,))
+            self.conn.executemany(
+                "DELETE FROM parents WHERE id = ? AND NOT EXISTS (SELECT 1 FROM parent_refs WHERE parent_id = ?)",
+                [(pid, pid) for pid in ids]
+            )
+            self.conn.commit()
+        return len(ids)
+
+    # --- Async wrappers (SQLite calls run off the event loop) ---
+    async def aput(self, parents: List[Parent], document_id: str, user_id: Optional[str] = None):
+        if parents:
+            await asyncio.to_thread(self.put, parents, document_id, user_id)
+
+    async def aget_many(self, ids: Iterable[str]) -> Dict[str, Parent]:
+        return await asyncio.to_thread(self.get_many, list(ids))
+
+    async def adelete_document(self, document_id: str) -> int:
+        return await asyncio.to_thread(self.delete_document, document_id)
+
+    async def adelete_user(self, user_id: str) -> int:
+        return await asyncio.to_thread(self.delete_user, user_id)
+
+
+parent_store = ParentStore(path=settings.PARENT_STORE_PATH)
@@ -1,26 +1,81 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import os
+import uuid
 import json
+import time
+import asyncio
 import logging
+from itertools import islice
+from collections import defaultdict
 from pathlib import Path
 from datetime import datetime
+from dataclasses import dataclass
 
 # Langchain Imports
 from langchain_core.documents import Document as LangchainDocument
 from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from openai import AsyncOpenAI
 
 # Qdrant Imports
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from langchain_qdrant import QdrantVectorStore
+from langchain_qdrant import QdrantVectorStore, RetrievalMode
 
 from app.core.config import settings
-from app.services.document_service import ProcessedDocument
+from app.services.document_service import ProcessedDocument, PAGES_CACHE_KIND
+from app.services.embedding_cache import CachedEmbeddings, build_embedding_cache, truncate_embedding
+from app.services.reranker_service import reranker_service
+from app.services.llm_clients import llm_clients
+from app.services.sparse_encoder import sparse_encoder, SPARSE_VECTOR_NAME
+from app.services.collection_profile import CollectionProfile
+from app.services.extraction_cache import extraction_cache
+from app.services.chunking import splitter, Chunk, Parent
+from app.services.parent_store import parent_store
+from app.services.chunk_dedup import (
+    chunk_content_hash, chunk_point_id, dedup_namespace, simhash, simhash_bands,
+    hamming_distance, NEAR_DUPLICATE_DISTANCE, source_document_id
+)
 
 logger = logging.getLogger("rag_service")
 
+# Payload fields used by server-side filters/deletes (keyword indexes keep filtering inside HNSW traversal)
+INDEXED_PAYLOAD_FIELDS = [
+    "metadata.scope", "metadata.user_id", "metadata.source",
+    "metadata.sources", "metadata.simhash_bands",  # Ingest-time dedup
+    "metadata.document_ids",  # Per-document deletes (documents.id)
+]
+
+# A point's provenance: (source, document_id) pairs, stored as the parallel lists
+# `metadata.sources` / `metadata.document_ids` (deduplicated chunks have several)
+Reference = Tuple[str, Optional[str]]
+
+# Full-dimension vector used to rescore first-stage (truncated) hits
+FULL_VECTOR_NAME = "full"
+RESCORE_OVERSAMPLING = 4
+
+# Chunks embedded + upserted per request during ingest
+EMBED_BATCH_SIZE = 64
+
+# Reciprocal Rank Fusion constant (standard value from the RRF paper)
+RRF_K = 60
+
+@dataclass
+class CollectionSchema:
+    """Vector layout of one collection (detected from its config at load time)."""
+    dense_vector_name: str = ""  # Unnamed (legacy) or "dense" when a rescoring vector exists
+    rescore_enabled: bool = False
+    hybrid_enabled: bool = False
+
+
+@dataclass
+class IndexResult:
+    """Outcome of indexing chunks: new points vs chunks merged into existing points (dedup)."""
+    created: int = 0
+    merged: int = 0
+
+    @property
+    def chunks(self) -> int:
+        return self.created + self.merged
+
 class RAGService:
     """
     Enterprise RAG Service (Retrieval Augmented Generation)
@@ -31,25 +86,39 @@ class RAGService:
         self.embeddings = None
         self.vectorstore: Optional[QdrantVectorStore] = None
         self.qdrant_client: Optional[QdrantClient] = None
+        self.schema = CollectionSchema()
+        self.collection_profile = CollectionProfile.from_settings()
+
+        # Embedding Schema (Matryoshka): first-stage dims + optional full-dims rescoring vector
+        self.embedding_dimensions = settings.EMBEDDING_DIMENSIONS
+        self.rescore_dimensions = settings.EMBEDDING_RESCORE_DIMENSIONS
+        request_dimensions = self.rescore_dimensions or self.embedding_dimensions
         
         try:
-            self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-large",
-                openai_api_key=settings.OPENAI_API_KEY
+            # Query embeddings go through a two-tier cache (LRU + optional Redis/Disk)
+            self.embeddings = CachedEmbeddings(
+                base=OpenAIEmbeddings(
+                    model=settings.EMBEDDING_MODEL,
+                    dimensions=request_dimensions,
+                    openai_api_key=settings.OPENAI_API_KEY,
+                    http_async_client=llm_clients.http_client
+                ),
+                model_name=f"{settings.EMBEDDING_MODEL}@{request_dimensions}",
+                cache=build_embedding_cache()
             )
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI Embeddings: {e}")
             self.embeddings = None
             
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=400,
-            separators=["\n\n## ", "\n\n# ", "\n\n", "\n", " ", ""]
-        )
-        
         if self.embeddings:
             self._init_qdrant()
 
+    def embedding_cache_stats(self) -> Dict[str, Any]:
+        """Hit/Miss counters of the query-embedding cache."""
+        if not self.embeddings:
+            return {}
+        return self.embeddings.stats()
+
     def _init_qdrant(self):
         """Initialize Qdrant Connection (Local or Server)"""
         try:
@@ -76,114 +145,782 @@ class RAGService:
                         timeout=300, # FIX: Increased timeout
                     )
             
+            if self.qdrant_client.collection_exists(settings.QDRANT_COLLECTION_NAME):
+                self._ensure_payload_indexes()
+
             # Create VectorStore Wrapper
-            self.vectorstore = QdrantVectorStore(
-                client=self.qdrant_client,
-                collection_name=settings.QDRANT_COLLECTION_NAME,
-                embedding=self.embeddings,
-            )
+            self.vectorstore = self._build_vectorstore()
             logger.info("✅ Qdrant Brain Connected successfully.")
             
         except Exception as e:
             logger.error(f"❌ Failed to connect to Qdrant: {e}")
             self.vectorstore = None
 
+    def schema_metadata(self) -> Dict[str, Any]:
+        """Embedding schema stored in the collection metadata."""
+        return {
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "embedding_dimensions": self.embedding_dimensions,
+            "rescore_dimensions": self.rescore_dimensions,
+        }
+
+    @property
+    def hybrid_enabled(self) -> bool:
+        return self.schema.hybrid_enabled
+
+    @property
+    def rescore_enabled(self) -> bool:
+        return self.schema.rescore_enabled
+
+    @property
+    def dense_vector_name(self) -> str:
+        return self.schema.dense_vector_name
+
+    def _load_schema(self, collection_name: str) -> CollectionSchema:
+        """
+        Startup Check: the collection must have been built with the configured
+        embedding model/dimensions (otherwise queries would fail or be meaningless).
+        Also detects hybrid (sparse) and rescoring support.
+        """
+        config = self.qdrant_client.get_collection(collection_name).config
+        stored = config.metadata or {}
+        expected = self.schema_metadata()
+
+        if stored:
+            mismatched = {k: (stored.get(k), v) for k, v in expected.items() if stored.get(k) != v}
+            if mismatched:
+                raise ValueError(
+                    f"Collection '{collection_name}' embedding schema mismatch (stored, configured): {mismatched}. "
+                    f"Run scripts/migrate_embedding_dimensions.py or fix EMBEDDING_* settings."
+                )
+
+        schema = CollectionSchema()
+        vectors = config.params.vectors
+        if isinstance(vectors, dict):
+            schema.rescore_enabled = FULL_VECTOR_NAME in vectors
+            schema.dense_vector_name = "dense" if "dense" in vectors else ""
+            dense_size = vectors[schema.dense_vector_name].size
+        else:
+            dense_size = vectors.size
+
+        # Legacy collections (no metadata): at least the dimension must match
+        if dense_size != self.embedding_dimensions:
+            raise ValueError(
+                f"Collection '{collection_name}' has {dense_size}-dim vectors but EMBEDDING_DIMENSIONS={self.embedding_dimensions}."
+            )
+        if self.rescore_dimensions and not schema.rescore_enabled:
+            logger.warning("⚠️ EMBEDDING_RESCORE_DIMENSIONS set but collection has no full-dimension vector. Rescoring disabled.")
+        if not stored:
+            logger.warning(f"⚠️ Collection '{collection_name}' has no schema metadata (legacy). Assuming {settings.EMBEDDING_MODEL}.")
+
+        sparse_config = config.params.sparse_vectors or {}
+        schema.hybrid_enabled = settings.HYBRID_SEARCH_ENABLED and SPARSE_VECTOR_NAME in sparse_config
+        if settings.HYBRID_SEARCH_ENABLED and not schema.hybrid_enabled:
+            logger.warning("⚠️ Collection has no sparse vectors (legacy schema). Using dense-only retrieval.")
+        return schema
+
+    def _build_vectorstore(self) -> QdrantVectorStore:
+        """
+        VectorStore Wrapper for the collection.
+        Hybrid (dense + sparse) when the collection has a sparse vector; legacy
+        dense-only collections keep working until they are re-synced.
+        """
+        self.schema = self._load_schema(settings.QDRANT_COLLECTION_NAME)
+
+        # Schema is validated above (no dummy embedding call at startup)
+        if self.hybrid_enabled:
+            return QdrantVectorStore(
+                client=self.qdrant_client,
+                collection_name=settings.QDRANT_COLLECTION_NAME,
+                embedding=self.embeddings,
+                vector_name=self.dense_vector_name,
+                sparse_embedding=sparse_encoder,
+                sparse_vector_name=SPARSE_VECTOR_NAME,
+                retrieval_mode=RetrievalMode.HYBRID,
+                validate_collection_config=False,
+            )
+        return QdrantVectorStore(
+            client=self.qdrant_client,
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            embedding=self.embeddings,
+            vector_name=self.dense_vector_name,
+            validate_collection_config=False,
+        )
+
+    def _create_collection(self, collection_name: Optional[str] = None):
+        """(Re)create the collection with its vector config, schema metadata and payload indexes."""
+        collection_name = collection_name or self._serving_collection()
+
+        # Quantization / on-disk / HNSW come from the configured profile
+        profile = self.collection_profile
+        if self.rescore_dimensions:
+            vectors_config = {
+                "dense": profile.vector_params(size=self.embedding_dimensions),
+                # Rescoring only: kept on disk, never indexed (m=0)
+                FULL_VECTOR_NAME: models.VectorParams(
+                    size=self.rescore_dimensions,
+                    distance=models.Distance.COSINE,
+                    on_disk=True,
+                    hnsw_config=models.HnswConfigDiff(m=0)
+                ),
+            }
+        else:
+            vectors_config = profile.vector_params(size=self.embedding_dimensions)
+
+        self.qdrant_client.recreate_collection(
+            collection_name=collection_name,
+            vectors_config=vectors_config,
+            # BM25-style sparse vector; IDF is computed server-side
+            sparse_vectors_config={
+                SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)
+            },
+            hnsw_config=profile.hnsw_config(),
+            quantization_config=profile.quantization_config(),
+            metadata=self.schema_metadata()
+        )
+        self._ensure_payload_indexes(collection_name)
+
+    def _ensure_payload_indexes(self, collection_name: Optional[str] = None):
+        """Create keyword payload indexes for access-control fields (idempotent)."""
+        collection_name = collection_name or self._serving_collection()
+        for field in INDEXED_PAYLOAD_FIELDS:
+            try:
+                self.qdrant_client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.KEYWORD
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Payload index '{field}' not created: {e}")
+
     def reset_index(self):
         """
-        DANGEROUS: Wipes the entire Knowledge Base.
-        Used for fresh re-syncs.
+        DANGEROUS: Wipes the entire Knowledge Base (the collection currently served).
+        Prefer a blue/green rebuild (create_generation + swap_alias) for re-syncs.
         """
         if not self.qdrant_client:
             return
-            
+
+        collection_name = self._serving_collection()
         try:
-            logger.warning("🗑️ WIPING QDRANT INDEX...")
-            self.qdrant_client.delete_collection(settings.QDRANT_COLLECTION_NAME)
+            logger.warning(f"🗑️ WIPING QDRANT INDEX '{collection_name}'...")
+            self.qdrant_client.delete_collection(collection_name)
             logger.info("✅ Collection deleted.")
             
             # FORCE RE-CREATE immediately to avoid 404s
             logger.info("🆕 Re-creating empty collection...")
-            self.qdrant_client.recreate_collection(
-                collection_name=settings.QDRANT_COLLECTION_NAME,
-                vectors_config=models.VectorParams(
-                    size=3072, 
-                    distance=models.Distance.COSINE
-                )
-            )
+            self._create_collection(collection_name)
+            self.vectorstore = self._build_vectorstore()
             logger.info("✅ Collection re-created and ready.")
              
         except Exception as e:
             logger.warning(f"Reset index error: {e}")
             # Try to create anyway if delete failed (maybe it didn't exist)
             try:
-                self.qdrant_client.recreate_collection(
-                    collection_name=settings.QDRANT_COLLECTION_NAME,
-                    vectors_config=models.VectorParams(
-                        size=3072, 
-                        distance=models.Distance.COSINE
-                    )
-                )
+                self._create_collection(collection_name)
+                self.vectorstore = self._build_vectorstore()
             except Exception as create_error:
                 logger.error(f"Failed to force create collection: {create_error}")
 
-    async def ingest_document(self, doc: ProcessedDocument):
-        """Wrapper for single document ingestion"""
-        await self.add_documents([doc])
+    # --- Blue/Green Generations ---
+    # QDRANT_COLLECTION_NAME is an ALIAS pointing at a versioned collection
+    # ("<alias>_v<timestamp>"). Rebuilds go into a new generation; the alias is
+    # swapped atomically once it validates, so chat never sees an empty index.
 
-    async def add_documents(self, docs: List[ProcessedDocument]):
-        """Index new documents into the Vector Store"""
-        if not docs:
+    def _alias_target(self) -> Optional[str]:
+        """Collection the serving alias points to (None if there is no alias yet)."""
+        for alias in self.qdrant_client.get_aliases().aliases:
+            if alias.alias_name == settings.QDRANT_COLLECTION_NAME:
+                return alias.collection_name
+        return None
+
+    def _serving_collection(self) -> str:
+        """Real collection behind QDRANT_COLLECTION_NAME (legacy deployments: the name itself)."""
+        return self._alias_target() or settings.QDRANT_COLLECTION_NAME
+
+    def list_generations(self) -> List[str]:
+        """Versioned collections of this index, oldest first."""
+        prefix = f"{settings.QDRANT_COLLECTION_NAME}_v"
+        names = [c.name for c in self.qdrant_client.get_collections().collections]
+        return sorted(n for n in names if n.startswith(prefix))
+
+    def create_generation(self) -> str:
+        """Create an empty collection for a rebuild. Serving is untouched until swap_alias()."""
+        name = f"{settings.QDRANT_COLLECTION_NAME}_v{datetime.utcnow():%Y%m%d%H%M%S}"
+        self._create_collection(name)
+        logger.info(f"🆕 Created index generation '{name}'")
+        return name
+
+    async def validate_generation(self, collection_name: str, min_points: int = 1, smoke_query: Optional[str] = None) -> bool:
+        """Gate before swapping: enough points and (optionally) a smoke query that returns hits."""
+        count = self.qdrant_client.count(collection_name=collection_name, exact=True).count
+        if count < min_points:
+            logger.error(f"❌ Generation '{collection_name}' has {count} points (expected >= {min_points})")
+            return False
+
+        if smoke_query:
+            schema = self._load_schema(collection_name)
+            vector = await self.embeddings.aembed_query(smoke_query)
+            if len(vector) > self.embedding_dimensions:
+                # Query embeddings carry the rescoring dims; the indexed vector is truncated
+                vector = truncate_embedding(vector, self.embedding_dimensions)
+            hits = await asyncio.to_thread(
+                self.qdrant_client.query_points,
+                collection_name=collection_name,
+                query=vector,
+                using=schema.dense_vector_name or None,
+                limit=3,
+            )
+            if not hits.points:
+                logger.error(f"❌ Smoke query returned no hits on '{collection_name}'")
+                return False
+
+        logger.info(f"✅ Generation '{collection_name}' validated ({count} points)")
+        return True
+
+    def swap_alias(self, collection_name: str):
+        """Atomically point the serving alias at `collection_name` and follow it."""
+        self._load_schema(collection_name)  # Never serve a generation with the wrong embedding schema
+
+        operations = []
+        legacy = None
+        if self._alias_target():
+            operations.append(models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=settings.QDRANT_COLLECTION_NAME)
+            ))
+        elif self.qdrant_client.collection_exists(settings.QDRANT_COLLECTION_NAME):
+            # One-time cutover: a legacy real collection owns the alias name. It is kept as the
+            # oldest generation (so rollback() can return to it) before the name is freed.
+            legacy = self._migrate_legacy_collection()
+            logger.warning(f"⚠️ Dropping legacy collection '{settings.QDRANT_COLLECTION_NAME}' (kept as '{legacy}')")
+            self.qdrant_client.delete_collection(settings.QDRANT_COLLECTION_NAME)
+
+        operations.append(self._create_alias_operation(collection_name))
+        try:
+            self.qdrant_client.update_collection_aliases(change_aliases_operations=operations)
+        except Exception as e:
+            # Alias changes are applied atomically: on failure the previous alias is still in place.
+            # After a cutover the name is free, so serve the legacy copy rather than nothing.
+            logger.error(f"❌ Alias '{settings.QDRANT_COLLECTION_NAME}' -> '{collection_name}' failed: {e}")
+            if legacy:
+                self.qdrant_client.update_collection_aliases(
+                    change_aliases_operations=[self._create_alias_operation(legacy)]
+                )
+                self.vectorstore = self._build_vectorstore()
+                logger.warning(f"⚠️ Alias '{settings.QDRANT_COLLECTION_NAME}' -> '{legacy}' (legacy copy)")
+            raise
+        self.vectorstore = self._build_vectorstore()
+        logger.info(f"🔀 Alias '{settings.QDRANT_COLLECTION_NAME}' -> '{collection_name}'")
+
+    @staticmethod
+    def _create_alias_operation(collection_name: str) -> models.CreateAliasOperation:
+        return models.CreateAliasOperation(
+            create_alias=models.CreateAlias(
+                collection_name=collection_name,
+                alias_name=settings.QDRANT_COLLECTION_NAME
+            )
+        )
+
+    def _migrate_legacy_collection(self, batch_size: int = 256) -> str:
+        """
+        Copy the legacy real collection (same vector config, payloads, vectors and schema metadata)
+        into a generation that sorts before every timestamped one. Verified by point count.
+        """
+        source = settings.QDRANT_COLLECTION_NAME
+        target = f"{source}_v{0:014d}"
+        if self.qdrant_client.collection_exists(target):
+            self.qdrant_client.delete_collection(target)  # Leftover of an interrupted cutover
+
+        config = self.qdrant_client.get_collection(source).config
+        self.qdrant_client.create_collection(
+            collection_name=target,
+            vectors_config=config.params.vectors,
+            sparse_vectors_config=config.params.sparse_vectors,
+            metadata=config.metadata,
+        )
+        self._ensure_payload_indexes(target)
+
+        offset = None
+        while True:
+            records, offset = self.qdrant_client.scroll(
+                collection_name=source,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if records:
+                self.qdrant_client.upsert(
+                    collection_name=target,
+                    points=[models.PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records],
+                )
+            if offset is None:
+                break
+
+        expected = self.qdrant_client.count(collection_name=source, exact=True).count
+        copied = self.qdrant_client.count(collection_name=target, exact=True).count
+        if copied != expected:
+            raise RuntimeError(f"Legacy collection copy incomplete ({copied}/{expected} points), '{source}' kept")
+        logger.info(f"📦 Legacy collection '{source}' copied to generation '{target}' ({copied} points)")
+        return target
+
+    def rollback(self) -> Optional[str]:
+        """Point the alias back at the previous generation. Returns its name (None if there is none)."""
+        current = self._alias_target()
+        previous = [g for g in self.list_generations() if current is None or g < current]
+        if not previous:
+            logger.warning("⚠️ No previous generation to roll back to.")
+            return None
+        self.swap_alias(previous[-1])
+        return previous[-1]
+
+    def gc_generations(self, keep: Optional[int] = None) -> List[str]:
+        """Delete all but the newest `keep` generations (the live one is never deleted)."""
+        keep = settings.QDRANT_KEEP_GENERATIONS if keep is None else keep
+        current = self._alias_target()
+        generations = self.list_generations()
+        stale = [g for g in generations[:max(0, len(generations) - keep)] if g != current]
+        for name in stale:
+            self.qdrant_client.delete_collection(name)
+            logger.info(f"🗑️ Garbage-collected generation '{name}'")
+        return stale
+
+    async def delete_by_source(self, source: str):
+        """Remove one source file (e.g. s3://bucket/documents/x.pdf) from the index."""
+        await self._delete_references("sources", "source", source)
+        await parent_store.adelete_document(source_document_id(source))
+        logger.info(f"🗑️ Removed vectors for {source}")
+
+    async def delete_by_document(self, document_id: str):
+        """Remove all points of one uploaded document (documents.id)."""
+        await self._delete_references("document_ids", "document_id", document_id)
+        await parent_store.adelete_document(document_id)
+        logger.info(f"🗑️ Removed vectors for document {document_id}")
+
+    async def delete_by_user(self, user_id: str) -> None:
+        """
+        Account removal: drop every private point of a user in one filtered delete.
+        Private chunks are only ever deduplicated within the same user (see dedup_namespace),
+        so no other user's document references these points.
+        """
+        if not self.vectorstore:
             return
+        await asyncio.to_thread(
+            self.qdrant_client.delete,
+            collection_name=self.vectorstore.collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="metadata.scope", match=models.MatchValue(value="private")),
+                models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id)),
+            ]))
+        )
+        await parent_store.adelete_user(user_id)
+        logger.info(f"🗑️ Removed all private vectors of user {user_id}")
+
+    async def _delete_references(self, list_field: str, primary_field: str, value: str):
+        """
+        Deduplicated chunks shared with other documents only lose the matching
+        (source, document_id) references; everything else goes in one filtered delete.
+        """
+        if not self.vectorstore:
+            return
+        collection_name = self.vectorstore.collection_name
+        position = 0 if list_field == "sources" else 1
+        contains = models.FieldCondition(key=f"metadata.{list_field}", match=models.MatchValue(value=value))
+
+        # 1. Shared points: drop the references (and re-point the primary source / document)
+        offset = None
+        while True:
+            shared, offset = await asyncio.to_thread(
+                self.qdrant_client.scroll,
+                collection_name=collection_name,
+                scroll_filter=models.Filter(must=[
+                    contains,
+                    models.FieldCondition(key=f"metadata.{list_field}", values_count=models.ValuesCount(gt=1)),
+                ]),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+            )
+            remaining = {
+                point.id: [ref for ref in self._point_references(point) if ref[position] != value]
+                for point in shared
+            }
+            # Points referenced only by this value (e.g. several pages of one document) fall through to step 2
+            await self._set_references(collection_name, {pid: refs for pid, refs in remaining.items() if refs})
+            if offset is None:
+                break
+
+        # 2. Everything only this value references (legacy points: primary field only)
+        await asyncio.to_thread(
+            self.qdrant_client.delete,
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(
+                filter=models.Filter(should=[
+                    contains,
+                    models.FieldCondition(key=f"metadata.{primary_field}", match=models.MatchValue(value=value)),
+                ])
+            )
+        )
 
-        langchain_docs = [
-            LangchainDocument(
-                page_content=doc.content,
-                metadata={
-                    "filename": doc.filename,
-                    "type": doc.doc_type,
-                    "source": f"s3://{settings.S3_BUCKET_NAME}/documents/{doc.filename}", 
-                    **doc.metadata
-                }
-            ) for doc in docs
+    async def _set_references(self, collection_name: str, references_by_point: Dict[Any, List[Reference]]):
+        """Rewrite `metadata.sources` / `metadata.document_ids` (+ primary fields) of existing points in one request."""
+        if not references_by_point:
+            return
+        operations = [
+            models.SetPayloadOperation(set_payload=models.SetPayload(
+                payload=self._reference_payload(references),
+                points=[point_id],
+                key="metadata",
+            ))
+            for point_id, references in references_by_point.items()
         ]
+        await asyncio.to_thread(
+            self.qdrant_client.batch_update_points,
+            collection_name=collection_name,
+            update_operations=operations,
+        )
+
+    async def ingest_document(self, doc: ProcessedDocument, collection_name: Optional[str] = None) -> IndexResult:
+        """Wrapper for single document ingestion"""
+        return await self.add_documents([doc], collection_name=collection_name)
+
+    async def add_documents(self, docs: List[ProcessedDocument], collection_name: Optional[str] = None) -> IndexResult:
+        """
+        Index new documents into the Vector Store. Returns the points created / chunks merged.
+        `collection_name` targets a specific generation (blue/green rebuild) instead of the alias.
+        """
+        if not docs:
+            return IndexResult()
+        return await self.add_chunks(await self.split_documents(docs), collection_name=collection_name)
 
-        chunks = self.text_splitter.split_documents(langchain_docs)
+    async def split_documents(self, docs: List[ProcessedDocument]) -> List[LangchainDocument]:
+        """Documents -> chunks carrying filename/type/source (+ page/section/parent) metadata."""
+        chunks = []
+        for doc in docs:
+            metadata = {
+                "filename": doc.filename,
+                "type": doc.doc_type,
+                "source": f"s3://{settings.S3_BUCKET_NAME}/documents/{doc.filename}", 
+                **doc.metadata
+            }
+            doc_chunks, parents = self._split_text(doc.content, doc.content_hash)
+            await self._store_parents(parents, metadata)
+            chunks.extend(self._to_documents(doc_chunks, metadata))
         logger.info(f"Split {len(docs)} docs into {len(chunks)} chunks")
+        return chunks
+
+    @staticmethod
+    def _to_documents(chunks: List[Chunk], metadata: Dict[str, Any]) -> List[LangchainDocument]:
+        return [LangchainDocument(page_content=c.text, metadata={**metadata, **c.metadata()}) for c in chunks]
+
+    @staticmethod
+    async def _store_parents(parents: List[Parent], metadata: Dict[str, Any]):
+        """Parent sections go to the parent store, referenced by the chunk's document (see delete_by_document)."""
+        if not parents:
+            return
+        document_id = metadata.get("document_id") or source_document_id(metadata["source"])
+        user_id = metadata.get("user_id") if metadata.get("scope") == "private" else None
+        await parent_store.aput(parents, document_id, user_id)
+
+    @staticmethod
+    def _from_cache(items) -> Tuple[List[Chunk], List[Parent]]:
+        """Cached entry lines: chunk dicts, each batch preceded by its parents ({"parent": {...}})."""
+        chunks, parents = [], []
+        for item in items:
+            if "parent" in item:
+                parents.append(Parent(**item["parent"]))
+            else:
+                chunks.append(Chunk(**item))
+        return chunks, parents
+
+    @staticmethod
+    def _write_cache(writer, chunks: List[Chunk], parents: List[Parent]):
+        for parent in parents:
+            writer.write({"parent": parent.to_dict()})
+        for chunk in chunks:
+            writer.write(chunk.to_dict())
 
-        if self.vectorstore:
-            self.vectorstore.add_documents(chunks)
-        elif self.qdrant_client:
-            # Lazy Init: Manually Create Collection & Init VectorStore
-            logger.info("🆕 Creating new Qdrant Collection...")
+    def _split_text(self, text: str, content_hash: Optional[str] = None) -> Tuple[List[Chunk], List[Parent]]:
+        """Split one document, reusing cached chunk boundaries for already seen bytes."""
+        cached = extraction_cache.iter_entry(content_hash, splitter.cache_kind)
+        if cached is not None:
+            return self._from_cache(cached)
+        stream = splitter.stream()
+        chunks = stream.feed(text) + stream.flush()
+        parents = stream.pop_parents()
+        # Only chunk boundaries of a completely extracted document are reusable
+        writer = extraction_cache.writer(content_hash, splitter.cache_kind)
+        if writer and extraction_cache.contains(content_hash, PAGES_CACHE_KIND):
+            self._write_cache(writer, chunks, parents)
+            writer.commit()
+        elif writer:
+            writer.discard()
+        return chunks, parents
+
+    async def iter_chunks(
+        self,
+        pages: AsyncIterator[str],
+        metadata: Dict[str, Any],
+        batch_size: int = EMBED_BATCH_SIZE,
+        content_hash: Optional[str] = None
+    ) -> AsyncIterator[List[LangchainDocument]]:
+        """
+        Streaming splitter: pages in, batches of chunks out.
+        Only the chunk being built is held, so memory does not grow with the document.
+        Cached chunks (same content hash) are replayed without consuming `pages` at all.
+        Parent sections (parent/child mode) are stored before their children are yielded.
+        """
+        cached = extraction_cache.iter_entry(content_hash, splitter.cache_kind)
+        if cached is not None:
+            while True:
+                lines = await asyncio.to_thread(lambda: list(islice(cached, batch_size)))
+                if not lines:
+                    return
+                batch, parents = self._from_cache(lines)
+                await self._store_parents(parents, metadata)
+                if batch:
+                    yield self._to_documents(batch, metadata)
+
+        writer = extraction_cache.writer(content_hash, splitter.cache_kind)
+        try:
+            async for batch, parents in self._split_stream(pages, batch_size):
+                await self._store_parents(parents, metadata)
+                if writer:
+                    self._write_cache(writer, batch, parents)
+                yield self._to_documents(batch, metadata)
+        except BaseException:
+            if writer:
+                writer.discard()
+            raise
+        if writer:
+            # Only chunk boundaries of a completely extracted document are reusable
+            writer.commit() if extraction_cache.contains(content_hash, PAGES_CACHE_KIND) else writer.discard()
+
+    @staticmethod
+    async def _split_stream(
+        pages: AsyncIterator[str], batch_size: int
+    ) -> AsyncIterator[Tuple[List[Chunk], List[Parent]]]:
+        """Batches of chunks, each with the parents first referenced by it."""
+        stream = splitter.stream()
+        batch: List[Chunk] = []
+        async for page in pages:
+            batch.extend(stream.feed(page))
+            while len(batch) >= batch_size:
+                yield batch[:batch_size], stream.pop_parents()
+                batch = batch[batch_size:]
+
+        batch.extend(stream.flush())
+        for start in range(0, len(batch), batch_size):
+            yield batch[start:start + batch_size], stream.pop_parents()
+
+    async def add_chunks(self, chunks: List[LangchainDocument], collection_name: Optional[str] = None) -> IndexResult:
+        """
+        Embed + upsert pre-split chunks (possibly from many files in one batch).
+        Duplicates are merged into existing points, so `created` can be less than len(chunks).
+        """
+        if not chunks:
+            return IndexResult()
+
+        if collection_name and self.qdrant_client:
+            result = await self._upsert_chunks(chunks, collection_name)
+            logger.info(f"✅ Indexed {len(chunks)} chunks to '{collection_name}' ({result.created} new points)")
+            return result
+
+        if not self.vectorstore and self.qdrant_client:
+            # Lazy Init: Create the first generation + alias (only if missing) & Init VectorStore
             try:
-                # Text-Embedding-3-Large dim is 3072
-                self.qdrant_client.recreate_collection(
-                    collection_name=settings.QDRANT_COLLECTION_NAME,
-                    vectors_config=models.VectorParams(
-                        size=3072, 
-                        distance=models.Distance.COSINE
-                    )
-                )
+                if not self.qdrant_client.collection_exists(settings.QDRANT_COLLECTION_NAME):
+                    logger.info("🆕 Creating new Qdrant Collection...")
+                    self.swap_alias(self.create_generation())
+                self.vectorstore = self._build_vectorstore()
             except Exception as e:
-                logger.warning(f"⚠️ Collection creation warning: {e}")
+                logger.error(f"❌ Cannot index: {e}")
+                return IndexResult()
 
-            # Now Init Store
-            self.vectorstore = QdrantVectorStore(
-                client=self.qdrant_client,
-                collection_name=settings.QDRANT_COLLECTION_NAME,
-                embedding=self.embeddings
-            )
-            self.vectorstore.add_documents(chunks)
-        else:
+        if not self.vectorstore:
             logger.error("❌ Cannot index: No Qdrant Client available.")
-            return
+            return IndexResult()
+
+        result = await self._upsert_chunks(chunks)
 
-        logger.info(f"✅ Indexed {len(chunks)} chunks to Qdrant")
+        logger.info(f"✅ Indexed {len(chunks)} chunks to Qdrant ({result.created} new points)")
+        return result
+
+    def _point_vectors(self, text: str, vector: List[float], schema: Optional[CollectionSchema] = None) -> Dict[str, Any]:
+        """All vectors of one point: first-stage dense, optional full-dims rescoring, optional sparse."""
+        schema = schema or self.schema
+        vectors: Dict[str, Any] = {
+            schema.dense_vector_name: truncate_embedding(vector, self.embedding_dimensions)
+            if len(vector) > self.embedding_dimensions else vector
+        }
+        if schema.rescore_enabled:
+            vectors[FULL_VECTOR_NAME] = vector
+        if schema.hybrid_enabled:
+            sparse = sparse_encoder.encode_document(text)
+            vectors[SPARSE_VECTOR_NAME] = models.SparseVector(indices=sparse.indices, values=sparse.values)
+        return vectors
+
+    async def _upsert_chunks(self, chunks: List[LangchainDocument], collection_name: Optional[str] = None) -> IndexResult:
+        """
+        Embed chunks in batches and upsert them with all configured vectors.
+        Ingest-time dedup: exact and near-duplicate chunks are not embedded again; the
+        existing point gains a (source, document) reference instead. Returns new / merged counts.
+        """
+        # A build target (e.g. a new generation) may have a different layout than the serving collection
+        schema = self._load_schema(collection_name) if collection_name else self.schema
+        collection_name = collection_name or self.vectorstore.collection_name
+        created = 0
+        for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+            batch = chunks[start:start + EMBED_BATCH_SIZE]
+            new_points, merged_references = await self._dedup_batch(batch, collection_name)
+            await self._set_references(collection_name, merged_references)
+            if not new_points:
+                continue
+
+            vectors = await self.embeddings.aembed_documents([c.page_content for c in new_points.values()])
+            points = [
+                models.PointStruct(
+                    id=point_id,
+                    vector=self._point_vectors(chunk.page_content, vector, schema),
+                    payload={"page_content": chunk.page_content, "metadata": chunk.metadata}
+                )
+                for (point_id, chunk), vector in zip(new_points.items(), vectors)
+            ]
+            # Run the (sync) Qdrant client off the Event Loop
+            await asyncio.to_thread(self.qdrant_client.upsert, collection_name=collection_name, points=points)
+            created += len(points)
+
+        if created < len(chunks):
+            logger.info(f"♻️ Dedup: {len(chunks) - created}/{len(chunks)} chunks merged into existing points")
+        return IndexResult(created=created, merged=len(chunks) - created)
+
+    async def _dedup_batch(self, batch: List[LangchainDocument], collection_name: str):
+        """
+        Split a batch into new points (content-addressed ID -> chunk) and the references
+        of existing points that absorb exact / near-duplicate chunks.
+        """
+        new_points: Dict[str, LangchainDocument] = {}
+        references: Dict[str, List[Reference]] = {}
+        fingerprints: Dict[str, int] = {}
+        namespaces: Dict[str, str] = {}
+        for chunk in batch:
+            meta = chunk.metadata
+            namespace = dedup_namespace(meta)
+            point_id = chunk_point_id(namespace, chunk_content_hash(chunk.page_content))
+            reference = (meta.get("source"), meta.get("document_id"))
+            if point_id in new_points:
+                # Exact duplicate inside the batch
+                self._add_references(references[point_id], [reference])
+                continue
+            fingerprint = simhash(chunk.page_content)
+            meta["simhash"] = f"{fingerprint:016x}"
+            meta["simhash_bands"] = simhash_bands(fingerprint)
+            new_points[point_id] = chunk
+            references[point_id] = [reference]
+            fingerprints[point_id] = fingerprint
+            namespaces[point_id] = namespace
+
+        merged: Dict[Any, List[Reference]] = {}
+
+        def absorb(target_id, target_references: List[Reference], point_id: str):
+            self._add_references(merged.setdefault(target_id, list(target_references)), references.pop(point_id))
+            new_points.pop(point_id)
+
+        # 1. Exact duplicates already stored (same content-addressed ID)
+        existing = await asyncio.to_thread(
+            self.qdrant_client.retrieve,
+            collection_name=collection_name,
+            ids=list(new_points),
+            with_payload=True,
+        )
+        for point in existing:
+            absorb(point.id, self._point_references(point), str(point.id))
+
+        # 2. Near duplicates: candidates share a SimHash band, confirmed by Hamming distance
+        by_namespace: Dict[str, List[str]] = defaultdict(list)
+        for point_id in new_points:
+            by_namespace[namespaces[point_id]].append(point_id)
+
+        for namespace, point_ids in by_namespace.items():
+            bands = sorted({band for pid in point_ids for band in new_points[pid].metadata["simhash_bands"]})
+            band_filter = self._namespace_filter(
+                namespace, models.FieldCondition(key="metadata.simhash_bands", match=models.MatchAny(any=bands))
+            )
+            # Every candidate sharing a band is checked (paged), not just the first page
+            stored = []
+            offset = None
+            while True:
+                candidates, offset = await asyncio.to_thread(
+                    self.qdrant_client.scroll,
+                    collection_name=collection_name,
+                    scroll_filter=band_filter,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                )
+                stored.extend((c, int(c.payload["metadata"]["simhash"], 16)) for c in candidates
+                              if (c.payload or {}).get("metadata", {}).get("simhash"))
+                if offset is None:
+                    break
+            accepted: List[str] = []
+            for point_id in point_ids:
+                fingerprint = fingerprints[point_id]
+                match = next((c for c, fp in stored if hamming_distance(fp, fingerprint) <= NEAR_DUPLICATE_DISTANCE), None)
+                if match is not None:
+                    absorb(match.id, self._point_references(match), point_id)
+                    continue
+                # Near duplicates inside the batch collapse onto the first occurrence
+                twin = next((a for a in accepted if hamming_distance(fingerprints[a], fingerprint) <= NEAR_DUPLICATE_DISTANCE), None)
+                if twin is not None:
+                    self._add_references(references[twin], references.pop(point_id))
+                    new_points.pop(point_id)
+                    continue
+                accepted.append(point_id)
+
+        for point_id, chunk in new_points.items():
+            chunk.metadata.update(self._reference_payload(references[point_id]))
+        return new_points, merged
+
+    @staticmethod
+    def _add_references(target: List[Reference], references: List[Reference]):
+        for reference in references:
+            if reference not in target:
+                target.append(reference)
+
+    @staticmethod
+    def _reference_payload(references: List[Reference]) -> Dict[str, Any]:
+        return {
+            "sources": [source for source, _ in references],
+            "document_ids": [document_id for _, document_id in references],
+            "source": references[0][0],
+            "document_id": references[0][1],
+        }
+
+    @staticmethod
+    def _point_references(point) -> List[Reference]:
+        meta = (point.payload or {}).get("metadata", {}) or {}
+        sources = list(meta.get("sources") or [meta.get("source")])
+        # Points indexed before document tracking have no document IDs
+        document_ids = list(meta.get("document_ids") or [meta.get("document_id")] * len(sources))
+        return list(zip(sources, document_ids))
+
+    @staticmethod
+    def _namespace_filter(namespace: str, condition: models.FieldCondition) -> models.Filter:
+        """Restrict a dedup lookup to points of the same visibility (see dedup_namespace)."""
+        private = models.FieldCondition(key="metadata.scope", match=models.MatchValue(value="private"))
+        if namespace == "shared":
+            return models.Filter(must=[condition], must_not=[private])
+        user_id = namespace.split(":", 1)[1]
+        return models.Filter(must=[
+            condition,
+            private,
+            models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=user_id)),
+        ])
 
     async def generate_queries(self, original_query: str) -> List[str]:
         """Generate variations of the query to improve retrieval coverage."""
         try:
-            client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            client = llm_clients.openai
             
             prompt = f"""You are an AI language model assistant. Your task is to generate 3 different versions of the given user question to retrieve relevant documents from a vector database. By generating multiple perspectives, your goal is to help the user overcome some of the limitations of distance-based similarity search. 
             Provide these alternative questions separated by newlines.
@@ -207,94 +944,220 @@ class RAGService:
             logger.error(f"Multi-query generation failed: {e}")
             return [original_query]
 
-    async def search(self, query: str, top_k: int = 10, user_id: str = None) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _access_filter(user_id: Optional[str] = None) -> models.Filter:
         """
-        Ultimate RAG Search with PRIVACY FILTERING:
-        1. Access Control: Checks 'scope' and 'user_id' metadata.
-        2. Multi-Query Generation
-        3. Fusion & Ranking
+        Access Rule as a Qdrant Filter:
+        - scope in (public, system), or scope missing (legacy points default to public)
+        - scope == private AND user_id matches the caller
+        """
+        conditions = [
+            models.FieldCondition(
+                key="metadata.scope",
+                match=models.MatchAny(any=["public", "system"])
+            ),
+            models.IsEmptyCondition(is_empty=models.PayloadField(key="metadata.scope")),
+        ]
+        if user_id:
+            conditions.append(models.Filter(must=[
+                models.FieldCondition(key="metadata.scope", match=models.MatchValue(value="private")),
+                models.FieldCondition(key="metadata.user_id", match=models.MatchValue(value=str(user_id))),
+            ]))
+        return models.Filter(should=conditions)
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        user_id: str = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Single-query search (see search_many)."""
+        return await self.search_many([query], top_k=top_k, user_id=user_id, timings=timings)
+
+    async def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        user_id: str = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ultimate RAG Search with PRIVACY FILTERING (Batched):
+        1. Access Control: Checks 'scope' and 'user_id' metadata (server-side filter).
+        2. Batched Retrieval: ONE embeddings call + ONE Qdrant query_batch_points for all queries.
+        3. Fusion & Ranking: Reciprocal Rank Fusion across the query variants.
+        4. Reranking: ONCE, against the first (original) query.
+        If `timings` is given, per-stage latency (ms) is written into it.
+        """
+        queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        if not queries:
+            return []
+        ranked_lists = await self.retrieve(queries, top_k=top_k, user_id=user_id, timings=timings)
+        return await self.rank(queries[0], ranked_lists, top_k=top_k, timings=timings)
+
+    async def retrieve(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        user_id: str = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[List[LangchainDocument]]:
+        """
+        Stages 1-2 of search_many: one ranked candidate list per query.
+        Exposed separately so callers can retrieve query variants as soon as each is known
+        (e.g. the original query while its translation is still being generated).
         """
         if not self.vectorstore:
             logger.warning("Search attempted on empty index")
             return []
-
-        # 1. OPTIMIZATION: Use Direct Query for Instant Speed
-        queries = [query]
-        
-        # 2. Parallel Retrieval (Broad Fetch)
+        queries = [q for q in queries if q and q.strip()]
+        if not queries:
+            return []
+        # Broad Fetch
         fetch_k = max(20, top_k * 2)
-        all_results = []
+        return await self._retrieve(queries, fetch_k, user_id, timings)
+
+    async def rank(
+        self,
+        query: str,
+        ranked_lists: List[List[LangchainDocument]],
+        top_k: int = 10,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Stages 3-4 of search_many: fuse the candidate lists, rerank ONCE against `query`."""
+        # 3. Fusion
+        fused_results = self._fuse(ranked_lists)
         
-        # DEFINE FILTER FUNCTION
-        # FAISS (Langchain) supports a callable filter in newer versions, or we filter post-fetch.
-        # But post-fetch is inefficient if k is small. 
-        # For this codebase, we use post-fetch filtering if FAISS doesn't support complex SQL-like filters natively.
-        # Assuming we can filter via simple dict or callable.
-        # SAFE APPROACH: Fetch more (fetch_k*2), then filter in Python to ensure perfect privacy.
+        # 4. Rerank Stage (Cross-Encoder by default, LLM judge optional)
+        # Rerank the top candidates to ensure high precision
+        candidates = fused_results[:max(top_k, settings.RERANK_CANDIDATES)]
         
-        for q in queries:
-            # Use ASYNC search to prevent blocking the Event Loop
-            sub_results = await self.vectorstore.asimilarity_search_with_score(q, k=fetch_k * 2) 
+        # If we have very few results, skip the check
+        if len(candidates) < 2:
+            return candidates
             
-            for doc, score in sub_results:
-                metadata = doc.metadata
-                scope = metadata.get("scope", "public") # Default to public if missing
-                doc_user_id = metadata.get("user_id")
-                
-                # ACCESS CONTROL LOGIC
-                is_accessible = False
-                if scope == "public" or scope == "system":
-                    is_accessible = True
-                elif scope == "private" and user_id and doc_user_id == user_id:
-                    is_accessible = True
-                    
-                if is_accessible:
-                    all_results.append((doc, score))
+        final_verified = await reranker_service.rerank(query, candidates, timings=timings)
+        
+        # Return top_k from the verified list
+        return final_verified[:top_k]
 
-            
-        # 3. Deduplication & Fusion
+    def _dense_query(self, vector: List[float], access_filter: models.Filter, limit: int) -> Dict[str, Any]:
+        """
+        Dense search as QueryRequest/Prefetch arguments.
+        First stage runs on the (truncated) indexed vector; with rescoring enabled,
+        an oversampled candidate set is re-ranked by the full-dimension vector.
+        """
+        first_stage = {
+            "query": truncate_embedding(vector, self.embedding_dimensions)
+            if len(vector) > self.embedding_dimensions else vector,
+            "using": self.dense_vector_name or None,
+            "filter": access_filter,
+            # Quantization rescoring / hnsw_ef from the collection profile
+            "params": self.collection_profile.search_params(),
+        }
+        if not self.rescore_enabled:
+            return {**first_stage, "limit": limit}
+        return {
+            "prefetch": models.Prefetch(**first_stage, limit=limit * RESCORE_OVERSAMPLING),
+            "query": vector,
+            "using": FULL_VECTOR_NAME,
+            "filter": access_filter,
+            "limit": limit,
+        }
+
+    @staticmethod
+    def _sparse_query(query: str) -> models.SparseVector:
+        sparse = sparse_encoder.encode_query(query)
+        return models.SparseVector(indices=sparse.indices, values=sparse.values)
+
+    async def _retrieve(
+        self,
+        queries: List[str],
+        fetch_k: int,
+        user_id: Optional[str],
+        timings: Optional[Dict[str, float]]
+    ) -> List[List[LangchainDocument]]:
+        """Embed all queries together and run them as one Qdrant batch request."""
+        # ACCESS CONTROL: Compiled into a Qdrant Filter (evaluated server-side during HNSW traversal)
+        access_filter = self._access_filter(user_id)
+
+        # Query vectors come from the embedding cache (one batched call for misses)
+        stage_start = time.perf_counter()
+        query_vectors = await self.embeddings.aembed_queries(queries)
+        embed_ms = (time.perf_counter() - stage_start) * 1000
+
+        if self.hybrid_enabled:
+            # Dense + Sparse candidates fused server-side (RRF) in the same request
+            requests = [
+                models.QueryRequest(
+                    prefetch=[
+                        models.Prefetch(**self._dense_query(vector, access_filter, fetch_k)),
+                        models.Prefetch(
+                            query=self._sparse_query(q),
+                            using=SPARSE_VECTOR_NAME,
+                            filter=access_filter,
+                            limit=fetch_k
+                        ),
+                    ],
+                    query=models.FusionQuery(fusion=models.Fusion.RRF),
+                    filter=access_filter,
+                    limit=fetch_k,
+                    with_payload=True
+                )
+                for q, vector in zip(queries, query_vectors)
+            ]
+        else:
+            requests = [
+                models.QueryRequest(**self._dense_query(vector, access_filter, fetch_k), with_payload=True)
+                for vector in query_vectors
+            ]
+
+        # Run the (sync) Qdrant client off the Event Loop
+        stage_start = time.perf_counter()
+        responses = await asyncio.to_thread(
+            self.qdrant_client.query_batch_points,
+            collection_name=self.vectorstore.collection_name,
+            requests=requests
+        )
+
+        if timings is not None:
+            timings["embed_ms"] = round(embed_ms, 1)
+            timings["retrieve_ms"] = round((time.perf_counter() - stage_start) * 1000, 1)
+
+        return [
+            [
+                LangchainDocument(
+                    id=str(point.id),
+                    page_content=(point.payload or {}).get("page_content", ""),
+                    metadata=(point.payload or {}).get("metadata", {}) or {}
+                )
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
+    def _fuse(self, ranked_lists: List[List[LangchainDocument]]) -> List[Dict[str, Any]]:
+        """Reciprocal Rank Fusion across query variants (duplicates are merged at ingest)."""
         unique_docs = {}
-        for doc, score in all_results:
-            # Use content hash or just content as key
-            key = doc.page_content.strip()
-            if key not in unique_docs:
-                unique_docs[key] = {
-                    "doc": doc,
-                    "max_score": score, # Keep best score (closest distance)
-                    "count": 1
-                }
-            else:
-                unique_docs[key]["count"] += 1
-                unique_docs[key]["max_score"] = min(unique_docs[key]["max_score"], score)
+        for ranked in ranked_lists:
+            for rank, doc in enumerate(ranked):
+                key = doc.id
+                rrf = 1.0 / (RRF_K + rank + 1)
+                if key not in unique_docs:
+                    unique_docs[key] = {"doc": doc, "rrf": rrf}
+                else:
+                    unique_docs[key]["rrf"] += rrf
+
+        # Normalize so a doc ranked first by every query scores 1.0
+        rrf_max = len(ranked_lists) / (RRF_K + 1)
                 
         # Convert back to list for ranking
         fused_results = []
         
-        # Key terms structure boost
-        priority_terms = ["pillar", "society", "economy", "nation", "law", "article", "vision 2030", "scheme", "initiative", "program"]
-        
         for key, item in unique_docs.items():
             doc = item["doc"]
-            raw_score = item["max_score"] # This is L2 distance (lower is better)
-            count = item["count"]
-            
-            # Base similarity (1/1+distance)
-            similarity = 1.0 / (1.0 + raw_score)
-            
-            # Fusion Boost: If multiple queries found it, it's more likely relevant
-            fusion_boost = (count - 1) * 0.05
-            
-            # Keyword Boost
-            keyword_boost = 0.0
-            content_lower = doc.page_content.lower()
-            query_lower = query.lower()
-            
-            if "pillar" in query_lower or "what is" in query_lower or "vision" in query_lower:
-                for term in priority_terms:
-                    if term in content_lower:
-                        keyword_boost += 0.05
-            
-            final_score = similarity + fusion_boost + keyword_boost
+            final_score = item["rrf"] / rrf_max
             
             # Format Source to be Explicitly S3
             source = doc.metadata.get("source", doc.metadata.get("filename", "Unknown"))
@@ -307,81 +1170,67 @@ class RAGService:
                 "content": doc.page_content,
                 "metadata": doc.metadata,
                 "score": float(final_score),
-                "source": source
+                "source": source,
+                # A source can appear once per document that references the point
+                "sources": list(dict.fromkeys(doc.metadata.get("sources") or [source]))
             })
             
-        # 4. Final Sort
+        # Final Sort
         fused_results.sort(key=lambda x: x["score"], reverse=True)
-        
-        # 5. LLM Cross-Check (The "Judge")
-        # Rerank the top candidates (Matching top_k request) to ensure high precision
-        # For "Big Context", we check enough candidates to fill the quota
-        candidates = fused_results[:(top_k + 10)]
-        
-        # If we have very few results, skip the expensive check
-        if len(candidates) < 2:
-            return candidates
-            
-        final_verified = await self._llm_rerank(query, candidates)
-        
-        # Return top_k from the verified list
-        return final_verified[:top_k]
+        return fused_results
 
-    async def _llm_rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def expand_context(self, hits: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Uses the LLM to act as a Cross-Encoder Judge.
-        Evaluates if the document ACTUALLY answers the query.
+        Small-to-big context assembly (parent/child retrieval), best hits first:
+        1. Hits cut from the same parent section become one passage; adjacent children are merged.
+        2. Passages are admitted while they fit `max_tokens` (default RAG_CONTEXT_TOKENS).
+        3. Left-over budget expands admitted passages to their full parent section.
+        Hits without a parent (flat chunks, legacy points) stay single passages.
+        Returns search-style dicts (content / source / sources / metadata / score) plus `tokens` and `chunks` (hits merged).
         """
-        try:
-            client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            # Prepare batch for evaluation
-            # We'll ask for a JSON list of indices that are relevant
-            doc_context = "\n".join([f"[{i}] {d['content'][:300]}..." for i, d in enumerate(docs)])
-            
-            prompt = f"""You are a relevance judge. Given the User Query and a list of Document Snippets, perform a strict quality check.
-            User Query: {query}
-            
-            Documents:
-            {doc_context}
-            
-            Return a JSON output of the indices (0-{len(docs)-1}) that are HIGHLY RELEVANT to the query.
-            Example: [0, 2]
-            If none are relevant, return [].
-            Return ONLY the valid JSON list."""
-            
-            response = await client.chat.completions.create(
-                model="gpt-5-nano",
-                messages=[{"role": "system", "content": "You are a precise relevance filter."},
-                          {"role": "user", "content": prompt}],
-                temperature=0,
-                response_format={"type": "json_object"}
-            )
-            
-            content = response.choices[0].message.content
-            valid_indices = json.loads(content).get("indices", [])
-            
-            # Handle case where LLM returns raw list instead of object with key
-            if isinstance(json.loads(content), list):
-                 valid_indices = json.loads(content)
-            
-            # Construct verified list, keeping original scores but boosting verified ones massively
-            verified_results = []
-            for i, doc in enumerate(docs):
-                if i in valid_indices:
-                    doc["score"] += 1.0 # Massive boost for LLM-verified relevance
-                    verified_results.append(doc)
+        budget = max_tokens or settings.RAG_CONTEXT_TOKENS
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for i, hit in enumerate(hits):
+            groups.setdefault(hit["metadata"].get("parent_id") or f"hit:{i}", []).append(hit)
+        parents = await parent_store.aget_many(key for key in groups if not key.startswith("hit:"))
+
+        passages = []
+        for key, group in groups.items():
+            # Children of one parent in document order; consecutive positions form one run
+            runs: List[List[Dict[str, Any]]] = []
+            for hit in sorted(group, key=lambda h: h["metadata"].get("position", 0)):
+                position = hit["metadata"].get("position", 0)
+                if runs and position == runs[-1][-1]["metadata"].get("position", 0) + 1:
+                    runs[-1].append(hit)
                 else:
-                    # Keep them but push them down, or discard? 
-                    # For "Best of All Time", we keep them but penalized, just in case.
-                    doc["score"] *= 0.5
-                    verified_results.append(doc)
-            
-            verified_results.sort(key=lambda x: x["score"], reverse=True)
-            return verified_results
-            
-        except Exception as e:
-            logger.error(f"LLM Rerank failed: {e}")
-            return docs # Fallback to original ranking
+                    runs.append([hit])
+            content = "\n[...]\n".join("\n".join(h["content"] for h in run) for run in runs)
+            passages.append({
+                **group[0],
+                "content": content,
+                "sources": list(dict.fromkeys(src for h in group for src in (h.get("sources") or [h.get("source")]))),
+                "tokens": splitter.count(content),
+                "chunks": len(group),
+                "parent": parents.get(key),
+            })
+
+        selected = []
+        for passage in passages:
+            if passage["tokens"] <= budget:
+                selected.append(passage)
+                budget -= passage["tokens"]
+
+        for passage in selected:
+            parent = passage.pop("parent")
+            if parent and passage["tokens"] < parent.tokens and parent.tokens - passage["tokens"] <= budget:
+                budget -= parent.tokens - passage["tokens"]
+                passage["content"] = parent.text
+                passage["tokens"] = parent.tokens
+
+        logger.info(
+            f"🧩 Context: {len(hits)} hits -> {len(selected)} passages, "
+            f"{sum(p['tokens'] for p in selected)} tokens"
+        )
+        return selected
 
 rag_service = RAGService()
@@ -0,0 +1,199 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+
+from app.core.config import settings
+from app.services.llm_clients import llm_clients
+
+logger = logging.getLogger("reranker_service")
+
+
+class BaseReranker(ABC):
+    """Reranker Interface: reorders (and may drop) retrieval candidates for a query."""
+
+    name = "base"
+
+    @abstractmethod
+    async def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+
+class CrossEncoderReranker(BaseReranker):
+    """
+    Local CPU Cross-Encoder (sentence-transformers).
+    Default model is multilingual (mMARCO) so Arabic queries and passages score correctly.
+    Scoring runs batched in a worker thread to keep the Event Loop free.
+    """
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str, batch_size: int = 16, max_length: int = 512, use_onnx: bool = False):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.use_onnx = use_onnx
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model once (thread-safe). Raises ImportError if sentence-transformers is missing."""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                kwargs = {"device": "cpu", "max_length": self.max_length}
+                if self.use_onnx:
+                    kwargs["backend"] = "onnx"
+                started = time.perf_counter()
+                self._model = CrossEncoder(self.model_name, **kwargs)
+                logger.info(f"✅ Cross-Encoder '{self.model_name}' loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return self._model
+
+    def _score(self, query: str, docs: List[Dict[str, Any]]) -> List[float]:
+        model = self.load()
+        pairs = [(query, d["content"]) for d in docs]
+        scores = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return [float(s) for s in scores]
+
+    async def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        scores = await asyncio.to_thread(self._score, query, docs)
+
+        for doc, score in zip(docs, scores):
+            doc["rerank_score"] = score
+            doc["score"] = score
+        ranked = sorted(docs, key=lambda x: x["score"], reverse=True)
+
+        # Cutoff: drop candidates the cross-encoder considers irrelevant. If nothing passes,
+        # keep the best few rather than answering from no context at all.
+        verified_results = [d for d in ranked if d["score"] >= settings.RERANK_MIN_SCORE]
+        if not verified_results and ranked:
+            logger.info(f"⚠️ No candidate above RERANK_MIN_SCORE, keeping the top {settings.RERANK_FALLBACK_TOP_N}")
+            verified_results = ranked[:settings.RERANK_FALLBACK_TOP_N]
+        return verified_results
+
+
+class LLMJudgeReranker(BaseReranker):
+    """
+    Uses the LLM to act as a Cross-Encoder Judge.
+    Evaluates if the document ACTUALLY answers the query (one network round-trip per call).
+    """
+
+    name = "llm"
+
+    def __init__(self, model: str = "gpt-5-nano"):
+        self.model = model
+
+    async def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        client = llm_clients.openai
+
+        # Prepare batch for evaluation
+        # We'll ask for a JSON list of indices that are relevant
+        doc_context = "\n".join([f"[{i}] {d['content'][:300]}..." for i, d in enumerate(docs)])
+
+        prompt = f"""You are a relevance judge. Given the User Query and a list of Document Snippets, perform a strict quality check.
+            User Query: {query}
+
+            Documents:
+            {doc_context}
+
+            Return a JSON output of the indices (0-{len(docs)-1}) that are HIGHLY RELEVANT to the query.
+            Example: [0, 2]
+            If none are relevant, return [].
+            Return ONLY the valid JSON list."""
+
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": "You are a precise relevance filter."},
+                      {"role": "user", "content": prompt}],
+            temperature=0,
+            response_format={"type": "json_object"}
+        )
+
+        parsed = json.loads(response.choices[0].message.content)
+        # Handle case where LLM returns raw list instead of object with key
+        valid_indices = parsed if isinstance(parsed, list) else parsed.get("indices", [])
+
+        # Construct verified list, keeping original scores but boosting verified ones massively
+        verified_results = []
+        for i, doc in enumerate(docs):
+            if i in valid_indices:
+                doc["score"] += 1.0  # Massive boost for LLM-verified relevance
+            else:
+                # Keep them but push them down, just in case.
+                doc["score"] *= 0.5
+            verified_results.append(doc)
+
+        verified_results.sort(key=lambda x: x["score"], reverse=True)
+        return verified_results
+
+
+class NoopReranker(BaseReranker):
+    """Keeps the retrieval order (fastest, lowest precision)."""
+
+    name = "none"
+
+    async def rerank(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return docs
+
+
+class RerankerService:
+    """
+    Pluggable Reranking Stage.
+    Backend is chosen via settings.RERANKER_BACKEND ('cross_encoder', 'llm' or 'none').
+    Falls back to the LLM judge if the cross-encoder cannot be loaded, and to the
+    original order if reranking fails. Stage latency is logged and reported.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = self._build(backend or settings.RERANKER_BACKEND)
+        self.last_latency_ms: float = 0.0
+
+    @staticmethod
+    def _build(backend: str) -> BaseReranker:
+        if backend == "cross_encoder":
+            return CrossEncoderReranker(
+                model_name=settings.RERANKER_MODEL,
+                batch_size=settings.RERANKER_BATCH_SIZE,
+                use_onnx=settings.RERANKER_USE_ONNX
+            )
+        if backend == "llm":
+            return LLMJudgeReranker()
+        if backend != "none":
+            logger.warning(f"⚠️ Unknown reranker backend '{backend}', reranking disabled.")
+        return NoopReranker()
+
+    @property
+    def name(self) -> str:
+        return self.backend.name
+
+    async def rerank(
+        self,
+        query: str,
+        docs: List[Dict[str, Any]],
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            results = await self.backend.rerank(query, docs)
+        except ImportError as e:
+            logger.error(f"Cross-Encoder unavailable ({e}). Falling back to LLM judge.")
+            self.backend = LLMJudgeReranker()
+            return await self.rerank(query, docs, timings)
+        except Exception as e:
+            logger.error(f"Rerank ({self.name}) failed: {e}")
+            results = docs  # Fallback to original ranking
+
+        self.last_latency_ms = (time.perf_counter() - started) * 1000
+        if timings is not None:
+            timings["rerank_ms"] = round(self.last_latency_ms, 1)
+        logger.info(f"⚖️ Rerank [{self.name}] {len(docs)} candidates in {self.last_latency_ms:.0f} ms")
+        return results
+
+
+reranker_service = RerankerService()
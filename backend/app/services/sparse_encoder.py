@@ -0,0 +1,108 @@
+import re
+import zlib
+import unicodedata
+from collections import Counter
+from typing import List, Dict
+
+from langchain_qdrant import SparseEmbeddings, SparseVector
+
+# Name of the sparse vector inside the Qdrant collection
+SPARSE_VECTOR_NAME = "sparse"
+
+# Arabic Normalization Tables
+_ARABIC_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")  # Tashkeel + Tatweel
+_ARABIC_FOLDING = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",  # Alef variants
+    "ى": "ي", "ی": "ي",                        # Alef maqsura / Farsi yeh -> Yaa
+    "ة": "ه",                                  # Taa marbuta -> Haa
+    "ؤ": "و", "ئ": "ي",                        # Hamza carriers
+})
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+# Light stemming: definite article + attached conjunction/preposition prefixes
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[./-][0-9]+)*", re.UNICODE)  # Keeps "12/3", "2030", "1.2"
+
+_STOPWORDS = {
+    # English
+    "the", "a", "an", "of", "and", "or", "in", "on", "to", "for", "is", "are", "was", "be", "by",
+    "with", "as", "at", "it", "this", "that", "what", "which", "how", "from", "its", "their",
+    # Arabic (post-normalization forms)
+    "في", "من", "علي", "الي", "عن", "ان", "او", "ما", "هذا", "هذه", "التي", "الذي", "مع", "كل", "هو", "هي",
+}
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Arabic-aware normalization used at ingest AND query time:
+    diacritics/tatweel removal, alef/yaa/taa-marbuta folding, Arabic-Indic digits -> ASCII.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _ARABIC_DIACRITICS.sub("", text)
+    return text.translate(_ARABIC_FOLDING).translate(_DIGITS).casefold()
+
+
+def _stem(token: str) -> str:
+    for prefix in _ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text: str, keep_stopwords: bool = False) -> List[str]:
+    """Normalized, lightly stemmed tokens (stopwords removed unless `keep_stopwords`)."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(normalize_arabic(text)):
+        # Stopwords are checked before stemming too ("التي" -> "تي" would slip through)
+        if not keep_stopwords and token in _STOPWORDS:
+            continue
+        token = _stem(token)
+        if token and (keep_stopwords or token not in _STOPWORDS):
+            tokens.append(token)
+    return tokens
+
+
+def _token_id(token: str) -> int:
+    # Stable across processes/restarts (unlike hash()), fits Qdrant's uint32 indices
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class ArabicBM25Encoder(SparseEmbeddings):
+    """
+    BM25-style Sparse Encoder (hashing trick, no vocabulary to persist).
+    Documents carry the BM25 term-frequency saturation; IDF is applied by Qdrant
+    (`Modifier.IDF` on the sparse vector), so it stays correct as the corpus grows.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 150.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+
+    @staticmethod
+    def _to_sparse(weights: Dict[int, float]) -> SparseVector:
+        indices = sorted(weights)
+        return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+    def encode_document(self, text: str) -> SparseVector:
+        tokens = tokenize(text)
+        doc_len = len(tokens) or 1
+        norm = self.k1 * (1 - self.b + self.b * doc_len / self.avg_doc_len)
+        weights: Dict[int, float] = {}
+        for token, tf in Counter(tokens).items():
+            index = _token_id(token)
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+        return self._to_sparse(weights)
+
+    def encode_query(self, text: str) -> SparseVector:
+        return self._to_sparse({_token_id(token): 1.0 for token in set(tokenize(text))})
+
+    def embed_documents(self, texts: List[str]) -> List[SparseVector]:
+        return [self.encode_document(t) for t in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        return self.encode_query(text)
+
+
+sparse_encoder = ArabicBM25Encoder()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import mimetypes
+import threading
+from functools import partial
+from pathlib import Path
+from typing import Optional, Tuple, Iterator, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+
+from app.core.config import settings
+
+logger = logging.getLogger("storage_service")
+
+MB = 1024 * 1024
+
+
+class StorageService:
+    """
+    Pooled S3 Storage.
+    One thread-safe boto3 client (with a connection pool) is shared by the whole process;
+    its blocking calls run in a bounded executor so they never block the event loop.
+    Large files go through boto3's managed transfer (multipart, parts sent in parallel)
+    straight from disk, so the body is never held in memory.
+    S3_ENDPOINT_URL points the client at a local stand-in (MinIO, moto server).
+    """
+
+    def __init__(self, bucket: str, max_connections: int, multipart_threshold_mb: int, multipart_chunk_mb: int):
+        self.bucket = bucket
+        self.max_connections = max_connections
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold_mb * MB,
+            multipart_chunksize=multipart_chunk_mb * MB,
+            max_concurrency=max(1, max_connections // 2),
+            use_threads=True,
+        )
+        self._client = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Uploads need a bucket + credentials; without them originals stay local (dev mode)."""
+        return bool(self.bucket and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY)
+
+    @property
+    def client(self):
+        # Lazy: built once, on first use (boto3 clients are thread-safe, sessions are not)
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = boto3.session.Session().client(
+                        's3',
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                        region_name=settings.AWS_REGION,
+                        endpoint_url=settings.S3_ENDPOINT_URL,
+                        config=BotoConfig(
+                            max_pool_connections=self.max_connections,
+                            retries={"max_attempts": 5, "mode": "adaptive"},
+                        ),
+                    )
+        return self._client
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="s3")
+        return self._executor
+
+    async def _run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def url(self, key: str, bucket: Optional[str] = None) -> str:
+        return f"s3://{bucket or self.bucket}/{key}"
+
+    @staticmethod
+    def parse_url(url: str) -> Tuple[str, str]:
+        """s3://bucket/key -> (bucket, key)"""
+        bucket, key = url[len("s3://"):].split("/", 1)
+        return bucket, key
+
+    @staticmethod
+    def upload_key(document_id: str, filename: str) -> str:
+        """Uploaded originals live under uploads/ (never under documents/, which the public S3 sync indexes)."""
+        return f"uploads/{document_id}/{Path(filename).name}"
+
+    @staticmethod
+    def _extra_args(filename: str) -> Dict[str, Any]:
+        content_type = mimetypes.guess_type(filename)[0]
+        if filename.lower().endswith('.docx'):
+            content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        return {"ContentType": content_type or 'application/octet-stream'}
+
+    async def upload_file(self, path: str, key: str) -> str:
+        """Upload a local file (multipart above the threshold). Returns the s3:// URL."""
+        await self._run(
+            self.client.upload_file, str(path), self.bucket, key,
+            ExtraArgs=self._extra_args(key), Config=self.transfer_config,
+        )
+        logger.info(f"☁️ Stored {self.url(key)}")
+        return self.url(key)
+
+    async def download(self, url: str) -> bytes:
+        bucket, key = self.parse_url(url)
+
+        def read() -> bytes:
+            return self.client.get_object(Bucket=bucket, Key=key)['Body'].read()
+
+        return await self._run(read)
+
+    async def open_stream(self, url: str):
+        """Streaming body of an object (blocking read(n); pass it to DocumentService.spool)."""
+        bucket, key = self.parse_url(url)
+        response = await self._run(self.client.get_object, Bucket=bucket, Key=key)
+        return response['Body']
+
+    async def delete(self, url: str) -> None:
+        """Delete an object (s3:// URLs only; failures are logged, not raised)."""
+        if not url.startswith("s3://"):
+            return
+        bucket, key = self.parse_url(url)
+        try:
+            await self._run(self.client.delete_object, Bucket=bucket, Key=key)
+        except Exception as e:
+            logger.error(f"❌ S3 delete failed for {url}: {e}")
+
+    def iter_pages(self, prefix: str, bucket: Optional[str] = None) -> Iterator[List[dict]]:
+        """Paginated listing (1000 keys per page); blocking, so pull pages via the executor."""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket or self.bucket, Prefix=prefix):
+            yield page.get('Contents', [])
+
+    async def next_page(self, pages: Iterator[List[dict]]) -> Optional[List[dict]]:
+        return await self._run(next, pages, None)
+
+
+storage_service = StorageService(
+    bucket=settings.S3_BUCKET_NAME,
+    max_connections=settings.S3_MAX_CONNECTIONS,
+    multipart_threshold_mb=settings.S3_MULTIPART_THRESHOLD_MB,
+    multipart_chunk_mb=settings.S3_MULTIPART_CHUNK_MB,
+)
@@ -0,0 +1,123 @@
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+from app.core.config import settings
+from app.services.cache import TieredCache
+from app.services.embedding_cache import normalize_query
+
+logger = logging.getLogger("translation_cache")
+
+# Directions of the dual-language search
+AR_TO_EN = "ar-en"
+EN_TO_AR = "en-ar"
+
+# Vision 2030 programs, giga-projects and bodies (English -> Arabic).
+# A query that is just one of these names is translated without an LLM call.
+# Full names precede acronyms: the first English spelling is used for Arabic -> English.
+VISION_2030_GLOSSARY: Dict[str, str] = {
+    "Vision 2030": "رؤية 2030",
+    "Saudi Vision 2030": "رؤية السعودية 2030",
+    "NEOM": "نيوم",
+    "The Line": "ذا لاين",
+    "Oxagon": "أوكساجون",
+    "Trojena": "تروجينا",
+    "Sindalah": "سندالة",
+    "Red Sea Global": "البحر الأحمر الدولية",
+    "Red Sea Project": "مشروع البحر الأحمر",
+    "Amaala": "أمالا",
+    "Qiddiya": "القدية",
+    "ROSHN": "روشن",
+    "Diriyah Gate": "بوابة الدرعية",
+    "AlUla": "العلا",
+    "King Salman Park": "حديقة الملك سلمان",
+    "New Murabba": "المربع الجديد",
+    "Public Investment Fund": "صندوق الاستثمارات العامة",
+    "PIF": "صندوق الاستثمارات العامة",
+    "Council of Economic and Development Affairs": "مجلس الشؤون الاقتصادية والتنمية",
+    "CEDA": "مجلس الشؤون الاقتصادية والتنمية",
+    "National Industrial Development and Logistics Program": "برنامج تطوير الصناعة الوطنية والخدمات اللوجستية",
+    "NIDLP": "برنامج تطوير الصناعة الوطنية والخدمات اللوجستية",
+    "National Transformation Program": "برنامج التحول الوطني",
+    "NTP": "برنامج التحول الوطني",
+    "Housing Program": "برنامج الإسكان",
+    "Sakani": "سكني",
+    "Quality of Life Program": "برنامج جودة الحياة",
+    "Fiscal Sustainability Program": "برنامج الاستدامة المالية",
+    "Financial Sector Development Program": "برنامج تطوير القطاع المالي",
+    "Human Capability Development Program": "برنامج تنمية القدرات البشرية",
+    "Privatization Program": "برنامج التخصيص",
+    "Pilgrim Experience Program": "برنامج خدمة ضيوف الرحمن",
+    "Health Sector Transformation Program": "برنامج تحول القطاع الصحي",
+    "Saudi Green Initiative": "مبادرة السعودية الخضراء",
+    "Middle East Green Initiative": "مبادرة الشرق الأوسط الأخضر",
+}
+
+
+class TranslationCache:
+    """
+    Query-Translation Memo (dual-language search).
+    1. Glossary: a query that is exactly a known program / project name never reaches the LLM.
+    2. Memo: LLM translations cached by (direction, normalized text) in a TieredCache,
+       persisted to Redis by default so popular queries are translated once for all workers.
+    """
+
+    def __init__(self, cache: TieredCache, glossary: Optional[Dict[str, str]] = None):
+        self.cache = cache
+        self.glossary: Dict[str, Dict[str, str]] = {EN_TO_AR: {}, AR_TO_EN: {}}
+        for english, arabic in (glossary or {}).items():
+            self.add_term(english, arabic)
+        self.glossary_hits = 0
+
+    def add_term(self, english: str, arabic: str):
+        self.glossary[EN_TO_AR][normalize_query(english)] = arabic
+        self.glossary[AR_TO_EN].setdefault(normalize_query(arabic), english)
+
+    @staticmethod
+    def _key(text: str, direction: str) -> str:
+        return f"{direction}:{hashlib.sha256(normalize_query(text).encode('utf-8')).hexdigest()}"
+
+    async def get(self, text: str, direction: str) -> Optional[str]:
+        term = self.glossary[direction].get(normalize_query(text))
+        if term is not None:
+            self.glossary_hits += 1
+            return term
+        cached = await self.cache.aget(self._key(text, direction))
+        return cached.decode("utf-8") if cached is not None else None
+
+    async def set(self, text: str, direction: str, translation: str):
+        if translation:
+            await self.cache.aset(self._key(text, direction), translation.encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"glossary_terms": len(self.glossary[EN_TO_AR]), "glossary_hits": self.glossary_hits, **self.cache.stats()}
+
+
+def load_glossary() -> Dict[str, str]:
+    """Built-in glossary, extended/overridden by TRANSLATION_GLOSSARY_PATH (JSON: {"English": "Arabic"})."""
+    if not settings.TRANSLATION_GLOSSARY_ENABLED:
+        return {}
+    glossary = dict(VISION_2030_GLOSSARY)
+    if settings.TRANSLATION_GLOSSARY_PATH:
+        try:
+            glossary.update(json.loads(Path(settings.TRANSLATION_GLOSSARY_PATH).read_text(encoding="utf-8")))
+        except Exception as e:
+            logger.warning(f"⚠️ Translation glossary not loaded from {settings.TRANSLATION_GLOSSARY_PATH}: {e}")
+    return glossary
+
+
+translation_cache = TranslationCache(
+    cache=TieredCache(
+        namespace="tr",
+        max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.TRANSLATION_CACHE_TTL_SECONDS,
+        backend=settings.TRANSLATION_CACHE_BACKEND,
+        redis_url=settings.REDIS_URL,
+        disk_path=settings.TRANSLATION_CACHE_PATH,
+        disk_max_entries=settings.TRANSLATION_CACHE_BACKEND_MAX_ENTRIES,
+        redis_max_entries=settings.TRANSLATION_CACHE_BACKEND_MAX_ENTRIES,
+    ),
+    glossary=load_glossary(),
+)
@@ -0,0 +1,154 @@
+"""
+Compares the token/structure-aware chunker with the previous character splitter
+(RecursiveCharacterTextSplitter, 1000 chars / 400 overlap) on local documents.
+
+Index size: chunks, embedded tokens, estimated vector storage.
+Recall@k:   self-supervised - a sentence is sampled from the corpus, a few of its words are
+            dropped to form the query, and a hit is a top-k chunk containing the full sentence.
+            (Needs embeddings: OPENAI_API_KEY. Use --no-recall for the size report only.)
+
+    python scripts/benchmark_chunking.py --docs ./sample_docs --queries 200 --k 5
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+# Setup path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# FIX: Force UTF-8 for Windows Console to support emojis
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.services.chunking import chunker, SENTENCE_END, PAGE_MARKER
+from app.services.document_service import document_service, SUPPORTED_EXTENSIONS
+from app.services.rag_service import rag_service
+
+LEGACY_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=1000,
+    chunk_overlap=400,
+    separators=["\n\n## ", "\n\n# ", "\n\n", "\n", " ", ""]
+)
+
+
+async def load_corpus(docs_dir: Path):
+    texts = {}
+    for path in sorted(docs_dir.rglob("*")):
+        ext = path.suffix.lower().lstrip(".")
+        if path.is_file() and ext in SUPPORTED_EXTENSIONS:
+            text = await document_service.extract_text_async(path, ext)
+            if text:
+                texts[path.name] = text
+    document_service.shutdown()
+    return texts
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def size_report(name: str, chunks, dims: int):
+    tokens = [chunker.count(c) for c in chunks]
+    total = sum(tokens)
+    p95 = sorted(tokens)[int(len(tokens) * 0.95)] if tokens else 0
+    print(f"   {name:<12}{len(chunks):>8} chunks{total:>12,} tokens   avg {statistics.mean(tokens) if tokens else 0:>6.0f}"
+          f"   p95 {p95:>5}   vectors ~{len(chunks) * dims * 4 / (1024 * 1024):>7.1f} MB")
+    return total
+
+
+def sample_queries(texts, n: int, seed: int):
+    """(query, answer sentence) pairs from sentences of 10+ words."""
+    rng = random.Random(seed)
+    sentences = [
+        normalize(s) for text in texts.values()
+        for line in text.split("\n") if not PAGE_MARKER.match(line.strip())
+        for s in SENTENCE_END.split(line) if len(s.split()) >= 10
+    ]
+    picked = rng.sample(sentences, min(n, len(sentences)))
+    queries = []
+    for sentence in picked:
+        words = sentence.split()
+        kept = [w for w in words if rng.random() > 0.3] or words
+        queries.append((" ".join(kept), sentence))
+    return queries
+
+
+async def embed(texts, batch_size: int = 64):
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(await rag_service.embeddings.aembed_documents(texts[i:i + batch_size]))
+    matrix = np.array(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+async def recall_at_k(chunks, queries, query_vectors, k: int) -> float:
+    chunk_vectors = await embed(chunks)
+    normalized = [normalize(c) for c in chunks]
+    hits = 0
+    for (_, answer), vector in zip(queries, query_vectors):
+        top = np.argsort(-(chunk_vectors @ vector))[:k]
+        hits += any(answer in normalized[i] for i in top)
+    return hits / max(len(queries), 1)
+
+
+async def main(docs_dir: Path, n_queries: int, k: int, recall: bool, seed: int):
+    print("✂️  CHUNKING BENCHMARK")
+    print("=====================")
+    texts = await load_corpus(docs_dir)
+    if not texts:
+        print(f"❌ No {'/'.join(SUPPORTED_EXTENSIONS)} files in {docs_dir}")
+        return
+    print(f"📚 {len(texts)} documents | tokenizer: {chunker.tokenizer} | "
+          f"token chunker: {chunker.chunk_tokens} tokens / {chunker.overlap_tokens} overlap")
+
+    started = time.perf_counter()
+    legacy = [c for text in texts.values() for c in LEGACY_SPLITTER.split_text(text)]
+    legacy_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    structured = [c for text in texts.values() for c in chunker.split_text(text)]
+    token_seconds = time.perf_counter() - started
+    token_chunks = [c.text for c in structured]
+
+    dims = rag_service.embedding_dimensions
+    print(f"\n📦 Index size ({dims} dims, float32):")
+    legacy_tokens = size_report("chars", legacy, dims)
+    token_total = size_report("tokens", token_chunks, dims)
+    print(f"   -> {token_total / max(legacy_tokens, 1) - 1:+.1%} embedded tokens vs chars "
+          f"| split time {legacy_seconds:.2f}s vs {token_seconds:.2f}s")
+    with_pages = sum(1 for c in structured if c.page is not None)
+    with_section = sum(1 for c in structured if c.section)
+    print(f"   Metadata: {with_pages}/{len(structured)} chunks with pages, {with_section} with a section path")
+
+    if not recall:
+        return
+    if not rag_service.embeddings:
+        print("⚠️  Embeddings unavailable (OPENAI_API_KEY) - skipping recall.")
+        return
+
+    queries = sample_queries(texts, n_queries, seed)
+    print(f"\n🎯 Recall@{k} over {len(queries)} sampled queries:")
+    query_vectors = await embed([q for q, _ in queries])
+    for name, chunks in (("chars", legacy), ("tokens", token_chunks)):
+        print(f"   {name:<12}{await recall_at_k(chunks, queries, query_vectors, k):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the token-aware chunker with the legacy character splitter")
+    parser.add_argument("--docs", type=Path, required=True, help="Directory of PDF/DOCX/TXT/MD files")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-recall", action="store_true", help="Index size only (no embedding calls)")
+    args = parser.parse_args()
+    asyncio.run(main(args.docs, args.queries, args.k, not args.no_recall, args.seed))
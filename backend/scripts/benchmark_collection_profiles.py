@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+# Setup path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# FIX: Force UTF-8 for Windows Console to support emojis
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from qdrant_client.http import models
+from app.core.config import settings
+from app.services.rag_service import rag_service
+from app.services.collection_profile import CollectionProfile
+
+# Profiles compared against the float32 baseline
+PROFILES = {
+    "float32": CollectionProfile(),
+    "float32_on_disk": CollectionProfile(on_disk=True),
+    "scalar_int8": CollectionProfile(quantization="scalar"),
+    "scalar_int8_on_disk": CollectionProfile(quantization="scalar", on_disk=True),
+    "binary_rescore": CollectionProfile(quantization="binary", on_disk=True, oversampling=3.0),
+    "binary_no_rescore": CollectionProfile(quantization="binary", on_disk=True, rescore=False),
+}
+
+
+def load_corpus(client, collection_name: str, limit: int, vector_name: str = ""):
+    """
+    Scroll dense vectors + payloads out of the live collection (no re-embedding).
+    `vector_name`: the first-stage dense vector ("" unnamed, "dense" when a rescoring vector exists).
+    """
+    points = []
+    offset = None
+    while len(points) < limit:
+        batch, offset = client.scroll(
+            collection_name=collection_name,
+            limit=min(256, limit - len(points)),
+            offset=offset,
+            with_payload=True,
+            with_vectors=[vector_name],
+        )
+        for p in batch:
+            vector = p.vector.get(vector_name) if isinstance(p.vector, dict) else p.vector
+            if vector:
+                points.append(models.PointStruct(id=p.id, vector=vector, payload=p.payload))
+        if offset is None:
+            break
+    return points
+
+
+def build_collection(client, name: str, profile: CollectionProfile, points, dim: int):
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=profile.vector_params(size=dim),
+        hnsw_config=profile.hnsw_config(),
+        quantization_config=profile.quantization_config(),
+    )
+    for i in range(0, len(points), 256):
+        client.upsert(collection_name=name, points=points[i:i + 256], wait=True)
+
+    # Wait for the optimizer to finish building HNSW / quantized segments (server mode)
+    for _ in range(600):
+        info = client.get_collection(name)
+        if info.status == models.CollectionStatus.GREEN:
+            break
+        time.sleep(1)
+
+
+def run_queries(client, name: str, queries, k: int, params=None):
+    latencies = []
+    results = []
+    for q in queries:
+        started = time.perf_counter()
+        hits = client.query_points(
+            collection_name=name, query=q, limit=k, search_params=params, with_payload=False
+        ).points
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([h.id for h in hits])
+    return latencies, results
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant collection profiles on the current corpus")
+    parser.add_argument("--limit", type=int, default=20000, help="Max points copied from the live collection")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled query vectors")
+    parser.add_argument("--k", type=int, default=10, help="Recall@k")
+    parser.add_argument("--profiles", nargs="*", default=list(PROFILES), help="Subset of profiles to run")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections")
+    args = parser.parse_args()
+
+    client = rag_service.qdrant_client
+    if not client:
+        print("❌ Qdrant is not available.")
+        return
+
+    print("📊 QDRANT COLLECTION PROFILE BENCHMARK")
+    print("======================================")
+    points = load_corpus(client, settings.QDRANT_COLLECTION_NAME, args.limit, rag_service.dense_vector_name)
+    if not points:
+        print("⚠️  Source collection is empty.")
+        return
+    dim = len(points[0].vector)
+    print(f"🧠 Corpus: {len(points)} vectors x {dim} dims from '{settings.QDRANT_COLLECTION_NAME}'")
+
+    # Query set: real stored vectors with a small perturbation (avoids trivial self-matches)
+    rng = random.Random(42)
+    queries = [
+        [x + rng.gauss(0, 0.01) for x in p.vector]
+        for p in rng.sample(points, min(args.queries, len(points)))
+    ]
+
+    # Ground truth: exact (brute-force) float32 search
+    baseline = "bench_float32_exact"
+    build_collection(client, baseline, CollectionProfile(), points, dim)
+    _, truth = run_queries(client, baseline, queries, args.k, models.SearchParams(exact=True))
+
+    print(f"\n{'profile':<22}{'est. RAM':>12}{'p50 ms':>10}{'p99 ms':>10}{'recall@' + str(args.k):>12}")
+    print("-" * 66)
+    for name in args.profiles:
+        profile = PROFILES[name]
+        collection = f"bench_{name}"
+        build_collection(client, collection, profile, points, dim)
+        latencies, results = run_queries(client, collection, queries, args.k, profile.search_params())
+
+        recall = statistics.mean(
+            len(set(found) & set(expected)) / max(1, len(expected))
+            for found, expected in zip(results, truth)
+        )
+        ram_mb = profile.estimated_ram_bytes(len(points), dim) / (1024 * 1024)
+        print(f"{name:<22}{ram_mb:>9.1f} MB{percentile(latencies, 50):>10.2f}{percentile(latencies, 99):>10.2f}{recall:>12.3f}")
+
+        if not args.keep:
+            client.delete_collection(collection)
+
+    if not args.keep:
+        client.delete_collection(baseline)
+    print("\nℹ️  RAM is estimated (resident vectors + quantized copies + HNSW links).")
+
+
+if __name__ == "__main__":
+    main()
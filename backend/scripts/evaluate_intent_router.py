@@ -0,0 +1,141 @@
+"""
+Offline evaluation of the local intent router (RAG vs chat) on a labelled query set.
+
+Reports accuracy, coverage (share decided without the LLM) and routing latency, next to the
+previous keyword rules, which sent every query they could not decide to the LLM.
+    python scripts/evaluate_intent_router.py
+    python scripts/evaluate_intent_router.py --threshold 0.8 --errors
+    python scripts/evaluate_intent_router.py --llm      # End-to-end, LLM fallback included (OPENAI_API_KEY)
+
+Query set: JSON lines {"query": "...", "label": "rag" | "chat"} (held out from the training examples).
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+# Setup path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# FIX: Force UTF-8 for Windows Console to support emojis
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from app.services.intent_router import IntentRouter
+
+DEFAULT_DATA = Path(__file__).parent / "intent_eval_queries.jsonl"
+
+
+def legacy_route(query: str):
+    """The previous AIService._needs_rag rules: True/False, or None when the LLM was called."""
+    q_lower = query.lower().strip()
+    greetings = ["hello", "hi", "salam", "hey", "good morning", "good evening", "marhaba", "welcome"]
+    if q_lower in greetings or len(q_lower) < 4:
+        return False
+    definitions = ["what is vision 2030", "who are you", "what is this", "tell me about vision 2030"]
+    if any(d in q_lower for d in definitions):
+        return False
+    keywords = ["saudi", "vision 2030", "neom", "law", "regulation", "project", "scheme", "housing", "ministry", "royal", "decree", "stats", "number", "percentage", "program", "initiative", "giga"]
+    if any(k in q_lower for k in keywords):
+        return True
+    return None
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+def load(path: Path):
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return [(row["query"], row["label"] == "rag") for row in rows]
+
+
+async def main(data: Path, threshold: float, use_llm: bool, show_errors: bool):
+    print("🧭 INTENT ROUTER EVALUATION")
+    print("===========================")
+    queries = load(data)
+    print(f"📋 {len(queries)} labelled queries ({sum(1 for _, y in queries if y)} rag / "
+          f"{sum(1 for _, y in queries if not y)} chat) from {data.name} | threshold {threshold}")
+
+    router = IntentRouter(threshold=threshold)
+    started = time.perf_counter()
+    router.model
+    print(f"🏋️  Trained in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    # 1. Previous rules
+    legacy = [legacy_route(q) for q, _ in queries]
+    decided = [(d, y) for d, (_, y) in zip(legacy, queries) if d is not None]
+    print(f"\n📏 Previous keyword rules:")
+    print(f"   Decided locally: {len(decided)}/{len(queries)} ({len(decided) / len(queries):.0%}) | "
+          f"accuracy {sum(d == y for d, y in decided) / max(len(decided), 1):.1%} | "
+          f"LLM calls {len(queries) - len(decided)}")
+
+    # 2. Local router (warm: best of 5 runs per query)
+    decisions, latencies = [], []
+    for query, _ in queries:
+        runs = []
+        for _ in range(5):
+            t = time.perf_counter()
+            decision = router.route(query)
+            runs.append((time.perf_counter() - t) * 1e6)
+        decisions.append(decision)
+        latencies.append(min(runs))
+
+    confident = [(d, y) for d, (_, y) in zip(decisions, queries) if d.confident]
+    print(f"\n⚡ Local router:")
+    print(f"   Decided locally: {len(confident)}/{len(queries)} ({len(confident) / len(queries):.0%}) | "
+          f"accuracy {sum(d.needs_rag == y for d, y in confident) / max(len(confident), 1):.1%} | "
+          f"LLM calls {len(queries) - len(confident)}")
+    print(f"   Accuracy without any LLM fallback: "
+          f"{sum(d.needs_rag == y for d, (_, y) in zip(decisions, queries)) / len(queries):.1%}")
+    by_source = {}
+    for d in decisions:
+        by_source[d.source] = by_source.get(d.source, 0) + 1
+    print(f"   Decided by: {by_source}")
+    print(f"   Latency: p50 {statistics.median(latencies):.1f} µs | p95 {percentile(latencies, 0.95):.1f} µs | "
+          f"max {max(latencies):.1f} µs")
+
+    if show_errors:
+        print("\n❌ Local mistakes (confident only):")
+        for d, (query, y) in zip(decisions, queries):
+            if d.confident and d.needs_rag != y:
+                print(f"   [{d.label} {d.confidence:.2f} {d.source}] expected {'rag' if y else 'chat'}: {query}")
+
+    # 3. End-to-end with the LLM fallback (AIService._needs_rag)
+    if use_llm:
+        from app.services.ai_service import ai_service
+        if ai_service.is_simulation:
+            print("\n⚠️  No valid OPENAI_API_KEY - skipping the LLM fallback run.")
+            return
+        ai_service.intent_router = router
+        results, e2e = [], []
+        for query, _ in queries:
+            t = time.perf_counter()
+            results.append(await ai_service._needs_rag(query))
+            e2e.append((time.perf_counter() - t) * 1000)
+        accuracy = sum(r == y for r, (_, y) in zip(results, queries)) / len(queries)
+        print(f"\n🤖 End-to-end (LLM below threshold): accuracy {accuracy:.1%} | "
+              f"latency p50 {statistics.median(e2e):.1f} ms | p95 {percentile(e2e, 0.95):.1f} ms | "
+              f"mean {statistics.mean(e2e):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the local intent router on a labelled query set")
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA)
+    parser.add_argument("--threshold", type=float, default=None, help="Default: INTENT_ROUTER_THRESHOLD")
+    parser.add_argument("--llm", action="store_true", help="Also run the LLM fallback end-to-end")
+    parser.add_argument("--errors", action="store_true", help="List confident mistakes")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    threshold = args.threshold if args.threshold is not None else settings.INTENT_ROUTER_THRESHOLD
+    asyncio.run(main(args.data, threshold, args.llm, args.errors))
@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+
+# Setup path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# FIX: Force UTF-8 for Windows Console to support emojis
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from app.core.config import settings
+from app.services.rag_service import rag_service
+
+
+def list_generations():
+    client = rag_service.qdrant_client
+    live = rag_service._alias_target()
+    print(f"📚 Generations of '{settings.QDRANT_COLLECTION_NAME}':")
+    generations = rag_service.list_generations()
+    if not generations:
+        print("   (none - legacy collection without alias)" if client.collection_exists(settings.QDRANT_COLLECTION_NAME) else "   (none)")
+    for name in generations:
+        count = client.count(collection_name=name, exact=True).count
+        marker = "🟢 LIVE" if name == live else "  "
+        print(f"   {marker:<8}{name:<40}{count:>10} points")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect / roll back / garbage-collect blue-green index generations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show generations and which one is live")
+    sub.add_parser("rollback", help="Point the alias back at the previous generation")
+    swap = sub.add_parser("swap", help="Point the alias at a specific generation")
+    swap.add_argument("collection")
+    gc = sub.add_parser("gc", help="Delete old generations")
+    gc.add_argument("--keep", type=int, default=settings.QDRANT_KEEP_GENERATIONS)
+    args = parser.parse_args()
+
+    if not rag_service.qdrant_client:
+        print("❌ Qdrant is not available.")
+        sys.exit(1)
+
+    if args.command == "list":
+        list_generations()
+    elif args.command == "rollback":
+        previous = rag_service.rollback()
+        print(f"⏪ Rolled back to '{previous}'." if previous else "⚠️  No previous generation.")
+    elif args.command == "swap":
+        rag_service.swap_alias(args.collection)
+        print(f"🔀 Alias '{settings.QDRANT_COLLECTION_NAME}' -> '{args.collection}'.")
+    elif args.command == "gc":
+        removed = rag_service.gc_generations(keep=args.keep)
+        print(f"🗑️  Removed: {', '.join(removed) if removed else 'nothing'}")
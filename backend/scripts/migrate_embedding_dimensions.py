@@ -0,0 +1,123 @@
+"""
+Migrates the knowledge base into a collection matching the CURRENT embedding settings
+(EMBEDDING_MODEL / EMBEDDING_DIMENSIONS / EMBEDDING_RESCORE_DIMENSIONS).
+
+Matryoshka shortcut: text-embedding-3-* vectors can be truncated + re-normalized, so if the
+source holds vectors of the same model with enough dimensions, NO re-embedding is needed.
+Use --reembed to force fresh embeddings (e.g. when switching models).
+
+The target is a new index generation (blue/green, see RAGService): it is validated and the
+QDRANT_COLLECTION_NAME alias is swapped to it; the previous generation stays for rollback.
+
+Example (.env: EMBEDDING_DIMENSIONS=1024, EMBEDDING_RESCORE_DIMENSIONS=3072):
+    python scripts/migrate_embedding_dimensions.py
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+# Setup path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# FIX: Force UTF-8 for Windows Console to support emojis
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from qdrant_client.http import models
+from app.core.config import settings
+from app.services.rag_service import rag_service, FULL_VECTOR_NAME
+
+
+def source_schema(client, name: str):
+    config = client.get_collection(name).config
+    vectors = config.params.vectors
+    if isinstance(vectors, dict):
+        vector_name = FULL_VECTOR_NAME if FULL_VECTOR_NAME in vectors else next(iter(vectors))
+        size = vectors[vector_name].size
+    else:
+        vector_name, size = "", vectors.size
+    model = (config.metadata or {}).get("embedding_model", "text-embedding-3-large")
+    return vector_name, size, model
+
+
+async def migrate(source: str, reembed: bool, batch_size: int, smoke_query: str):
+    client = rag_service.qdrant_client
+    vector_name, source_dims, source_model = source_schema(client, source)
+    needed_dims = rag_service.rescore_dimensions or rag_service.embedding_dimensions
+
+    if not reembed and (source_model != settings.EMBEDDING_MODEL or source_dims < needed_dims):
+        print(f"ℹ️  Source has {source_model}@{source_dims}; {settings.EMBEDDING_MODEL}@{needed_dims} needed -> re-embedding.")
+        reembed = True
+
+    # Target: a new generation; its schema follows the current settings (sparse vector + payload indexes included)
+    target = rag_service.create_generation()
+    schema = rag_service._load_schema(target)
+    print(f"🔁 MIGRATING '{source}' ({source_dims} dims) -> '{target}' "
+          f"({rag_service.embedding_dimensions} dims, rescore={rag_service.rescore_dimensions})")
+    print(f"   Mode: {'RE-EMBED' if reembed else 'TRUNCATE (no embedding cost)'}")
+
+    migrated = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=not reembed,
+        )
+        if not records:
+            break
+
+        texts = [(r.payload or {}).get("page_content", "") for r in records]
+        if reembed:
+            full_vectors = await rag_service.embeddings.aembed_documents(texts)
+        else:
+            full_vectors = [
+                (r.vector.get(vector_name) if isinstance(r.vector, dict) else r.vector)[:needed_dims]
+                for r in records
+            ]
+
+        points = [
+            models.PointStruct(
+                id=r.id,
+                vector=rag_service._point_vectors(text, vector, schema),
+                payload=r.payload,
+            )
+            for r, text, vector in zip(records, texts, full_vectors)
+        ]
+        client.upsert(collection_name=target, points=points)
+        migrated += len(points)
+        print(f"   ✅ {migrated} points", end="\r", flush=True)
+
+        if offset is None:
+            break
+
+    source_count = client.count(collection_name=source, exact=True).count
+    target_count = client.count(collection_name=target, exact=True).count
+    print(f"\n📦 {target_count}/{source_count} points in '{target}'.")
+
+    # BLUE/GREEN SWAP: only a validated generation goes live
+    if not await rag_service.validate_generation(target, min_points=max(1, source_count), smoke_query=smoke_query):
+        print(f"❌ Validation failed. '{target}' was NOT promoted; the live index is unchanged.")
+        return
+    rag_service.swap_alias(target)
+    print(f"🎉 MIGRATION COMPLETE: alias '{settings.QDRANT_COLLECTION_NAME}' now serves '{target}'.")
+    print("↩️  The previous generation is kept: to roll back, restore the previous EMBEDDING_* settings, then rag_service.rollback().")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed/truncate the index into a collection matching EMBEDDING_* settings")
+    parser.add_argument("--source", default=None, help="Default: the collection currently served by the alias")
+    parser.add_argument("--reembed", action="store_true", help="Force fresh embeddings instead of truncation")
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--smoke-query", default="Vision 2030", help="Query that must return hits before the alias swap")
+    args = parser.parse_args()
+
+    source = args.source or rag_service._serving_collection()
+    asyncio.run(migrate(source, args.reembed, args.batch_size, args.smoke_query))
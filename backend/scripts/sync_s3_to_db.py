@@ -1,8 +1,14 @@
 import asyncio
+import argparse
 import os
 import sys
-import boto3
+import time
+import shutil
+import tempfile
+from uuid import uuid4
 from pathlib import Path
+from typing import Optional
+from dataclasses import dataclass
 
 # Setup Path to import app modules
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
@@ -17,11 +23,12 @@ if sys.stdout.encoding != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8')
 
 from app.services.rag_service import rag_service
-from app.services.document_service import document_service
-from app.db.session import AsyncSessionLocal
-from app.models.document import Document
-from app.models.user import User
-from sqlalchemy import select
+from app.services.document_service import document_service, SUPPORTED_EXTENSIONS
+from app.services.storage_service import storage_service
+from app.services.chunk_dedup import source_document_id
+from app.db.session import AsyncSessionLocal, engine
+from app.models.sync_manifest import SyncManifestEntry
+from sqlalchemy import select, delete
 from app.core.config import settings
 
 # Setup Path to import app modules
@@ -30,103 +37,341 @@ BASE_DIR = Path(__file__).resolve().parent.parent # backend/
 # No need to override VECTOR_DB_PATH as we are using Qdrant now
 # settings will be loaded from .env and config.py
 
-async def sync_s3_to_vector_db():
-    print("🔄 STARTING SYNC: S3 -> VECTOR DATABASE (FAISS)")
+# Chunks (from one or more files) embedded + upserted per indexing batch
+SYNC_BATCH_CHUNKS = 256
+
+async def load_manifest() -> dict:
+    """S3 key -> SyncManifestEntry for everything already in the index."""
+    async with engine.begin() as conn:
+        await conn.run_sync(SyncManifestEntry.__table__.create, checkfirst=True)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(SyncManifestEntry))
+        return {entry.s3_key: entry for entry in result.scalars().all()}
+
+
+async def save_manifest_entry(entry: SyncManifestEntry):
+    async with AsyncSessionLocal() as db:
+        await db.merge(entry)
+        await db.commit()
+
+
+async def delete_manifest_entry(s3_key: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(SyncManifestEntry).where(SyncManifestEntry.s3_key == s3_key))
+        await db.commit()
+
+
+async def replace_manifest(entries: list):
+    """Full rebuild: the manifest describes the NEW generation only once it is live."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(SyncManifestEntry))
+        for entry in entries:
+            db.add(entry)
+        await db.commit()
+
+
+@dataclass
+class SyncItem:
+    """One S3 object travelling through the pipeline (list -> download/extract -> index)."""
+    key: str
+    etag: str
+    size: int
+    source: str
+    entry: Optional[SyncManifestEntry] = None
+    content_hash: str = ""
+    chunk_count: int = 0
+    failed: bool = False  # A batch with its chunks failed: no manifest entry, retried next run
+
+
+class SyncProgress:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.listed = 0
+        self.files_done = 0
+        self.chunks_done = 0
+
+    def report(self, message: str):
+        elapsed = max(time.perf_counter() - self.started, 1e-6)
+        print(f"{message}  [{self.files_done}/{self.listed} files | "
+              f"{self.files_done / elapsed:.1f} files/s | {self.chunks_done / elapsed:.1f} chunks/s]", flush=True)
+
+
+async def sync_s3_to_vector_db(full: bool = False, smoke_query: str = "Vision 2030", concurrency: Optional[int] = None):
+    concurrency = max(1, concurrency or settings.SYNC_CONCURRENCY)
+    print(f"🔄 STARTING {'FULL' if full else 'INCREMENTAL'} SYNC: S3 -> VECTOR DATABASE (QDRANT)")
+    print(f"⚙️  Concurrency: {concurrency} downloads ({storage_service.max_connections} pooled S3 connections), "
+          f"{document_service.max_workers} extraction processes")
     print("==============================================")
 
-    # 1. Connect to S3
-    bucket_name = os.getenv("S3_BUCKET_NAME")
-    region = os.getenv("AWS_REGION")
+    # 1. Connect to S3 (shared pooled client, see S3_MAX_CONNECTIONS)
+    bucket_name = storage_service.bucket
     
     if not bucket_name:
         print("❌ Error: S3_BUCKET_NAME not set.")
         return
 
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-        region_name=region
-    )
+    # ---------------------------------------------------------
+    # 2. LOAD SYNC MANIFEST (S3 key + ETag/SHA-256 -> already indexed)
+    # ---------------------------------------------------------
+    manifest = await load_manifest()
+    target_collection = None  # None -> write through the serving alias (incremental)
+    rebuilt_entries = []
+    if full:
+        # Blue/Green: build into a new generation, the live index keeps serving chat meanwhile
+        target_collection = rag_service.create_generation()
+        print(f"🧹 Full rebuild requested: building new generation '{target_collection}'...")
+        manifest = {}
+    print(f"📒 Manifest: {len(manifest)} files already indexed.")
+
+    stats = {
+        "new": 0, "changed": 0, "unchanged": 0, "deleted": 0, "errors": 0,
+        "bytes_downloaded": 0, "bytes_saved": 0, "chunks_indexed": 0, "points_created": 0, "embeddings_saved": 0,
+    }
+    seen_keys = set()
+    progress = SyncProgress()
+
+    # Bounded queues = backpressure: listing can't outrun downloads, downloads can't outrun embedding
+    # Downloads are spooled here and memory-mapped by the extraction workers
+    spool_dir = Path(tempfile.mkdtemp(prefix="s3_sync_"))
+    download_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    index_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
 
     # ---------------------------------------------------------
-    # 2. WIPE EXISTING QDRANT INDEX (Fresh Start)
+    # 3. STAGE 1: List (paginated) + skip unchanged
     # ---------------------------------------------------------
-    print("🧹 Wiping existing Qdrant Collection...")
-    rag_service.reset_index()
-    
-    print("✅ Old Brain Erased. Ready for fresh knowledge.")
+    async def lister():
+        print(f"📡 Listing objects in bucket: {bucket_name}...")
+        pages = storage_service.iter_pages("documents/")
+        try:
+            while True:
+                objects = await storage_service.next_page(pages)
+                if objects is None:
+                    break
+                for obj in objects:
+                    key = obj['Key']
+                    filename = key.split('/')[-1]
 
-    # 2. List all files in S3
-    print(f"📡 Listing objects in bucket: {bucket_name}...")
-    try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix="documents/")
-    except Exception as e:
-        print(f"❌ Failed to list S3 objects: {e}")
-        return
+                    # Skip directories, empty names and unsupported extensions
+                    if not filename or not filename.lower().endswith(tuple(f".{e}" for e in SUPPORTED_EXTENSIONS)):
+                        continue
 
-    if 'Contents' not in response:
-        print("⚠️ No documents found in S3 (prefix 'documents/').")
-        return
-        
-    files = response['Contents']
-    print(f"🔎 Found {len(files)} files in Cloud Storage.")
+                    seen_keys.add(key)
+                    progress.listed += 1
+                    item = SyncItem(
+                        key=key,
+                        etag=obj.get('ETag', '').strip('"'),
+                        size=obj.get('Size', 0),
+                        source=f"s3://{bucket_name}/{key}",
+                        entry=manifest.get(key),
+                    )
 
-    # 3. Process Each File
-    count = 0
-    errors = 0
-    
-    # Create temp dir
-    os.makedirs("temp_sync", exist_ok=True)
-
-    for obj in files:
-        key = obj['Key']
-        filename = key.split('/')[-1]
-        
-        # Skip directories or empty names
-        if not filename: 
-            continue
-            
-        print(f"⬇️  Processing: {filename}...", end=" ", flush=True)
+                    # UNCHANGED: same ETag -> nothing to download, extract or embed
+                    if item.entry and item.entry.etag == item.etag:
+                        stats["unchanged"] += 1
+                        stats["bytes_saved"] += item.size
+                        stats["embeddings_saved"] += item.entry.chunk_count or 0
+                        progress.files_done += 1
+                        continue
 
-        try:
-            # Check if file extension is supported
-            if not filename.lower().endswith(('.pdf', '.docx', '.txt', '.md')):
-                print("Skipped (Format not supported)")
-                continue
+                    await download_queue.put(item)
+        finally:
+            for _ in range(concurrency):
+                await download_queue.put(None)
+        print(f"🔎 Found {progress.listed} files in Cloud Storage.")
 
-            # Stream direct from S3 (In-Memory)
-            # No disk write needed
-            obj_response = s3.get_object(Bucket=bucket_name, Key=key)
-            file_content = obj_response['Body'].read()
+    # ---------------------------------------------------------
+    # 4. STAGE 2: Download (threads) + streaming Extract (process pool) + Split
+    # ---------------------------------------------------------
+    async def downloader():
+        while True:
+            item = await download_queue.get()
+            if item is None:
+                return
+            filename = item.key.split('/')[-1]
+            spooled = None
+            try:
+                # Streamed to a local spool file (hashed on the way), never read whole into RAM
+                body = await storage_service.open_stream(item.source)
+                spooled = await document_service.spool(body, spool_dir / f"{uuid4().hex}_{filename}")
+                stats["bytes_downloaded"] += spooled.size
+                item.content_hash = spooled.content_hash
+
+                # ETag changed but bytes identical (e.g. re-upload / multipart ETag): refresh manifest only
+                if item.entry and item.entry.content_hash == item.content_hash:
+                    item.entry.etag = item.etag
+                    await save_manifest_entry(item.entry)
+                    stats["unchanged"] += 1
+                    stats["embeddings_saved"] += item.entry.chunk_count or 0
+                    progress.files_done += 1
+                    progress.report(f"⏭️  {filename}: unchanged content")
+                    continue
+
+                ext = filename.lower().split('.')[-1]
+                metadata = {
+                    "filename": filename,
+                    "type": ext,
+                    # Point to the EXISTING S3 object (no re-upload)
+                    "source": item.source,
+                    "document_id": source_document_id(item.source),
+                    "processed_at": str(os.times()),
+                    "scope": "public",
+                    "user_id": "system",
+                }
+                # Drop stale chunks and parents (previous version / interrupted run) before chunking:
+                # iter_chunks stores this run's parents as it goes, so clearing later would drop them.
+                # This is unconditional, NOT gated on a manifest entry: on the first incremental run over
+                # an existing index (or after a lost manifest) no entry exists but the source's chunks do.
+                # A full rebuild writes into a fresh generation: nothing to drop.
+                if not full:
+                    await rag_service.delete_by_source(item.source)
+
+                # Pages stream out of DocumentService's process pool and are chunked as they arrive;
+                # the bounded index queue holds this file back while embedding catches up.
+                # Bytes seen before (e.g. renamed/re-uploaded files) replay cached pages/chunks.
+                pages = document_service.aiter_pages(spooled.path, ext, item.content_hash)
+                async for chunks in rag_service.iter_chunks(pages, metadata, content_hash=item.content_hash):
+                    await index_queue.put((item, chunks, False))
+                await index_queue.put((item, [], True))
+            except Exception as e:
+                stats["errors"] += 1
+                progress.report(f"❌ {filename}: {e}")
+            finally:
+                if spooled:
+                    spooled.path.unlink(missing_ok=True)
+
+    # ---------------------------------------------------------
+    # 5. STAGE 3: Batched embedding + upsert (chunks of many files per batch)
+    # ---------------------------------------------------------
+    async def index_batch(batch: list):
+        # Chunks of a file with an earlier failed batch are not indexed: it is retried whole next run
+        result = await rag_service.add_chunks(
+            [chunk for item, chunks, _ in batch if not item.failed for chunk in chunks],
+            collection_name=target_collection
+        )
+        stats["chunks_indexed"] += result.chunks
+        stats["points_created"] += result.created  # Duplicates merge into existing points
+        progress.chunks_done += result.chunks
 
-            processed_doc = await document_service.process_file(
-                content=file_content,
-                filename=filename,
-                skip_upload=True  # Optimization: Don't re-upload to S3
+        for item, chunks, last in batch:
+            if item.failed:
+                if last:
+                    file_failed(item)
+                continue
+            item.chunk_count += len(chunks)
+            if not last:
+                continue
+            stats["changed" if item.entry else "new"] += 1
+            new_entry = SyncManifestEntry(
+                s3_key=item.key,
+                etag=item.etag,
+                content_hash=item.content_hash,
+                size=item.size,
+                chunk_count=item.chunk_count,
+                source=item.source,
             )
-            
-            # Manually Override Metadata to point to EXISTING S3 URL
-            if processed_doc:
-                processed_doc.metadata["source"] = f"s3://{bucket_name}/{key}"
-                processed_doc.metadata["scope"] = "public"
-                processed_doc.metadata["user_id"] = "system"
-
-                await rag_service.ingest_document(processed_doc)
-                count += 1
-                print("✅ Indexed")
+            if full:
+                rebuilt_entries.append(new_entry)
             else:
-                print("⚠️  No text content")
+                await save_manifest_entry(new_entry)
+            progress.files_done += 1
+            label = f"{item.chunk_count} chunks" if item.chunk_count else "no text content"
+            progress.report(f"✅ {item.key.split('/')[-1]} ({label})")
+
+    def file_failed(item: SyncItem):
+        # No manifest entry: the file counts as not indexed and is picked up again next run
+        stats["errors"] += 1
+        progress.report(f"❌ {item.key.split('/')[-1]}: not indexed (a batch of its chunks failed)")
+
+    async def indexer():
+        done = False
+        while not done:
+            # Block for the first part, then drain whatever is ready up to the batch size
+            batch = [await index_queue.get()]
+            while batch[-1] is not None and sum(len(part[1]) for part in batch) < SYNC_BATCH_CHUNKS:
+                try:
+                    batch.append(index_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            if batch[-1] is None:
+                done = True
+                batch.pop()
+            if not batch:
+                continue
+            try:
+                await index_batch(batch)
+            except Exception as e:
+                progress.report(f"❌ Indexing batch failed: {e}")
+                for item, _, _ in batch:
+                    item.failed = True
+                for item, _, last in batch:
+                    if last:
+                        file_failed(item)
 
+    # Pipeline: any stage failing stops (and awaits) every other stage
+    tasks = {asyncio.create_task(lister()): "listing"}
+    tasks.update({asyncio.create_task(downloader()): "download" for _ in range(concurrency)})
+    tasks[asyncio.create_task(indexer())] = "indexing"
+    producers = [task for task, stage in tasks.items() if stage != "indexing"]
+    try:
+        pending, producers_done = set(tasks), False
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            failed = next((task for task in done if not task.cancelled() and task.exception()), None)
+            if failed is not None:
+                print(f"❌ Sync failed in the {tasks[failed]} stage: {failed.exception()}")
+                return
+            if not producers_done and all(task.done() for task in producers):
+                producers_done = True
+                await index_queue.put(None)  # Everything downloaded: flush the last batch
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        document_service.shutdown()
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    # 6. DELETED: in the manifest but no longer in S3 -> remove points by payload filter
+    for key, entry in manifest.items():
+        if key in seen_keys:
+            continue
+        try:
+            await rag_service.delete_by_source(entry.source)
+            await delete_manifest_entry(key)
+            stats["deleted"] += 1
+            print(f"🗑️  Removed: {key.split('/')[-1]}")
         except Exception as e:
-            print(f"❌ Error: {e}")
-            errors += 1
+            print(f"❌ Failed to remove {key}: {e}")
+            stats["errors"] += 1
+
+    # 7. BLUE/GREEN SWAP: only a validated generation goes live
+    if full:
+        if not await rag_service.validate_generation(
+            target_collection, min_points=max(1, stats["points_created"]), smoke_query=smoke_query
+        ):
+            print(f"❌ Validation failed. '{target_collection}' was NOT promoted; the live index is unchanged.")
+            return
+        rag_service.swap_alias(target_collection)
+        await replace_manifest(rebuilt_entries)
+        print(f"🔀 Alias '{settings.QDRANT_COLLECTION_NAME}' now serves '{target_collection}'.")
+        removed = rag_service.gc_generations()
+        if removed:
+            print(f"🗑️  Garbage-collected old generations: {', '.join(removed)}")
 
+    elapsed = time.perf_counter() - progress.started
     print("==============================================")
     print(f"🎉 SYNC COMPLETE!")
-    print(f"✅ Effectively Ingested: {count} documents")
-    print(f"❌ Errors: {errors}")
+    print(f"🆕 New: {stats['new']}  ✏️  Changed: {stats['changed']}  ⏭️  Unchanged: {stats['unchanged']}  🗑️  Deleted: {stats['deleted']}")
+    print(f"✅ Chunks indexed: {stats['chunks_indexed']}  (♻️ {stats['chunks_indexed'] - stats['points_created']} merged into existing points)")
+    print(f"💾 Bytes downloaded: {stats['bytes_downloaded']:,}  |  Bytes skipped: {stats['bytes_saved']:,}")
+    print(f"💰 Embeddings saved (unchanged chunks): {stats['embeddings_saved']:,}")
+    print(f"⏱️  {elapsed:.1f}s  |  {progress.files_done / max(elapsed, 1e-6):.1f} files/s  |  {stats['chunks_indexed'] / max(elapsed, 1e-6):.1f} chunks/s")
+    print(f"❌ Errors: {stats['errors']}")
     print("🧠 Vector Database is now updated with S3 knowledge.")
 
 if __name__ == "__main__":
-    asyncio.run(sync_s3_to_vector_db())
+    parser = argparse.ArgumentParser(description="Sync S3 documents into the Qdrant index")
+    parser.add_argument("--full", action="store_true", help="Re-ingest everything into a new index generation (blue/green)")
+    parser.add_argument("--smoke-query", default="Vision 2030", help="Query that must return hits before the alias swap")
+    parser.add_argument("--concurrency", type=int, default=settings.SYNC_CONCURRENCY, help="Concurrent downloads (default: SYNC_CONCURRENCY)")
+    args = parser.parse_args()
+    asyncio.run(sync_s3_to_vector_db(full=args.full, smoke_query=args.smoke_query, concurrency=args.concurrency))
@@ -0,0 +1,124 @@
+"""
+Exercises the pooled S3 storage service against a local S3 stand-in.
+
+Without S3_ENDPOINT_URL, runs in-process against moto (pip install moto).
+With S3_ENDPOINT_URL (e.g. MinIO: http://localhost:9000), runs against that server.
+    python scripts/test_s3_storage.py --size-mb 40
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from contextlib import nullcontext
+
+# Setup path to import backend modules
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# FIX: Force UTF-8 for Windows Console to support emojis
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+LOCAL_SERVER = bool(os.environ.get("S3_ENDPOINT_URL"))
+if not LOCAL_SERVER:
+    # moto accepts any credentials; never touch a real bucket from this script
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "S3_BUCKET_NAME": "storage-test-bucket",
+    })
+
+from app.services.storage_service import storage_service
+
+
+def temp_file(content: bytes, suffix: str = ".bin") -> str:
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(content)
+        return f.name
+
+
+async def run(size_mb: int, parallel: int):
+    client = storage_service.client
+    bucket = storage_service.bucket
+    region = client.meta.region_name
+    try:
+        if region == "us-east-1":
+            client.create_bucket(Bucket=bucket)
+        else:
+            client.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": region})
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    print(f"🪣 Bucket: {bucket} ({'S3_ENDPOINT_URL=' + os.environ['S3_ENDPOINT_URL'] if LOCAL_SERVER else 'moto'})")
+
+    # 1. Small file (single PUT)
+    path = temp_file(b"hello storage", ".txt")
+    try:
+        url = await storage_service.upload_file(path, "uploads/test/small.txt")
+    finally:
+        os.unlink(path)
+    assert await storage_service.download(url) == b"hello storage"
+    print(f"✅ Small upload + download: {url}")
+
+    # 2. Large file from disk (multipart, parts in parallel)
+    payload = os.urandom(size_mb * 1024 * 1024)
+    path = temp_file(payload, ".pdf")
+    try:
+        started = time.perf_counter()
+        url = await storage_service.upload_file(path, "uploads/test/large.pdf")
+        elapsed = time.perf_counter() - started
+    finally:
+        os.unlink(path)
+    head = client.head_object(Bucket=bucket, Key="uploads/test/large.pdf")
+    multipart = "-" in head["ETag"]  # Multipart ETags are '<md5>-<parts>'
+    assert head["ContentLength"] == len(payload)
+    assert await storage_service.download(url) == payload
+    print(f"✅ {size_mb} MB upload in {elapsed:.2f}s | multipart: {multipart} ({head['ETag']}) | type: {head['ContentType']}")
+
+    # 3. Concurrent uploads share one client + the bounded executor
+    paths = [temp_file(os.urandom(256 * 1024)) for _ in range(parallel)]
+    started = time.perf_counter()
+    try:
+        urls = await asyncio.gather(*[
+            storage_service.upload_file(path, f"uploads/test/concurrent_{i}.bin")
+            for i, path in enumerate(paths)
+        ])
+    finally:
+        for path in paths:
+            os.unlink(path)
+    print(f"✅ {parallel} concurrent uploads in {time.perf_counter() - started:.2f}s (pool: {storage_service.max_connections})")
+
+    # 4. Listing + delete
+    keys = [obj["Key"] for page in storage_service.iter_pages("uploads/test/") for obj in page]
+    for url in urls + [storage_service.url("uploads/test/small.txt"), storage_service.url("uploads/test/large.pdf")]:
+        await storage_service.delete(url)
+    remaining = [obj["Key"] for page in storage_service.iter_pages("uploads/test/") for obj in page]
+    assert not remaining, remaining
+    print(f"✅ Listed {len(keys)} objects, deleted all")
+
+    storage_service.shutdown()
+    print("🎉 S3 storage OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smoke-test the pooled S3 storage service (moto or S3_ENDPOINT_URL)")
+    parser.add_argument("--size-mb", type=int, default=24, help="Size of the multipart upload")
+    parser.add_argument("--parallel", type=int, default=32, help="Concurrent small uploads")
+    args = parser.parse_args()
+
+    if LOCAL_SERVER:
+        mock = nullcontext()
+    else:
+        try:
+            from moto import mock_aws
+        except ImportError:
+            print("❌ moto is not installed (pip install moto) and S3_ENDPOINT_URL is not set.")
+            sys.exit(1)
+        mock = mock_aws()
+
+    with mock:
+        asyncio.run(run(args.size_mb, args.parallel))